@@ -9,7 +9,6 @@ from dotenv import load_dotenv
 
 # Third-party imports
 from openai import AsyncOpenAI
-import edge_tts
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.tools import tool
@@ -19,6 +18,9 @@ from langgraph.checkpoint.memory import MemorySaver
 
 # Local imports
 from game_manager import GameManager
+from room_actors import RoomActors, RoomBusy
+from speech import EDGE_VOICE, collect, edge_chunks, openai_chunks
+from tts_cache import tts_cache
 
 load_dotenv()
 
@@ -47,15 +49,23 @@ class ActionCaptureCallback(BaseCallbackHandler):
             pass
 
 class AccessibilityManager:
-    def __init__(self, game_manager: GameManager, sio):
+    def __init__(self, game_manager: GameManager, sio, broadcast_state, room_actors: RoomActors):
         self.game_manager = game_manager
         self.sio = sio  # Socket.IO instance for broadcasting events
+        self.broadcast_state = broadcast_state  # main.broadcast_room_state(room_id, joined_sid=None)
+        # Tools change rooms through their command queues like socket handlers do (and are async:
+        # LangGraph runs sync tools in a thread pool, off the event loop)
+        self.room_actors = room_actors
+        # voice_workers.VoicePool when STT / TTS run in worker processes (set by main.py); None: in-process
+        self.voice_pool = None
+        self.narrate_not_gate = None  # main.narrate_not_gate(room_id, target_sid): spoken alert to the target's team
+        self.announce_solved = None  # async main.announce_solved(room_id, teams): round_result for teams a vote solved
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.client = AsyncOpenAI(api_key=self.api_key) if self.api_key else None
         
         # Tools definitions
         @tool
-        def vote(sid: str, value: int):
+        async def vote(sid: str, value: int):
             """Submit a vote for the current game round. 
             
             Args:
@@ -68,11 +78,17 @@ class AccessibilityManager:
             - "my answer is 0" / "my answer is 1"
             """
             try:
-                room = self.game_manager.set_input(sid, value)
+                room, _, _ = self.game_manager.locate(sid)
+                if room is not None:
+                    room, solved = await self.room_actors.call(room.id, self.game_manager.cast_vote, sid, value)
+                    if solved and self.announce_solved:
+                        await self.announce_solved(room.id, solved)
                 if room:
                     # Note: broadcast happens in main.py via voice_input handler
                     return f"Voted {value} successfully."
                 return "Failed to vote. Are you in a game?"
+            except RoomBusy:
+                return "The room is busy, try again in a moment."
             except Exception as e:
                 print(f"[ERROR] vote failed: {e}")
                 return f"Error voting: {str(e)}"
@@ -85,17 +101,16 @@ class AccessibilityManager:
             DO NOT use this for navigating, joining, or opening survey/instructions.
             """
             try:
-                for room in self.game_manager.rooms.values():
-                    for team in room.teams.values():
-                        if sid in team.players:
-                            return json.dumps({
-                                "round": room.round_number,
-                                "gate": team.current_gate,
-                                "score": team.score,
-                                "my_card": team.players[sid].card_value,
-                                "time_left": max(0, room.current_round_end_time - asyncio.get_event_loop().time()) if room.state == 'PLAYING' else 0,
-                                "state": room.state
-                            })
+                room, team, player = self.game_manager.locate(sid)
+                if player is not None:
+                    return json.dumps({
+                        "round": room.round_number,
+                        "gate": team.current_gate,
+                        "score": team.score,
+                        "my_card": player.card_value,
+                        "time_left": max(0, room.current_round_end_time - time.time()) if room.state == 'PLAYING' else 0,
+                        "state": room.state
+                    })
                 return "You are not in a game room yet. Join a game first."
             except Exception as e:
                 print(f"[ERROR] get_game_state failed: {e}")
@@ -146,67 +161,23 @@ class AccessibilityManager:
                     avatar_emoji = '🦁'
 
             room_id = "demo-room" 
-            success, msg = self.game_manager.join_room(sid, room_id, name, "player", None, avatar_emoji)
+            try:
+                success, msg = await self.room_actors.call(room_id, self.game_manager.join_room, sid, room_id, name, "player", None, avatar_emoji)
+            except RoomBusy:
+                return "The room is busy, try again in a moment."
+
             if success:
                 # CRITICAL: Join the Socket.IO room so the user receives broadcasts
                 await self.sio.enter_room(sid, room_id)
                 print(f"[AGENT DEBUG] User {sid} joined Socket.IO room {room_id}")
                 
-                # Broadcast updated game state to all clients in the room (same logic as broadcast_room_state)
-                room = self.game_manager.rooms.get(room_id)
-                if room:
-                    state = {
-                        'id': room.id,
-                        'state': room.state,
-                        'timer': max(0, room.current_round_end_time - time.time()) if room.state == 'PLAYING' else 0,
-                        'difficulty': room.difficulty,
-                        'game_mode': room.game_mode,
-                        'round_number': room.round_number,
-                        'custom_card_0': room.custom_card_0,
-                        'custom_card_1': room.custom_card_1,
-                        'logic_mode': room.logic_mode,
-                        'max_players_per_team': room.max_players_per_team,
-                        'not_lockout_time': room.not_lockout_time,
-                        'target_gate': room.target_gate,
-                        'target_gates': room.target_gates,
-                        'teams': {
-                            tid: {
-                                'id': t.id,
-                                'name': t.name,
-                                'score': t.score,
-                                'solved_current_round': t.solved_current_round,
-                                'last_round_result': t.last_round_result,
-                                'not_gates_used': t.not_gates_used,
-                                'was_sabotaged': t.was_sabotaged,
-                                'round_stats': {
-                                    'base': t.last_round_base,
-                                    'bonus': t.last_round_bonus,
-                                    'penalty': t.last_round_penalty
-                                },
-                                'current_gate': t.current_gate,
-                                'chat_enabled': t.chat_enabled,
-                                'players': {
-                                    pid: {
-                                        'sid': pid,
-                                        'name': p.name,
-                                        'card_value': p.card_value,
-                                        'vote_value': p.vote_value,
-                                        'has_not_gate': p.has_not_gate,
-                                        'avatar': p.avatar
-                                    } for pid, p in t.players.items()
-                                }
-                            } for tid, t in room.teams.items()
-                        },
-                        'operator': room.operator_sid
-                    }
-                    print(f"[AGENT DEBUG] Broadcasting game_state to room {room_id} with {len(room.teams)} teams")
-                    await self.sio.emit('game_state', state, room=room_id)
-                    print(f"[AGENT DEBUG] game_state emitted successfully")
+                # Same path as a normal join: full snapshot to the new player, delta to everyone else
+                await self.broadcast_state(room_id, joined_sid=sid)
                 return f"Joined room {room_id} as {name}. Navigating to game..."
             return f"Failed to join: {msg}"
         
         @tool
-        def apply_not_gate(sid: str, target_player_name: str):
+        async def apply_not_gate(sid: str, target_player_name: str):
             """Apply OR Remove a NOT gate.
             
             Uses:
@@ -219,22 +190,20 @@ class AccessibilityManager:
                 target_player_name: Name of the player to target (can be yourself)
             """
             try:
-                # Find target player SID by name in ANY team
-                my_team_id = None
+                # Resolve my room via the sid index, then find the target by name in that room only
+                room, my_team, _ = self.game_manager.locate(sid)
+                if room is None:
+                    return "You are not in a game room yet. Join a game first."
+                my_team_id = my_team.id if my_team else None
                 target_sid = None
                 target_found_team_id = None
                 
-                for room in self.game_manager.rooms.values():
-                    for team in room.teams.values():
-                        if sid in team.players:
-                            my_team_id = team.id
-                        
-                        # Look for target in ALL teams
-                        for pid, player in team.players.items():
-                            if player.name.lower() == target_player_name.lower():
-                                target_sid = pid
-                                target_found_team_id = team.id
-                                break
+                for team in room.teams.values():
+                    for pid, player in team.players.items():
+                        if player.name.lower() == target_player_name.lower():
+                            target_sid = pid
+                            target_found_team_id = team.id
+                            break
                     if target_sid: break
                 
                 if not target_sid:
@@ -244,15 +213,19 @@ class AccessibilityManager:
                 # Game Manager handles the rules:
                 # - If Self/Team: Only allowed in 'open' mode.
                 # - If Rival: Requires Score > 4.
-                room = self.game_manager.toggle_not_gate(sid, target_sid, "demo-room")
+                room = await self.room_actors.call(room.id, self.game_manager.toggle_not_gate, sid, target_sid, room.id)
                 
                 if room:
+                    if self.narrate_not_gate:
+                        self.narrate_not_gate(room.id, target_sid)
                     is_self = (my_team_id == target_found_team_id)
                     if is_self:
                         return f"Successfully removed/toggled NOT gate on {target_player_name}."
                     return f"Successfully sabotaged {target_player_name} with NOT gate!"
                     
                 return "Failed to toggle NOT gate. Check rules: \n- Self/Team: Only in 'Force Open' mode.\n- Rival: Need score > 4 and time > 5s."
+            except RoomBusy:
+                return "The room is busy, try again in a moment."
             except Exception as e:
                 print(f"[ERROR] apply_not_gate failed: {e}")
                 return f"Error applying NOT gate: {str(e)}"
@@ -580,9 +553,10 @@ Be concise and professional. Always USE THE TOOLS when appropriate, don't just d
                 # Lazy load model (using 'base' as it's fast)
                 if not hasattr(self, 'local_whisper_model'):
                     print("Loading local whisper model 'base'...")
-                    self.local_whisper_model = whisper.load_model("base")
+                    self.local_whisper_model = await asyncio.to_thread(whisper.load_model, "base")
                 
-                result = self.local_whisper_model.transcribe(temp_path, language="es")
+                # Synchronous and slow: in a thread, so the game keeps running meanwhile
+                result = await asyncio.to_thread(self.local_whisper_model.transcribe, temp_path, language="es")
                 return result["text"]
             except Exception as local_e:
                 print(f"Local STT Error: {local_e}")
@@ -593,30 +567,39 @@ Be concise and professional. Always USE THE TOOLS when appropriate, don't just d
 
     async def tts(self, text: str) -> bytes:
         """Converts text to audio using OpenAI (High Quality) or Edge-TTS (Fallback)."""
+        return await collect(self.tts_stream(text))
+
+    async def tts_stream(self, text: str):
+        """Same audio as tts, yielded in chunks as the engine produces them."""
         if self.client:
+            started = False
             try:
-                response = await self.client.audio.speech.create(
-                    model="tts-1",
-                    voice="nova",
-                    input=text
-                )
-                return response.content
+                async for chunk in tts_cache.stream("openai", "nova", text, lambda: openai_chunks(self.client, text, "nova")):
+                    started = True
+                    yield chunk
+                return
             except Exception as e:
+                if started:
+                    raise  # Part of the clip is out already: no switching voices midway
                 print(f"OpenAI TTS Failed, falling back to Edge: {e}")
         
-        communicate = edge_tts.Communicate(text, "es-ES-AlvaroNeural")
-        audio_data = b""
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_data += chunk["data"]
-        return audio_data
-
-    async def process_command(self, sid: str, audio_bytes: Optional[bytes] = None, text_input: Optional[str] = None, context: Dict = None):
+        async for chunk in tts_cache.stream("edge", EDGE_VOICE, text, lambda: edge_chunks(text, EDGE_VOICE)):
+            yield chunk
+
+    async def process_command(self, sid: str, audio_bytes: Optional[bytes] = None, text_input: Optional[str] = None, context: Dict = None,
+                              audio_stream: Optional[int] = None):
         """
         Main pipeline: Audio -> Text -> Agent -> Action -> Response -> Audio
+        With audio_stream, the response carries that stream id instead of audio: the caller streams it (tts_stream).
         """
         user_text = text_input
-        if audio_bytes:
+        if audio_bytes and self.voice_pool:
+            try:
+                user_text = await self.voice_pool.submit('stt', audio_bytes)
+            except Exception as e:
+                print(f"[VOICE] STT job failed: {e}")
+                user_text = ""
+        elif audio_bytes:
             user_text = await self.stt(audio_bytes)
         
         if not user_text:
@@ -656,13 +639,23 @@ Be concise and professional. Always USE THE TOOLS when appropriate, don't just d
             response_text = "Lo siento, hubo un error procesando tu solicitud."
 
         # Generate Audio Response
-        audio_bytes = await self.tts(response_text)
-        audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
+        if audio_stream is not None:
+            audio_b64 = None
+        elif self.voice_pool:
+            try:
+                audio_b64 = await self.voice_pool.submit('speak', response_text)
+            except Exception as e:
+                print(f"[VOICE] TTS job failed: {e}")
+                audio_b64 = None
+        else:
+            audio_bytes = await self.tts(response_text)
+            audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
         
         print(f"[PROCESS_COMMAND] Returning {len(action_callback.actions)} client_actions")
         return {
             "text": response_text,
             "audio": audio_b64,
             "user_text": user_text,
-            "client_actions": action_callback.actions
+            "client_actions": action_callback.actions,
+            "audio_stream": audio_stream
         }
@@ -8,7 +8,6 @@ from dotenv import load_dotenv
 
 # Third-party imports
 from openai import AsyncOpenAI
-import edge_tts
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.prebuilt import create_react_agent
@@ -18,6 +17,9 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
+from speech import collect, edge_chunks
+from tts_cache import tts_cache
+
 load_dotenv()
 
 class AssistantManager:
@@ -196,18 +198,26 @@ class AssistantManager:
 
     async def tts(self, text: str, character_key: str) -> bytes:
         """Converts text to audio using Edge-TTS with character-specific voice."""
+        return await collect(self.tts_stream(text, character_key))
+
+    async def tts_stream(self, text: str, character_key: str):
+        """Same audio as tts, yielded in chunks as Edge-TTS produces them."""
         char_config = self.characters.get(character_key, {})
         voice = char_config.get("voice", "es-ES-AlvaroNeural")
-        
-        communicate = edge_tts.Communicate(text, voice)
-        audio_data = b""
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_data += chunk["data"]
-        return audio_data
+        async for chunk in tts_cache.stream("edge", voice, text, lambda: edge_chunks(text, voice)):
+            yield chunk
 
-    async def process_chat(self, sid: str, character_key: str, audio_bytes: Optional[bytes] = None, text_input: Optional[str] = None):
-        """Processes a chat message (audio or text) and returns a response."""
+    async def speak(self, text: str, character_key: str, audio_stream: Optional[int]) -> Optional[str]:
+        """Base64 audio of the response (None when it is streamed separately)"""
+        if audio_stream is not None:
+            return None
+        audio_out = await self.tts(text, character_key)
+        return base64.b64encode(audio_out).decode('utf-8')
+
+    async def process_chat(self, sid: str, character_key: str, audio_bytes: Optional[bytes] = None, text_input: Optional[str] = None,
+                           audio_stream: Optional[int] = None):
+        """Processes a chat message (audio or text) and returns a response.
+        With audio_stream, spoken responses carry that stream id instead of audio: the caller streams it (tts_stream)."""
         user_text = text_input
         if audio_bytes:
             user_text = await self.stt(audio_bytes)
@@ -227,10 +237,10 @@ class AssistantManager:
             moderation_in = await self.moderate(user_text, char_context, is_user_input=True)
             if not moderation_in.get("safe", True):
                 response_text = "Lo siento, pero no puedo hablar sobre ese tema. Vamos a enfocarnos en algo divertido y apropiado para todos."
-                audio_out = await self.tts(response_text, character_key)
                 return {
                     "text": response_text,
-                    "audio": base64.b64encode(audio_out).decode('utf-8'),
+                    "audio": await self.speak(response_text, character_key, audio_stream),
+                    "audio_stream": audio_stream,
                     "user_text": user_text,
                     "character": character_key,
                     "moderated": True
@@ -255,12 +265,10 @@ class AssistantManager:
                     response_text = moderation_out["filtered_text"]
 
             # Generate Audio
-            audio_out = await self.tts(response_text, character_key)
-            audio_b64 = base64.b64encode(audio_out).decode('utf-8')
-            
             return {
                 "text": response_text,
-                "audio": audio_b64,
+                "audio": await self.speak(response_text, character_key, audio_stream),
+                "audio_stream": audio_stream,
                 "user_text": user_text,
                 "character": character_key
             }
@@ -0,0 +1,203 @@
+"""
+Benchmark suite for GameManager and broadcast hot paths.
+
+Covers join_room, set_input + check_logic (the player_input handler),
+toggle_not_gate, start_round, finalize_round_scores, the uncached game_state dict
+build and the versioned delta done by broadcast_room_state (after a vote and with
+nothing changed), at parameterized scales of rooms x teams x players-per-team.
+
+Usage:
+    python bench_game_manager.py                                   # default scales
+    python bench_game_manager.py --scales 10x2x3,200x15x5 --json bench_$(git rev-parse --short HEAD).json
+    python bench_game_manager.py --json new.json --compare old.json   # flag regressions between commits
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from game_manager import GameManager, GATE_LOGIC
+from room_state import RoomStateTracker, serialize_room
+
+DEFAULT_SCALES = ['10x2x3', '100x4x3', '500x15x5']
+TEAM_IDS = 'ABCDEFGHIJKLMNO'  # add_team allows 15 teams per room
+REGRESSION_THRESHOLD = 1.10  # Flag anything >10% slower than the baseline
+DEFAULT_REPEATS = 5  # Keep the best of N runs to damp scheduler noise
+
+def parse_scale(scale: str):
+    rooms, teams, players = (int(x) for x in scale.lower().split('x'))
+    if not 1 <= teams <= len(TEAM_IDS):
+        raise ValueError(f"teams must be between 1 and {len(TEAM_IDS)}")
+    return rooms, teams, players
+
+def stats(samples_ns: List[int]) -> Dict:
+    samples = sorted(samples_ns)
+    n = len(samples)
+    total = sum(samples)
+    pick = lambda q: samples[min(n - 1, int(q * n))] / 1000
+    return {
+        'ops': n,
+        'mean_us': total / n / 1000,
+        'p50_us': pick(0.50),
+        'p95_us': pick(0.95),
+        'p99_us': pick(0.99),
+        'ops_per_s': n / (total / 1e9) if total else 0
+    }
+
+def timed(calls: List[Callable]) -> Dict:
+    perf = time.perf_counter_ns
+    samples = []
+    for call in calls:
+        t0 = perf()
+        call()
+        samples.append(perf() - t0)
+    return stats(samples)
+
+def run_scale(scale: str, votes_per_player: int, rng: random.Random) -> Dict:
+    n_rooms, n_teams, n_players = parse_scale(scale)
+    gm = GameManager()
+    room_ids = [f"bench-{i}" for i in range(n_rooms)]
+    results = {}
+
+    # Rooms and teams are setup, not measured
+    for room_id in room_ids:
+        room = gm.create_room(room_id)
+        room.max_players_per_team = n_players
+        room.game_mode = 'asymmetric'  # Mix of every gate
+        for tid in TEAM_IDS[:n_teams]:
+            gm.add_team(room_id, tid, f"Team {tid}")
+
+    joins = []
+    for room_id in room_ids:
+        joins.append(lambda r=room_id: gm.join_room(f"{r}:op", r, "Hacker", "operator"))
+        for tid in TEAM_IDS[:n_teams]:
+            for p in range(n_players):
+                sid = f"{room_id}:{tid}{p}"
+                joins.append(lambda s=sid, r=room_id, t=tid: gm.join_room(s, r, s, "player", t))
+    results['join_room'] = timed(joins)
+
+    results['start_round'] = timed([lambda r=room_id: gm.start_round(r, 3600) for room_id in room_ids])
+
+    player_sids = [sid for sid, (_, team, _) in gm.sid_index.items() if team is not None]
+
+    def vote(sid, value):
+        room = gm.set_input(sid, value)
+        _, team, _ = gm.locate(sid)
+        gm.check_logic(room.id, team.id)
+
+    vote_calls = [lambda s=rng.choice(player_sids), v=rng.randint(0, 1): vote(s, v)
+                  for _ in range(len(player_sids) * votes_per_player)]
+    results['set_input+check_logic'] = timed(vote_calls)
+
+    def toggle(sid):
+        room, _, _ = gm.locate(sid)
+        gm.toggle_not_gate(room.operator_sid, sid, room.id)
+
+    results['toggle_not_gate'] = timed([lambda s=rng.choice(player_sids): toggle(s)
+                                        for _ in range(len(player_sids))])
+
+    rooms = [gm.rooms[r] for r in room_ids]
+    results['broadcast_state_build'] = timed([lambda room=room: serialize_room(room) for room in rooms * 3])
+
+    # What broadcast_room_state actually does after a vote: serialize + diff against the last version
+    tracker = RoomStateTracker()
+    for room in rooms:
+        tracker.next_updates(room)
+    results['broadcast_delta'] = timed([lambda s=rng.choice(player_sids), v=rng.randint(0, 1):
+                                        (gm.set_input(s, v), tracker.next_updates(gm.locate(s)[0]))
+                                        for _ in range(len(rooms) * 3)])
+
+    # Back-to-back broadcasts with nothing new (e.g. several handlers firing for one action)
+    results['broadcast_unchanged'] = timed([lambda room=room: tracker.next_updates(room) for room in rooms * 3])
+
+    results['finalize_round_scores'] = timed([lambda r=room_id: gm.finalize_round_scores(r) for room_id in room_ids])
+    return results
+
+def best_of(scale: str, votes_per_player: int, seed: int, repeats: int) -> Dict:
+    """Run a scale `repeats` times on fresh managers, keep each benchmark's fastest run"""
+    best = {}
+    for _ in range(repeats):
+        for name, s in run_scale(scale, votes_per_player, random.Random(seed)).items():
+            if name not in best or s['mean_us'] < best[name]['mean_us']:
+                best[name] = s
+    return best
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def print_results(report: Dict, baseline: Dict = None, threshold: float = REGRESSION_THRESHOLD):
+    base_results = baseline.get('results', {}) if baseline else {}
+    header = f"{'Scale':<12} | {'Benchmark':<24} | {'ops':>7} | {'mean us':>9} | {'p95 us':>9} | {'ops/s':>11}"
+    if baseline:
+        header += f" | {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    regressions = []
+    for scale, benches in report['results'].items():
+        for name, s in benches.items():
+            line = f"{scale:<12} | {name:<24} | {s['ops']:>7} | {s['mean_us']:>9.2f} | {s['p95_us']:>9.2f} | {s['ops_per_s']:>11,.0f}"
+            base = base_results.get(scale, {}).get(name)
+            if base:
+                ratio = s['mean_us'] / base['mean_us'] if base['mean_us'] else 0
+                line += f" | {ratio:>7.2f}x"
+                if ratio > threshold:
+                    regressions.append((scale, name, ratio))
+            print(line)
+    if baseline:
+        print(f"\nBaseline: {baseline.get('meta', {}).get('commit', '?')}  Current: {report['meta']['commit']}")
+        for scale, name, ratio in regressions:
+            print(f"REGRESSION: {name} @ {scale} is {ratio:.2f}x the baseline mean")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="GameManager / broadcast benchmark suite")
+    parser.add_argument('--scales', default=','.join(DEFAULT_SCALES), help="Comma separated ROOMSxTEAMSxPLAYERS")
+    parser.add_argument('--votes-per-player', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Mean-time ratio vs baseline that counts as a regression")
+    parser.add_argument('--json', help="Write machine-readable results to this file")
+    parser.add_argument('--compare', help="Baseline JSON from a previous run to compare against")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'votes_per_player': args.votes_per_player,
+            'gates': list(GATE_LOGIC)
+        },
+        'results': {}
+    }
+    for scale in args.scales.split(','):
+        report['results'][scale] = best_of(scale, args.votes_per_player, args.seed, args.repeats)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = print_results(report, baseline, args.threshold)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
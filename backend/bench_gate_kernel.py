@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: GATE_LOGIC lambdas over lists vs the bitmask gate kernel.
+
+The lambda path rebuilds the input list from every player's card/NOT like the
+old check_logic / attempt_open / check_gate_logic did; the kernel path evaluates
+the team's packed masks directly.
+
+Usage: python bench_gate_kernel.py [--sizes 1,2,3,4,5,64,1024,16384]
+"""
+import argparse
+import random
+import timeit
+
+import gate_kernel
+from game_manager import GATE_LOGIC
+
+DEFAULT_SIZES = [1, 2, 3, 4, 5, 64, 1024, 16384]
+
+def lambda_path(gate, players):
+    gate_func = GATE_LOGIC.get(gate, GATE_LOGIC['AND'])
+    logic_inputs = []
+    for card_value, has_not_gate in players:
+        logic_value = bool(card_value)
+        if has_not_gate:
+            logic_value = not logic_value
+        logic_inputs.append(logic_value)
+    return gate_func(logic_inputs)
+
+def bench_size(size: int, rng: random.Random):
+    players = [(rng.randint(0, 1), rng.random() < 0.2) for _ in range(size)]
+    cards = gate_kernel.pack(card for card, _ in players)
+    nots = gate_kernel.pack(has_not for _, has_not in players)
+    members = (1 << size) - 1
+    # Enough iterations for ~0.1s on the slow path
+    number = max(10, 200000 // size)
+
+    results = {}
+    for gate in GATE_LOGIC:
+        assert lambda_path(gate, players) == gate_kernel.evaluate(gate, cards, nots, members)
+        old = min(timeit.repeat(lambda: lambda_path(gate, players), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: gate_kernel.evaluate(gate, cards, nots, members), number=number, repeat=3)) / number
+        results[gate] = (old, new)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate kernel micro-benchmark")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma separated team sizes")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    print(f"{'Size':>6} | {'Gate':<5} | {'lambda (ns)':>12} | {'kernel (ns)':>12} | {'Speedup':>8}")
+    print("-" * 56)
+    for size in sizes:
+        for gate, (old, new) in bench_size(size, rng).items():
+            print(f"{size:>6} | {gate:<5} | {old * 1e9:>12.1f} | {new * 1e9:>12.1f} | {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Wire format benchmark: encode time and bytes on the wire for game_state payloads.
+
+Builds a room (15 teams by default, the add_team maximum), then encodes its
+operator snapshot, a team-view snapshot and a single-vote delta through
+python-socketio's own Packet encoder three ways:
+
+    json      default server (stdlib json)
+    orjson    JSON clients with wire.OrjsonCodec (what main.py uses)
+    msgpack   binary clients: payload packed with wire.pack, sent as an attachment
+
+Usage: python bench_wire.py [--teams 15] [--players 5]
+"""
+import argparse
+import json
+import timeit
+
+from socketio import packet
+
+import wire
+from game_manager import GameManager
+from room_state import RoomStateTracker
+
+TEAM_IDS = 'ABCDEFGHIJKLMNO'
+
+class StdlibPacket(packet.Packet):
+    json = json
+
+class OrjsonPacket(packet.Packet):
+    json = wire.OrjsonCodec
+
+def build_room(n_teams: int, n_players: int):
+    gm = GameManager()
+    room = gm.create_room("bench-wire")
+    room.max_players_per_team = n_players
+    for tid in TEAM_IDS[:n_teams]:
+        gm.add_team(room.id, tid, f"Team {tid}")
+    gm.join_room("op", room.id, "Hacker", "operator")
+    for tid in TEAM_IDS[:n_teams]:
+        for p in range(n_players):
+            gm.join_room(f"{tid}{p}", room.id, f"Player {tid}{p}", "player", tid)
+    gm.start_round(room.id, 30)
+    for i, sid in enumerate(sid for sid, (_, team, _) in gm.sid_index.items() if team):
+        gm.set_input(sid, i % 2)
+    return gm, room
+
+def encoders():
+    return {
+        'json': lambda event, payload: StdlibPacket(packet.EVENT, data=[event, payload], namespace='/').encode(),
+        'orjson': lambda event, payload: OrjsonPacket(packet.EVENT, data=[event, payload], namespace='/').encode(),
+        'msgpack': lambda event, payload: OrjsonPacket(packet.EVENT, data=[event, wire.pack(payload)], namespace='/').encode(),
+    }
+
+def wire_bytes(encoded) -> int:
+    """Engine.IO message frames: a text frame (+1 byte type prefix) plus one binary frame per attachment"""
+    frames = encoded if isinstance(encoded, list) else [encoded]
+    return sum(len(f.encode()) + 1 if isinstance(f, str) else len(f) for f in frames)
+
+def main():
+    parser = argparse.ArgumentParser(description="game_state wire format benchmark")
+    parser.add_argument('--teams', type=int, default=15)
+    parser.add_argument('--players', type=int, default=5)
+    args = parser.parse_args()
+
+    gm, room = build_room(args.teams, args.players)
+    tracker = RoomStateTracker()
+    tracker.next_updates(room)
+    gm.set_input("A0", 1 - room.teams['A'].players['A0'].vote_value)
+    delta = dict((view, payload) for view, _, payload in tracker.next_updates(room))['operator']
+
+    payloads = {
+        'operator snapshot': ('game_state', tracker.snapshot(room, 'operator')),
+        'team view snapshot': ('game_state', tracker.snapshot(room, 'team:A')),
+        'vote delta': ('game_state_delta', delta),
+    }
+
+    print(f"Room: {args.teams} teams x {args.players} players\n")
+    print(f"{'Payload':<20} | {'Format':<8} | {'bytes':>8} | {'encode us':>10} | {'vs json':>8}")
+    print("-" * 66)
+    for name, (event, payload) in payloads.items():
+        base_us = None
+        for fmt, encode in encoders().items():
+            size = wire_bytes(encode(event, payload))
+            number = 2000
+            us = min(timeit.repeat(lambda: encode(event, payload), number=number, repeat=5)) / number * 1e6
+            base_us = base_us or us
+            print(f"{name:<20} | {fmt:<8} | {size:>8,} | {us:>10.1f} | {base_us / us:>7.1f}x")
+
+    # Round trip sanity: what a binary client decodes is what a JSON client gets
+    _, snapshot = payloads['operator snapshot']
+    assert wire.unpack(wire.pack(snapshot)) == json.loads(json.dumps(snapshot))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Broadcast Scheduler - Coalesces game_state broadcasts per room
+
+Handlers mark a room dirty instead of broadcasting right away. A room is
+flushed at most once per window: the first change after a quiet period goes
+out on the next loop iteration, later ones wait for the window to close and
+are sent together. The state is serialized at flush time, so what goes out is
+always the latest. Urgent updates (round results, round end, joins) bypass the
+window with flush_now.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+DEFAULT_WINDOW = 0.04  # Seconds
+
+class BroadcastScheduler:
+    def __init__(self, flush: Callable[[str], Awaitable[None]], window: float = DEFAULT_WINDOW):
+        self.flush = flush  # async flush(room_id, **kwargs): actually serialize + emit
+        self.window = window
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.last_flush: Dict[str, float] = {}  # room_id -> loop time of the last flush
+        self.flushes = 0
+        self.coalesced = 0  # mark_dirty calls absorbed by an already pending flush
+
+    def mark_dirty(self, room_id: str):
+        """Schedule a broadcast for the room unless one is already pending"""
+        if room_id in self.pending:
+            self.coalesced += 1
+            return
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self.last_flush.get(room_id, float('-inf')) + self.window - loop.time())
+        self.pending[room_id] = loop.create_task(self._flush_later(room_id, delay))
+
+    async def flush_now(self, room_id: str, **kwargs):
+        """Broadcast immediately, absorbing any pending flush for the room. kwargs go to the flush callback."""
+        task = self.pending.pop(room_id, None)
+        if task is not None:
+            task.cancel()
+        await self._flush(room_id, **kwargs)
+
+    async def _flush_later(self, room_id: str, delay: float):
+        await asyncio.sleep(delay)
+        if self.pending.get(room_id) is asyncio.current_task():
+            del self.pending[room_id]
+        await self._flush(room_id)
+
+    async def _flush(self, room_id: str, **kwargs):
+        self.last_flush[room_id] = asyncio.get_running_loop().time()
+        self.flushes += 1
+        try:
+            await self.flush(room_id, **kwargs)
+        except Exception as e:
+            print(f"[BROADCAST] Flush failed for room {room_id}: {e}")
+
+    def forget(self, room_id: str):
+        task = self.pending.pop(room_id, None)
+        if task is not None:
+            task.cancel()
+        self.last_flush.pop(room_id, None)
@@ -0,0 +1,156 @@
+"""
+Card Images - Content-addressed store for custom card images
+
+Uploads are decoded once and kept under the SHA-256 of their bytes. Rooms only
+hold that digest (it travels in game_state); the bytes are served over HTTP
+from /card-images/{digest}, where the digest doubles as an immutable ETag, so
+each client downloads an image at most once.
+
+A blob is kept while some room shows it: uploading attaches it to the room,
+replacing a card or closing the room releases it. The total is capped at
+CARD_IMAGE_STORE_BYTES. A room that moves elsewhere (room store, another
+shard, a snapshot) takes its images along: export() them with it, adopt() them
+where it is loaded.
+
+Images are served from the app's origin, so only raster formats are kept and
+their type always comes from the bytes themselves: never from the uploader's
+data-URL header, and never SVG (it can carry scripts).
+"""
+import base64
+import binascii
+import hashlib
+import os
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import HTTPException, Response
+
+MAX_IMAGE_BYTES = 2 * 1024 * 1024  # Decoded size limit per upload
+CARD_IMAGE_STORE_BYTES = int(os.getenv('CARD_IMAGE_STORE_BYTES', str(64 * 1024 * 1024)))  # All blobs together
+
+# Magic bytes of the accepted formats
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+# Served images can't be sniffed into anything else, and can't run anything if opened directly
+_SAFE_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'Content-Disposition': 'inline',
+    'Content-Security-Policy': "default-src 'none'; sandbox",
+}
+
+def _sniff(data: bytes) -> Optional[str]:
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    for magic, mime in _SIGNATURES:
+        if data.startswith(magic):
+            return mime
+    return None
+
+def decode_image(image_data: str) -> Tuple[str, bytes]:
+    """
+    Accepts a data URL ('data:image/png;base64,...') or bare base64; the declared type is ignored.
+    Returns (mime, bytes); raises ValueError if it is not valid base64, too large, or not
+    a PNG, JPEG, GIF or WebP image.
+    """
+    if image_data.startswith('data:'):
+        image_data = image_data.partition(',')[2]
+    try:
+        data = base64.b64decode(image_data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Image is not valid base64")
+    if not data:
+        raise ValueError("Image is empty")
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // 1024} KB")
+    mime = _sniff(data)
+    if mime is None:
+        raise ValueError("Only PNG, JPEG, GIF or WebP images are allowed")
+    return mime, data
+
+class CardImageStore:
+    """Blob store keyed by content hash: identical uploads are stored once, and kept while a room uses them"""
+
+    def __init__(self, max_bytes: int = CARD_IMAGE_STORE_BYTES):
+        self.blobs: Dict[str, Tuple[str, bytes]] = {}  # digest -> (mime, bytes)
+        self.rooms: Dict[str, Set[str]] = {}  # room_id -> digests it uses
+        self.refs: Dict[str, int] = {}  # digest -> rooms using it
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes held in blobs
+
+    def put(self, image_data: str, room_id: str) -> str:
+        """Store an uploaded image (data URL or base64) for a room, return its digest"""
+        mime, data = decode_image(image_data)
+        digest = hashlib.sha256(data).hexdigest()
+        self.add(digest, mime, data)
+        self.attach(room_id, self.rooms.get(room_id, set()) | {digest})
+        return digest
+
+    def get(self, digest: str) -> Optional[Tuple[str, bytes]]:
+        return self.blobs.get(digest)
+
+    def add(self, digest: str, mime: str, data: bytes):
+        """Store bytes under their digest (unused until a room attaches it); ValueError when full"""
+        if digest in self.blobs:
+            return
+        if self.size + len(data) > self.max_bytes:
+            raise ValueError("Card image storage is full, try again later")
+        self.blobs[digest] = (mime, data)
+        self.size += len(data)
+
+    def attach(self, room_id: str, digests: Iterable[Optional[str]]):
+        """Set the images a room uses; images no room uses any more are dropped"""
+        used = {digest for digest in digests if digest in self.blobs}
+        previous = self.rooms.pop(room_id, set())
+        if used:
+            self.rooms[room_id] = used
+        for digest in used - previous:
+            self.refs[digest] = self.refs.get(digest, 0) + 1
+        for digest in previous - used:
+            self.refs[digest] -= 1
+            if not self.refs[digest]:
+                del self.refs[digest]
+                self.size -= len(self.blobs.pop(digest)[1])
+
+    def release(self, room_id: str):
+        """The room is gone: drop the images only it used"""
+        self.attach(room_id, ())
+
+    def export(self, digests: Iterable[Optional[str]]) -> Dict[str, Tuple[str, bytes]]:
+        """The stored blobs among digests, to send or save along with their room"""
+        return {digest: self.blobs[digest] for digest in digests if digest in self.blobs}
+
+    def adopt(self, room_id: str, digests: Iterable[Optional[str]], images: Dict[str, Tuple[str, bytes]]) -> Set[str]:
+        """A room loaded from elsewhere: store the images it came with, attach them. Returns the digests still missing."""
+        digests = [digest for digest in digests if digest]
+        for digest in digests:
+            if digest not in self.blobs and digest in images:
+                mime, data = images[digest]
+                if hashlib.sha256(data).hexdigest() != digest or _sniff(data) != mime:
+                    continue  # Not what the room refers to (or not an image we serve): leave it missing
+                try:
+                    self.add(digest, mime, data)
+                except ValueError:
+                    pass  # Full
+        self.attach(room_id, digests)
+        return {digest for digest in digests if digest not in self.blobs}
+
+def room_images(room) -> Tuple[Optional[str], Optional[str]]:
+    """Digests of the custom cards a room shows (None: the default card)"""
+    return room.custom_card_0, room.custom_card_1
+
+def image_response(digest: str, blob: Optional[Tuple[str, bytes]], if_none_match: Optional[str]) -> Response:
+    """HTTP response for /card-images/{digest}. Content never changes for a digest -> cache forever."""
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    etag = f'"{digest}"'
+    headers = {'ETag': etag, 'Cache-Control': 'public, max-age=31536000, immutable', **_SAFE_HEADERS}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+        return Response(status_code=304, headers=headers)
+    mime, data = blob
+    return Response(content=data, media_type=mime, headers=headers)
+
+card_image_store = CardImageStore()
@@ -0,0 +1,196 @@
+"""
+Event Log - Append-only record of every GameManager mutation, and its replay
+
+Every mutation of GameManager (join, vote, NOT toggle, round start/end,
+resets, settings, chat, rooms created / closed / adopted) is reported to its
+recorder (see game_manager.recorded) as (time, method, args, kwargs). The
+EventLog queues those records in memory and a background task writes them in
+batches from a thread, so recording costs a list append on the event loop.
+
+Off unless EVENT_LOG_DIR is set. Nothing is pruned: archive or delete old
+segments yourself.
+
+On disk: EVENT_LOG_DIR/events-<start time ms>-<n>.log segments, each a stream of
+records framed as 4-byte big-endian length + msgpack [time, method, args,
+kwargs]. A segment is closed (and fsynced) once it passes
+EVENT_LOG_SEGMENT_BYTES; every process start begins a new one. A crash can
+lose the last unwritten batch and leave a torn record at the end of a
+segment, which readers skip.
+
+Replay: a fresh GameManager re-runs the records in order, with its clock
+pinned to each record's time. Cards come from each room's own seed (logged
+when the room is created), so the rounds deal the same cards again:
+
+    python event_log.py eventlog --room demo-room --until 2026-10-17T12:30:00
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+import orjson
+
+import wire
+from game_manager import GameManager, Room
+from room_state import serialize_room
+from room_store import decode_room, encode_room
+
+EVENT_LOG_DIR = os.getenv('EVENT_LOG_DIR', '')  # Opt-in (e.g. 'eventlog'): segments are kept until removed by hand
+EVENT_LOG_SEGMENT_BYTES = int(os.getenv('EVENT_LOG_SEGMENT_BYTES', str(16 * 1024 * 1024)))
+FLUSH_INTERVAL = 0.05  # Seconds a record may wait for its batch
+
+Record = Tuple[float, str, tuple, dict]
+
+class EventLog:
+    def __init__(self, directory: str = EVENT_LOG_DIR, segment_bytes: int = EVENT_LOG_SEGMENT_BYTES,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.pending: List[Record] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        self.segment = None  # Open file of the current segment (writer thread only)
+        self.segment_size = 0
+        self.records = 0
+        self.batches = 0
+        self.segments = 0
+
+    def record(self, ts: float, method: str, args: tuple, kwargs: dict):
+        """GameManager.recorder: queue one mutation (args must not change afterwards, so rooms are encoded now)"""
+        if args and isinstance(args[0], Room):
+            args = (encode_room(args[0]),) + args[1:]
+        self.pending.append((ts, method, args, kwargs))
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def start(self):
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+        if self.pending:
+            self.wakeup.set()  # Recorded before start (e.g. rooms restored from a snapshot)
+
+    async def close(self):
+        """Write what is queued and close the segment"""
+        self.closing = True
+        if self.task is not None:
+            self.wakeup.set()
+            await self.task  # Not cancelled: a write in its thread would outlive the cancellation
+            self.task = None
+        await self.flush()
+        await asyncio.to_thread(self._close_segment)
+
+    async def flush(self):
+        batch, self.pending = self.pending, []
+        if batch:
+            await asyncio.to_thread(self._write, batch)
+
+    async def _run(self):
+        while not self.closing:
+            await self.wakeup.wait()
+            if not self.closing:
+                await asyncio.sleep(self.flush_interval)  # Let the batch fill up
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[EVENTLOG] Write failed: {e}")
+
+    # --- Writer thread
+
+    def _write(self, batch: List[Record]):
+        frames = []
+        for ts, method, args, kwargs in batch:
+            body = wire.pack([ts, method, list(args), kwargs])
+            frames.append(len(body).to_bytes(4, 'big'))
+            frames.append(body)
+        data = b''.join(frames)
+        if self.segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"events-{int(batch[0][0] * 1000):013d}-{self.segments:04d}.log")
+            self.segment = open(path, 'ab')
+            self.segment_size = self.segment.tell()
+            self.segments += 1
+        self.segment.write(data)
+        self.segment.flush()
+        self.segment_size += len(data)
+        self.records += len(batch)
+        self.batches += 1
+        if self.segment_size >= self.segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self):
+        if self.segment is not None:
+            os.fsync(self.segment.fileno())
+            self.segment.close()
+            self.segment = None
+
+def segment_paths(directory: str) -> List[str]:
+    """Segments in write order (names sort by start time)"""
+    return sorted(glob.glob(os.path.join(directory, 'events-*.log')))
+
+def read_records(directory: str) -> Iterator[Record]:
+    for path in segment_paths(directory):
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + 4 <= len(data):
+            size = int.from_bytes(data[offset:offset + 4], 'big')
+            if offset + 4 + size > len(data):
+                break  # Torn write at the end of the segment
+            ts, method, args, kwargs = wire.unpack(data[offset + 4:offset + 4 + size])
+            offset += 4 + size
+            yield ts, method, tuple(args), kwargs
+
+def replay(records, until: Optional[float] = None) -> GameManager:
+    """GameManager as it was after the last record at or before `until` (all records if None)"""
+    gm = GameManager()
+    gm.max_rooms = sys.maxsize  # Evictions are in the log as close_room records
+    clock = [0.0]
+    gm.clock = lambda: clock[0]
+    for ts, method, args, kwargs in records:
+        if until is not None and ts > until:
+            break
+        clock[0] = ts
+        if method == 'adopt_room':
+            args = (decode_room(args[0]),) + tuple(args[1:])
+        getattr(gm, method)(*args, **kwargs)
+    return gm
+
+def parse_time(value: str) -> float:
+    """Epoch seconds or an ISO date/time (local time unless it has an offset)"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild rooms from the game event log")
+    parser.add_argument('directory', nargs='?', default=EVENT_LOG_DIR or 'eventlog')
+    parser.add_argument('--room', help="Room to print (default: list the rooms)")
+    parser.add_argument('--until', type=parse_time, help="Stop after the last record at this time (epoch or ISO)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    gm = replay(read_records(args.directory), args.until)
+    elapsed = time.perf_counter() - started
+    if args.room is None:
+        for room_id, room in sorted(gm.rooms.items()):
+            print(f"{room_id}: {room.state}, round {room.round_number}, "
+                  f"scores {', '.join(f'{t.id}={t.score}' for t in room.teams.values())}")
+        print(f"[EVENTLOG] {len(gm.rooms)} rooms replayed in {elapsed * 1000:.0f} ms")
+        return
+    room = gm.rooms.get(args.room)
+    if room is None:
+        sys.exit(f"Room {args.room} does not exist at that point")
+    state = serialize_room(room)
+    state['seed'], state['deals'] = room.seed, room.deals
+    print(orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
+
+if __name__ == "__main__":
+    main()
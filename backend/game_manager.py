@@ -1,9 +1,14 @@
+import os
 import random
 import asyncio
-from typing import Dict, List, Optional
+import functools
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import time
 
+import gate_kernel
+
 # Gate Logic Functions
 GATE_LOGIC = {
     'AND': lambda inputs: all(inputs),
@@ -25,6 +30,19 @@ GATE_SCORES = {
 }
 
 GAME_MODES = ['competitive', 'asymmetric', 'campaign']
+VALID_GATES = ['AND', 'OR', 'XOR', 'XNOR', 'NAND', 'NOR']
+
+CHAT_HISTORY_SIZE = 50  # Recent team chat messages kept for late joiners / reconnects
+
+# Room lifecycle (seconds since the room's last activity)
+ROOM_EMPTY_TTL = float(os.getenv('ROOM_EMPTY_TTL', '300'))   # Nobody seated
+ROOM_IDLE_TTL = float(os.getenv('ROOM_IDLE_TTL', '3600'))    # Seated but no round running and nothing happening
+MAX_ROOMS = int(os.getenv('MAX_ROOMS', '1000'))
+
+DEFAULT_TEAMS = [('A', "Team ALPHA"), ('B', "Team BETA")]  # Teams a room starts with when its first player joins
+
+# Player fields that feed the team's gate bitmasks
+TRACKED_PLAYER_FIELDS = ('card_value', 'vote_value', 'has_not_gate')
 
 @dataclass
 class Player:
@@ -37,6 +55,16 @@ class Player:
     has_not_gate: bool = False # If true, input is inverted
     accessibility_enabled: bool = False # Voice narration enabled by operator
 
+    def __setattr__(self, name, value):
+        # Keep the owning team's bitmasks in sync however the field is changed
+        object.__setattr__(self, name, value)
+        team = self.__dict__.get('_team')
+        if team is not None:
+            if name in TRACKED_PLAYER_FIELDS:
+                team._sync(self)
+            elif name[0] != '_':
+                team._touch()
+
 @dataclass
 class Team:
     id: str
@@ -52,6 +80,96 @@ class Team:
     last_round_penalty: float = 0
     last_round_base: float = 0
     chat_enabled: bool = False # Accessibility feature
+    chat_history: Deque[dict] = field(default_factory=lambda: deque(maxlen=CHAT_HISTORY_SIZE)) # Ring buffer, oldest dropped
+
+    # Gate state as bitmasks (see gate_kernel): bit = player's slot, updated on deal / NOT toggle / vote
+    member_bits: int = 0  # Occupied slots
+    card_bits: int = 0  # Dealt card is 1
+    not_bits: int = 0  # NOT gate active
+    voted_bits: int = 0  # Player has voted
+    vote_one_bits: int = 0  # Player voted 1
+    vote_zero_bits: int = 0  # Player voted 0
+
+    # Bumped on every change to the team or its players; the state serializer rebuilds a team's section only when it moves
+    _rev = 0
+    _chat_rev = 0  # Bumped per chat message (chat is not game state, so it doesn't move _rev)
+
+    def __setattr__(self, name, value):
+        d = self.__dict__
+        d[name] = value
+        if name[0] != '_':
+            d['_rev'] = d.get('_rev', 0) + 1
+
+    def _touch(self):
+        self.__dict__['_rev'] = self._rev + 1
+
+    def add_player(self, player: Player):
+        object.__setattr__(player, '_team', self)
+        object.__setattr__(player, '_bit', gate_kernel.lowest_free_slot(self.member_bits))
+        self.players[player.sid] = player
+        self.member_bits |= player._bit
+        self._sync(player)
+
+    def remove_player(self, sid: str) -> Optional[Player]:
+        player = self.players.pop(sid, None)
+        if player is not None:
+            keep = ~player._bit
+            self.member_bits &= keep
+            self.card_bits &= keep
+            self.not_bits &= keep
+            self.voted_bits &= keep
+            self.vote_one_bits &= keep
+            self.vote_zero_bits &= keep
+            object.__setattr__(player, '_team', None)
+        return player
+
+    def _sync(self, player: Player):
+        bit = player._bit
+        keep = ~bit
+        vote = player.vote_value
+        # Straight into __dict__: one revision bump instead of one per mask (this runs on every deal/vote/NOT)
+        d = self.__dict__
+        d['card_bits'] = (d['card_bits'] | bit) if player.card_value else (d['card_bits'] & keep)
+        d['not_bits'] = (d['not_bits'] | bit) if player.has_not_gate else (d['not_bits'] & keep)
+        d['voted_bits'] = (d['voted_bits'] & keep) if vote is None else (d['voted_bits'] | bit)
+        d['vote_one_bits'] = (d['vote_one_bits'] | bit) if vote == 1 else (d['vote_one_bits'] & keep)
+        d['vote_zero_bits'] = (d['vote_zero_bits'] | bit) if vote == 0 else (d['vote_zero_bits'] & keep)
+        d['_rev'] = self._rev + 1
+
+    @property
+    def ones_count(self) -> int:
+        """Effective inputs that are 1 (card XOR NOT)"""
+        return ((self.card_bits ^ self.not_bits) & self.member_bits).bit_count()
+
+    @property
+    def pending_votes(self) -> int:
+        return (self.member_bits & ~self.voted_bits).bit_count()
+
+    @property
+    def votes_one(self) -> int:
+        return self.vote_one_bits.bit_count()
+
+    @property
+    def votes_zero(self) -> int:
+        return self.vote_zero_bits.bit_count()
+
+    def gate_output(self) -> bool:
+        """The real output of this team's gate for the current cards and NOTs"""
+        return gate_kernel.evaluate(self.current_gate, self.card_bits, self.not_bits, self.member_bits)
+
+    def votes_matching(self, target: int) -> int:
+        return self.votes_one if target == 1 else self.votes_zero
+
+    def is_solved(self, logic_mode: str) -> bool:
+        """Win check: everyone voted and the consensus fits the mode's goal"""
+        if not self.member_bits or self.voted_bits != self.member_bits:
+            return False
+        if logic_mode == 'open':
+            # Win Condition: Output is 1 AND Consensus is 1
+            return self.gate_output() and self.vote_one_bits == self.member_bits
+        # Win Condition: Consensus matches Reality
+        consensus = self.vote_one_bits if self.gate_output() else self.vote_zero_bits
+        return consensus == self.member_bits
 
 @dataclass
 class Room:
@@ -66,54 +184,207 @@ class Room:
     # Game Mode System
     game_mode: str = 'competitive'  # 'competitive', 'asymmetric', 'campaign'
     round_number: int = 0
-    custom_card_0: Optional[str] = None  # base64 image data
-    custom_card_1: Optional[str] = None  # base64 image data
+    custom_card_0: Optional[str] = None  # Content hash in card_images (served at /card-images/<hash>)
+    custom_card_1: Optional[str] = None  # Content hash in card_images (served at /card-images/<hash>)
     max_players_per_team: int = 3
     not_lockout_time: int = 5 # Seconds before round end where NOT is disabled
+    not_gates_locked: bool = False # Set by the NOT_LOCKOUT deadline (round_timers), cleared each round
+    seed: int = field(default_factory=lambda: random.getrandbits(63)) # Card deals: deal N draws from Random(f"{seed}:{N}") (never sent to clients)
+    deals: int = 0 # Rounds dealt so far (unlike round_number, never reset)
     
     # Game Logic State
     target_gate: str = 'AND' # Logic gate for competitive mode
     target_gates: Dict[str, str] = field(default_factory=dict) # Per-team gates for asymmetric mode
     logic_mode: str = 'predict' # 'predict' (0/1) or 'open' (force 1)
     hide_vote_info: bool = False # Checkbox: Hide "votes don't match" info from AI narrator
+    state_version: int = 0 # Bumped on every game_state broadcast; clients detect gaps with it
     
     # Logic Objectives: 'predict' (Guess Output) or 'open' (Force Output 1)
     logic_requirements: Dict[str, bool] = field(default_factory=dict) # Requirements per team maybe? 
     # Actually, for AND, the goal is always Output=1.
     # So for AND, Logic(A) AND Logic(B)... = 1.
+
+    # Bumped on every room-level field change (teams have their own). state_version is bookkeeping, not state.
+    _rev = 0
+
+    def __setattr__(self, name, value):
+        d = self.__dict__
+        d[name] = value
+        if name[0] != '_' and name != 'state_version':
+            d['_rev'] = d.get('_rev', 0) + 1
     
+def recorded(when: Optional[Callable[[Any], bool]] = None):
+    """
+    Mutation reported to GameManager.recorder (see event_log) as (time, name, args, kwargs)
+    once it returns, if `when(result)` says it changed something. Calls made from inside
+    another recorded call aren't reported: replaying the outer call repeats them.
+    """
+    def decorate(method):
+        name = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._in_call:
+                return method(self, *args, **kwargs)
+            self._in_call = True
+            self.now = self.clock()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self._in_call = False
+            if self.recorder is not None and (when is None or when(result)):
+                self.recorder(self.now, name, args, kwargs)
+            return result
+        return wrapper
+    return decorate
+
 class GameManager:
     def __init__(self):
         self.rooms: Dict[str, Room] = {}
+        # Reverse index: sid -> (room, team, player). Operators map to (room, None, None).
+        # Kept in sync by join_room / remove_player / remove_team so handlers never scan rooms.
+        self.sid_index: Dict[str, Tuple[Room, Optional[Team], Optional[Player]]] = {}
+        # room_id -> time.monotonic() of the last join/leave/vote/round/chat, for idle eviction
+        self.last_activity: Dict[str, float] = {}
+        self.max_rooms = MAX_ROOMS
+        self.empty_ttl = ROOM_EMPTY_TTL
+        self.idle_ttl = ROOM_IDLE_TTL
+        # Called as on_room_closed(room_id, sids) when a room is evicted; sids were still seated in it
+        self.on_room_closed: Optional[Callable[[str, List[str]], None]] = None
+        # is_busy(room_id): the room has changes queued or under way elsewhere (room_actors), so it isn't evicted
+        self.is_busy: Callable[[str], bool] = lambda room_id: False
+        # Called as recorder(time, method, args, kwargs) after every mutation (see recorded / event_log)
+        self.recorder: Optional[Callable[[float, str, tuple, dict], None]] = None
+        self.clock: Callable[[], float] = time.time  # Wall clock of mutations (replay pins it to the logged time)
+        self.now = 0.0  # clock() at the start of the current recorded call
+        self._in_call = False
 
-    def create_room(self, room_id: str) -> Room:
-        if room_id not in self.rooms:
-            self.rooms[room_id] = Room(id=room_id)
-        return self.rooms[room_id]
+    def _record(self, name: str, *args):
+        """Report a structural change (room created / closed) even from inside another call"""
+        if self.recorder is not None:
+            self.recorder(self.now if self._in_call else self.clock(), name, args, {})
 
+    def locate(self, sid: str) -> Tuple[Optional[Room], Optional[Team], Optional[Player]]:
+        """O(1) lookup of where a sid is seated. Returns (None, None, None) if unknown."""
+        return self.sid_index.get(sid, (None, None, None))
+
+    def _unseat(self, sid: str):
+        """Remove a sid from whatever room/team it currently occupies"""
+        room, team, player = self.sid_index.pop(sid, (None, None, None))
+        if room is None:
+            return None
+        if team is None:
+            if room.operator_sid == sid:
+                room.operator_sid = None
+        else:
+            team.remove_player(sid)
+        self.touch(room.id)
+        return room
+
+    def touch(self, room_id: str):
+        """Record activity in a room (postpones its eviction)"""
+        self.last_activity[room_id] = time.monotonic()
+
+    def create_room(self, room_id: str, seed: Optional[int] = None) -> Optional[Room]:
+        """Get or create a room. None if the server is at max_rooms and nothing can be evicted."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            if len(self.rooms) >= self.max_rooms and not self._make_room_for_one():
+                return None
+            room = self.rooms[room_id] = Room(id=room_id) if seed is None else Room(id=room_id, seed=seed)
+            self._record('create_room', room_id, room.seed)
+            self.touch(room_id)
+        return room
+
+    @recorded()
+    def adopt_room(self, room: Room) -> bool:
+        """Serve a room loaded from elsewhere (room store / snapshot): register it and index its seats"""
+        if room.id not in self.rooms and len(self.rooms) >= self.max_rooms and not self._make_room_for_one():
+            return False
+        self.rooms[room.id] = room
+        if room.operator_sid is not None:
+            self.sid_index[room.operator_sid] = (room, None, None)
+        for team in room.teams.values():
+            for sid, player in team.players.items():
+                self.sid_index[sid] = (room, team, player)
+        self.touch(room.id)
+        return True
+
+    def is_empty(self, room: Room) -> bool:
+        return room.operator_sid is None and not any(team.players for team in room.teams.values())
+
+    def idle_rooms(self, now: Optional[float] = None) -> List[str]:
+        """Rooms past their TTL: empty ones after empty_ttl, stalled ones (not PLAYING) after idle_ttl"""
+        now = time.monotonic() if now is None else now
+        idle = []
+        for room_id, room in self.rooms.items():
+            if self.is_busy(room_id):
+                continue
+            quiet = now - self.last_activity.get(room_id, now)
+            if quiet >= self.idle_ttl and room.state != 'PLAYING':
+                idle.append(room_id)
+            elif quiet >= self.empty_ttl and self.is_empty(room):
+                idle.append(room_id)
+        return idle
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Close every room past its TTL. Returns the closed room ids."""
+        closed = self.idle_rooms(now)
+        for room_id in closed:
+            self.close_room(room_id)
+        return closed
+
+    def _make_room_for_one(self) -> bool:
+        """At capacity: evict idle rooms, else the least recently active empty room (never a busy one)"""
+        if self.evict_idle():
+            return True
+        empty = [room_id for room_id, room in self.rooms.items() if self.is_empty(room) and not self.is_busy(room_id)]
+        if not empty:
+            return False
+        self.close_room(min(empty, key=lambda room_id: self.last_activity.get(room_id, 0)))
+        return True
+
+    def close_room(self, room_id: str, notify: bool = True) -> List[str]:
+        """
+        Delete a room, unseating whoever is still in it. Returns those sids.
+        notify=False when the room moves to another process instead (no on_room_closed).
+        """
+        room = self.rooms.pop(room_id, None)
+        self.last_activity.pop(room_id, None)
+        if room is None:
+            return []
+        self._record('close_room', room_id, False)
+        sids = [sid for team in room.teams.values() for sid in team.players]
+        if room.operator_sid is not None:
+            sids.append(room.operator_sid)
+        for sid in sids:
+            self.sid_index.pop(sid, None)
+        print(f"[ROOMS] {'Closed' if notify else 'Released'} room {room_id} ({len(sids)} seated, {len(self.rooms)} live)")
+        if notify and self.on_room_closed is not None:
+            self.on_room_closed(room_id, sids)
+        return sids
+
+    @recorded(when=lambda result: result[0])  # A failed join may still have created the room: that is recorded on its own
     def join_room(self, sid: str, room_id: str, name: str, role: str, team_id: Optional[str] = None, avatar: str = '😀'):
         # Role: 'player' or 'operator'
         room = self.create_room(room_id)
+        if room is None:
+            return False, "Server is full, try again later."
         
         if role == 'operator':
             if room.operator_sid is None:
+                self._unseat(sid)
                 room.operator_sid = sid
-                return True
-    def join_room(self, sid: str, room_id: str, name: str, role: str, team_id: Optional[str] = None, avatar: str = '😀'):
-        # Role: 'player' or 'operator'
-        room = self.create_room(room_id)
-        
-        if role == 'operator':
-            if room.operator_sid is None:
-                room.operator_sid = sid
+                self.sid_index[sid] = (room, None, None)
+                self.touch(room_id)
                 return True, "Success"
             return False, "Room already has an operator."
             
         if role == 'player':
             # Initialize default teams if none exist
             if not room.teams:
-                room.teams['A'] = Team(id='A', name="Team ALPHA")
-                room.teams['B'] = Team(id='B', name="Team BETA")
+                for tid, team_name in DEFAULT_TEAMS:
+                    room.teams[tid] = Team(id=tid, name=team_name)
 
             target_team = None
             
@@ -136,34 +407,40 @@ class GameManager:
             if not target_team:
                 return False, "All teams are full."
 
+            # Re-joining (team change) moves the player instead of duplicating them
+            self._unseat(sid)
             player = Player(sid=sid, name=name, team_id=target_team.id, avatar=avatar) 
-            target_team.players[sid] = player
+            target_team.add_player(player)
+            self.sid_index[sid] = (room, target_team, player)
+            self.touch(room_id)
             return True, "Success"
         return False, "Invalid role."
 
     def get_room_info(self, room_id: str):
-        """Get available teams and player counts for a room"""
-        room = self.create_room(room_id)
-        if not room:
+        """
+        Get available teams and player counts for a room. Read-only: a room that
+        doesn't exist yet is described as join_room would create it (teams A and B).
+        """
+        if not room_id:
             return None
-        
-        # Initialize default teams if none exist
-        if not room.teams:
-            room.teams['A'] = Team(id='A', name="Team ALPHA")
-            room.teams['B'] = Team(id='B', name="Team BETA")
-            
-        return {
-            'room_id': room_id,
-            'max_players_per_team': room.max_players_per_team,
-            'teams': {
+        room = self.rooms.get(room_id)
+        if room is None or not room.teams:
+            teams = {tid: {'id': tid, 'name': name, 'player_count': 0} for tid, name in DEFAULT_TEAMS}
+        else:
+            teams = {
                 tid: {
                     'id': t.id,
                     'name': t.name,
                     'player_count': len(t.players)
                 } for tid, t in room.teams.items()
             }
+        return {
+            'room_id': room_id,
+            'max_players_per_team': room.max_players_per_team if room else Room.max_players_per_team,
+            'teams': teams
         }
 
+    @recorded()
     def add_team(self, room_id: str, team_id: str, team_name: str) -> bool:
         """Allow hacker to add a new team to the room (max 15 teams)"""
         room = self.rooms.get(room_id)
@@ -179,6 +456,7 @@ class GameManager:
         room.teams[team_id] = Team(id=team_id, name=team_name)
         return True
 
+    @recorded()
     def remove_team(self, room_id: str, team_id: str) -> tuple:
         """Remove an empty team from the room (not allowed during active round)"""
         room = self.rooms.get(room_id)
@@ -202,6 +480,7 @@ class GameManager:
         del room.teams[team_id]
         return True, "Team removed"
 
+    @recorded()
     def set_max_players(self, room_id: str, count: int) -> bool:
         """Set the maximum members allowed per team"""
         room = self.rooms.get(room_id)
@@ -210,38 +489,96 @@ class GameManager:
             return True
         return False
 
+    @recorded()
     def set_not_lockout_time(self, room_id: str, seconds: int) -> bool:
         """Set the seconds before round end where NOT gates are disabled"""
         room = self.rooms.get(room_id)
         if room and 0 <= seconds <= 30:
             room.not_lockout_time = seconds
+            room.not_gates_locked = False  # The lockout moves: main re-arms it from the pending round end
             return True
         return False
 
+    @recorded()
+    def set_game_mode(self, room_id: str, mode: str) -> Optional[Room]:
+        room = self.rooms.get(room_id)
+        if room and mode in GAME_MODES:
+            room.game_mode = mode
+            room.round_number = 0  # Reset rounds when changing mode
+            return room
+        return None
+
+    @recorded()
+    def set_target_gate(self, room_id: str, gate: Optional[str] = None, gates: Optional[List[str]] = None) -> bool:
+        """Gate sequence (campaign) or single gate (competitive)"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return False
+        if gates is not None:
+            if all(g in VALID_GATES for g in gates):
+                room.target_gates = gates
+                return True
+        elif gate in VALID_GATES:
+            room.target_gate = gate
+            return True
+        return False
+
+    @recorded()
+    def set_custom_card(self, room_id: str, card_type: str, digest: str) -> bool:
+        room = self.rooms.get(room_id)
+        if not room or card_type not in ('0', '1'):
+            return False
+        if card_type == '0':
+            room.custom_card_0 = digest
+        else:
+            room.custom_card_1 = digest
+        return True
+
+    @recorded()
+    def toggle_accessibility(self, room_id: str, sid: str) -> Optional[Player]:
+        """Toggle voice narration for a player of the room. Returns the player (None if not in the room)."""
+        room, _, player = self.locate(sid)
+        if player is None or room.id != room_id:
+            return None
+        player.accessibility_enabled = not player.accessibility_enabled
+        return player
+
+    @recorded()
+    def toggle_vote_privacy(self, room_id: str) -> Optional[bool]:
+        room = self.rooms.get(room_id)
+        if not room:
+            return None
+        room.hide_vote_info = not room.hide_vote_info
+        return room.hide_vote_info
+
+    @recorded()
     def remove_player(self, sid: str):
-        # Scan rooms to remove player
-        for room in self.rooms.values():
-            if room.operator_sid == sid:
-                room.operator_sid = None
-                return
-            
-            for team in room.teams.values():
-                if sid in team.players:
-                    del team.players[sid]
-                    # If team empty, remove? Maybe.
-                    return
+        """Remove a player or operator from their room. Returns the room they left (or None)."""
+        # If team empty, remove? Maybe.
+        return self._unseat(sid)
 
+    @recorded(when=bool)
     def set_input(self, sid: str, vote: int):
         """Set player vote and reset team's solved status to allow re-solving"""
-        for room in self.rooms.values():
-            for team in room.teams.values():
-                if sid in team.players:
-                    team.players[sid].vote_value = vote
-                    # Reset solved status when input changes
-                    team.solved_current_round = False
-                    return room
-        return None
+        room, team, player = self.locate(sid)
+        if player is None:
+            return None
+        player.vote_value = vote
+        # Reset solved status when input changes
+        team.solved_current_round = False
+        self.touch(room.id)
+        return room
+
+    @recorded(when=lambda result: result[0] is not None)
+    def cast_vote(self, sid: str, vote: int) -> Tuple[Optional[Room], List[Team]]:
+        """A player's vote and its logic check as one step: (room, newly solved teams); (None, []) if not seated"""
+        room = self.set_input(sid, vote)
+        if room is None:
+            return None, []
+        _, team, _ = self.locate(sid)
+        return room, self.check_logic(room.id, team.id)
 
+    @recorded(when=bool)
     def toggle_not_gate(self, operator_sid: str, target_sid: str, room_id: str = None):
         """
         Toggle NOT gate on a player.
@@ -250,189 +587,132 @@ class GameManager:
         - Can only apply to rival teams
         - Only when >5 seconds remaining
         """
-        for room in self.rooms.values():
-            if room_id and room.id != room_id:
-                continue
-                
-            requester_team = None
-            is_operator = (room.operator_sid == operator_sid)
-            
-            # Check time remaining
-            if room.state == 'PLAYING' and not is_operator:
-                time_remaining = room.current_round_end_time - time.time()
-                if time_remaining <= room.not_lockout_time:
-                    return None  # Too late to apply NOT
-            
-            if not is_operator:
-                for team in room.teams.values():
-                    if operator_sid in team.players:
-                        requester_team = team
-                        break
-            
-            # Find target player and their team
-            target_team = None
-            for team in room.teams.values():
-                if target_sid in team.players:
-                    target_team = team
-                    break
-            
-            if not target_team:
-                return None  # Target not found
-            
-            # LOGIC RULES:
-            # 1. Operator can do anything.
-            # 2. Player TARGETING OWN TEAM (Self/Ally): Allowed. Free. (Mechanic for solving)
-            # 3. Player TARGETING RIVAL: Allowed. Costs Points. (Sabotage)
-            
-            is_rival_interaction = (not is_operator) and (requester_team and requester_team.id != target_team.id)
-            is_self_interaction = (not is_operator) and (requester_team and requester_team.id == target_team.id)
-            
-            if is_self_interaction and room.logic_mode != 'open':
-                return None # Players can only toggle self-NOT in 'open' mode
-            if is_rival_interaction:
-                  # Check points for sabotage (User requirement: > 4 points)
-                  if requester_team.score <= 4:
-                      return None
-            
-            # Apply Toggle
-            target_team.players[target_sid].has_not_gate = not target_team.players[target_sid].has_not_gate
-            target_team.solved_current_round = False
+        room, target_team, target_player = self.locate(target_sid)
+        if target_player is None:
+            return None  # Target not found
+        if room_id and room.id != room_id:
+            return None  # Target is not in this room
+        
+        requester_team = None
+        is_operator = (room.operator_sid == operator_sid)
+        
+        # Too late to apply NOT (the lockout deadline has passed)
+        if room.state == 'PLAYING' and not is_operator and room.not_gates_locked:
+            return None
+        
+        if not is_operator:
+            requester_room, requester_team, _ = self.locate(operator_sid)
+            if requester_room is not room:
+                requester_team = None
+        
+        # LOGIC RULES:
+        # 1. Operator can do anything.
+        # 2. Player TARGETING OWN TEAM (Self/Ally): Allowed. Free. (Mechanic for solving)
+        # 3. Player TARGETING RIVAL: Allowed. Costs Points. (Sabotage)
+        
+        is_rival_interaction = (not is_operator) and (requester_team and requester_team.id != target_team.id)
+        is_self_interaction = (not is_operator) and (requester_team and requester_team.id == target_team.id)
+        
+        if is_self_interaction and room.logic_mode != 'open':
+            return None # Players can only toggle self-NOT in 'open' mode
+        if is_rival_interaction:
+              # Check points for sabotage (User requirement: > 4 points)
+              if requester_team.score <= 4:
+                  return None
+        
+        # Apply Toggle
+        target_player.has_not_gate = not target_player.has_not_gate
+        target_team.solved_current_round = False
 
-            # RESET VOTES: Force re-vote for the entire team
-            for p in target_team.players.values():
-                p.vote_value = None
-            
-            # Deduct points ONLY for rival sabotage
-            if is_rival_interaction:
-                requester_team.score = max(0, requester_team.score - 1)
-                requester_team.not_gates_used += 1
-                requester_team.last_round_penalty += 1
-                target_team.was_sabotaged = True
+        # RESET VOTES: Force re-vote for the entire team
+        for p in target_team.players.values():
+            p.vote_value = None
+        
+        # Deduct points ONLY for rival sabotage
+        if is_rival_interaction:
+            requester_team.score = max(0, requester_team.score - 1)
+            requester_team.not_gates_used += 1
+            requester_team.last_round_penalty += 1
+            target_team.was_sabotaged = True
+        
+        # If Operator applies it, also mark as sabotaged (Bonus applies)
+        if is_operator:
+            target_team.was_sabotaged = True
             
-            # If Operator applies it, also mark as sabotaged (Bonus applies)
-            if is_operator:
-                target_team.was_sabotaged = True
-                
-            return room
-                        
-        return None
+        return room
 
+    @recorded()
     def set_logic_mode(self, room_id: str, mode: str):
         if room_id in self.rooms and mode in ['predict', 'open']:
             self.rooms[room_id].logic_mode = mode
             return self.rooms[room_id]
         return None
 
-    def check_logic(self, room_id: str):
+    @recorded(when=bool)
+    def check_logic(self, room_id: str, team_id: Optional[str] = None) -> List[Team]:
+        """
+        Mark teams whose votes solve their gate and return ALL newly solved teams.
+        Pass team_id to re-check only the team whose member acted.
+        """
         room = self.rooms.get(room_id)
         if not room or room.state != "PLAYING":
-            return
+            return []
         
-        for team in room.teams.values():
+        if team_id is not None:
+            team = room.teams.get(team_id)
+            teams = [team] if team else []
+        else:
+            teams = room.teams.values()
+        
+        solved = []
+        for team in teams:
             if team.solved_current_round:
                 continue
             
             # Skip empty teams (no players)
-            if not team.players or len(team.players) == 0:
+            if not team.players:
                 continue
 
-            # 1. Calculate REALITY (The output the gate produces based on cards)
-            gate_type = team.current_gate
-            gate_func = GATE_LOGIC.get(gate_type, GATE_LOGIC['AND'])
-            
-            logic_inputs = []
-            
-            for player in team.players.values():
-                # Input comes from CARD VALUE now, not vote
-                # If NOT gate is active, invert the card value
-                raw_val = player.card_value
-                logic_value = bool(raw_val)
-                if player.has_not_gate:
-                    logic_value = not logic_value
-                logic_inputs.append(logic_value)
-            
-            # The True Output of the gate
-            real_output_bool = gate_func(logic_inputs)
-            real_output = 1 if real_output_bool else 0
-            
-            # 2. Check Logic based on Mode
-            if room.logic_mode == 'open':
-                # FORCE OPEN MODE:
-                # Goal: Real Output MUST be 1.
-                
-                player_votes = [p.vote_value for p in team.players.values()]
-                if any(v is None for v in player_votes): continue
-                
-                # Win Condition: Output is 1 AND Consensus is 1
-                if real_output == 1 and all(v == 1 for v in player_votes):
-                    team.solved_current_round = True
-                    gate_score = GATE_SCORES.get(gate_type, 2)
-                    bonus = 0.5 if team.was_sabotaged else 0
-                    
-                    team.last_round_base = gate_score
-                    team.last_round_bonus = bonus
-                    # DEFERRED SCORING: team.score += (gate_score + bonus)
-                    return team
-            
-            else:
-                # PREDICT MODE (Default):
-                # Goal: Predict the output correctly (0 or 1).
-                
-                player_votes = [p.vote_value for p in team.players.values()]
-                if any(v is None for v in player_votes): continue 
+            if team.is_solved(room.logic_mode):
+                team.solved_current_round = True
+                gate_score = GATE_SCORES.get(team.current_gate, 2)
+                bonus = 0.5 if team.was_sabotaged else 0
                 
-                # Win Condition: Consensus matches Reality
-                if all(v == real_output for v in player_votes):
-                    team.solved_current_round = True
-                    gate_score = GATE_SCORES.get(gate_type, 2)
-                    bonus = 0.5 if team.was_sabotaged else 0
-                    
-                    team.last_round_base = gate_score
-                    team.last_round_bonus = bonus
-                    # DEFERRED SCORING: team.score += (gate_score + bonus)
-                    return team
+                team.last_round_base = gate_score
+                team.last_round_bonus = bonus
+                # DEFERRED SCORING: team.score += (gate_score + bonus)
+                solved.append(team)
             
-        return None
+        return solved
 
+    @recorded()
     def attempt_open(self, sid: str):
         """Team attempts to open the gate. If real output is 1, they succeed."""
-        for room in self.rooms.values():
-            for team in room.teams.values():
-                if sid in team.players:
-                    if room.logic_mode == 'open' and room.state == 'PLAYING':
-                        # NEW: Check if EVERYONE in the team has confirmed
-                        player_votes = [p.vote_value for p in team.players.values()]
-                        if any(v is None for v in player_votes):
-                            return room, None # Cannot override yet
-                        
-                        # Calculate REALITY (The output the gate produces based on cards + active NOTs)
-                        gate_type = team.current_gate
-                        gate_func = GATE_LOGIC.get(gate_type, GATE_LOGIC['AND'])
-                        
-                        logic_inputs = []
-                        for p in team.players.values():
-                            logic_value = bool(p.card_value)
-                            if p.has_not_gate:
-                                logic_value = not logic_value
-                            logic_inputs.append(logic_value)
-                        
-                        real_output_bool = gate_func(logic_inputs)
-                        
-                        if real_output_bool:
-                            team.solved_current_round = True
-                            gate_score = GATE_SCORES.get(gate_type, 2)
-                            bonus = 0.5 if team.was_sabotaged else 0
-                            
-                            team.last_round_base = gate_score
-                            team.last_round_bonus = bonus
-                            # DEFERRED SCORING: Do not add to team.score yet
-                            return room, team
-                        else:
-                            # Penalty for wrong attempt
-                            team.last_round_penalty += 1 
-                            return room, None
+        room, team, _ = self.locate(sid)
+        if team is None:
+            return None, None
+        if room.logic_mode == 'open' and room.state == 'PLAYING':
+            # NEW: Check if EVERYONE in the team has confirmed
+            if team.voted_bits != team.member_bits:
+                return room, None # Cannot override yet
+            
+            # REALITY (The output the gate produces based on cards + active NOTs)
+            if team.gate_output():
+                team.solved_current_round = True
+                gate_score = GATE_SCORES.get(team.current_gate, 2)
+                bonus = 0.5 if team.was_sabotaged else 0
+                
+                team.last_round_base = gate_score
+                team.last_round_bonus = bonus
+                # DEFERRED SCORING: Do not add to team.score yet
+                return room, team
+            else:
+                # Penalty for wrong attempt
+                team.last_round_penalty += 1 
+                return room, None
         return None, None
 
+    @recorded()
     def start_round(self, room_id: str, duration: int = 60):
         room = self.rooms.get(room_id)
         if not room:
@@ -455,18 +735,53 @@ class GameManager:
         self.assign_gates(room)
             
         room.state = 'PLAYING'
-        room.current_round_end_time = time.time() + duration
+        room.current_round_end_time = self.now + duration
+        room.not_gates_locked = False
+        self.touch(room_id)
         
-        # Deal random cards (0 or 1) to each player
+        # Deal random cards (0 or 1) to each player from the room's own RNG, so a replay deals the same
         # Iterate through all players in all teams
+        rng = random.Random(f"{room.seed}:{room.deals}")
+        room.deals += 1
         for team in room.teams.values():
             for player in team.players.values():
-                player.card_value = random.choice([0, 1])
+                player.card_value = rng.choice([0, 1])
                 player.vote_value = None  # Reset vote
                 player.has_not_gate = False
         
         return room
 
+    @recorded()
+    def lock_not_gates(self, room_id: str) -> bool:
+        """NOT lockout reached: players can no longer toggle NOT gates this round"""
+        room = self.rooms.get(room_id)
+        if not room or room.state != 'PLAYING':
+            return False
+        room.not_gates_locked = True
+        return True
+
+    @recorded()
+    def end_round(self, room_id: str) -> Optional[Room]:
+        """Time is up: final logic check, deferred scores, FINISHED. None if the round isn't running."""
+        room = self.rooms.get(room_id)
+        if not room or room.state != 'PLAYING':
+            return None
+
+        # Final logic evaluation before ending
+        self.check_logic(room_id)
+
+        # Apply deferred scores
+        self.finalize_round_scores(room_id)
+
+        room.state = 'FINISHED'
+        self.touch(room_id)
+
+        # Reset for next round (but keep solved_current_round to show results,
+        # and players' cards/votes for the results screen)
+        for team in room.teams.values():
+            team.not_gates_used = 0
+        return room
+
     def assign_gates(self, room: Room):
         """Assign gates to teams based on game mode and round number"""
         team_list = list(room.teams.values())
@@ -496,18 +811,9 @@ class GameManager:
 
     def check_gate_logic(self, team: Team) -> bool:
         """Check if a specific team solved their gate"""
-        gate_func = GATE_LOGIC.get(team.current_gate, GATE_LOGIC['AND'])
-        logic_inputs = []
-        
-        for player in team.players.values():
-            # Standard logic evaluation: card_value inverted if has_not_gate
-            logic_value = bool(player.card_value)
-            if player.has_not_gate:
-                logic_value = not logic_value
-            logic_inputs.append(logic_value)
-        
-        return gate_func(logic_inputs)
+        return team.gate_output()
 
+    @recorded()
     def finalize_round_scores(self, room_id: str):
         """Apply scores and penalties at the end of the round"""
         room = self.rooms.get(room_id)
@@ -536,6 +842,7 @@ class GameManager:
             # Update the penalty stat to include the failure penalty for display
             team.last_round_penalty = total_penalty
 
+    @recorded()
     def reset_scores(self, room_id: str):
         """Reset scores for all teams in the room"""
         room = self.rooms.get(room_id)
@@ -559,6 +866,7 @@ class GameManager:
             return room
         return None
     
+    @recorded()
     def reset_game(self, room_id: str):
         """Complete game reset: round 0, scores 0, state WAITING"""
         room = self.rooms.get(room_id)
@@ -567,6 +875,7 @@ class GameManager:
             room.round_number = 0
             room.state = 'WAITING'
             room.current_round_end_time = None
+            room.not_gates_locked = False
             
             # Reset all teams
             for team in room.teams.values():
@@ -588,6 +897,7 @@ class GameManager:
             return room
         return None
 
+    @recorded()
     def toggle_team_chat(self, room_id: str, team_id: str):
         """Toggle chat permission for a specific team"""
         room = self.rooms.get(room_id)
@@ -600,13 +910,23 @@ class GameManager:
         
     def can_chat(self, room_id: str, sid: str):
         """Check if a player can send chat messages"""
-        room = self.rooms.get(room_id)
-        if room:
-            for team in room.teams.values():
-                if sid in team.players:
-                    return team.chat_enabled
+        room, team, _ = self.locate(sid)
+        if team is not None and room.id == room_id:
+            return team.chat_enabled
         return False
 
+    @recorded()
+    def post_chat(self, room_id: str, sid: str, text: str) -> Tuple[Optional[Team], Optional[dict]]:
+        """Record a team chat message. Returns (team, message), or (None, None) if the player can't chat."""
+        if not self.can_chat(room_id, sid):
+            return None, None
+        _, team, player = self.locate(sid)
+        message = {'sender': player.name, 'sender_sid': sid, 'text': text, 'ts': self.now}
+        team.chat_history.append(message)
+        team._chat_rev += 1
+        self.touch(room_id)
+        return team, message
+
     # def check_logic(self, room_id: str):
     #     room = self.rooms.get(room_id)
     #     if not room or room.state != "PLAYING":
@@ -0,0 +1,40 @@
+"""
+Gate Kernel - Bitmask evaluation shared by every logic path.
+
+A team's inputs are packed into integers: bit i belongs to the player seated
+in slot i. `cards` holds dealt card values, `nots` the active NOT gates and
+`members` the occupied slots, so the effective inputs are (cards ^ nots) & members.
+"""
+from typing import Iterable, Tuple
+
+# Gate outputs from packed inputs: mask compares for AND/OR/NAND/NOR, popcount for parity
+GATE_MASK_LOGIC = {
+    'AND': lambda inputs, members: inputs == members,
+    'OR': lambda inputs, members: inputs != 0,
+    'XOR': lambda inputs, members: inputs.bit_count() & 1 == 1,
+    'XNOR': lambda inputs, members: inputs.bit_count() & 1 == 0,
+    'NAND': lambda inputs, members: inputs != members,
+    'NOR': lambda inputs, members: inputs == 0
+}
+
+def evaluate(gate: str, cards: int, nots: int, members: int) -> bool:
+    """Output of `gate` for the given card and NOT masks (unknown gates fall back to AND)"""
+    gate_func = GATE_MASK_LOGIC.get(gate, GATE_MASK_LOGIC['AND'])
+    return gate_func((cards ^ nots) & members, members)
+
+def pack(values: Iterable) -> int:
+    """Pack truthy values into a mask, first value in bit 0"""
+    mask = 0
+    for i, value in enumerate(values):
+        if value:
+            mask |= 1 << i
+    return mask
+
+def pack_inputs(inputs: Iterable) -> Tuple[int, int]:
+    """Pack a list of inputs into (inputs_mask, members_mask)"""
+    inputs = list(inputs)
+    return pack(inputs), (1 << len(inputs)) - 1
+
+def lowest_free_slot(members: int) -> int:
+    """Bit of the lowest unoccupied slot"""
+    return ~members & (members + 1)
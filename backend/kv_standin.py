@@ -0,0 +1,151 @@
+"""
+KV Stand-in - A tiny in-process server speaking the Redis protocol (RESP2)
+
+Just enough of Redis for RedisRoomStore (strings and sets), so the shared
+room store (restarts, shard handover) can be tested and tried locally without
+a Redis install:
+
+    python kv_standin.py --port 6390
+    ROOM_STORE_URL=redis://127.0.0.1:6390/0 uvicorn main:socket_app --port 8000
+
+Not a Redis replacement: no persistence, expiry or pub/sub (so it can't back
+SOCKETIO_MESSAGE_QUEUE).
+"""
+import argparse
+import asyncio
+from typing import Dict, List, Optional, Set, Union
+
+Value = Union[bytes, Set[bytes]]
+
+class KVStandin:
+    def __init__(self):
+        self.data: Dict[bytes, Value] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.commands = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """Start listening; returns the bound port (port 0 picks a free one)"""
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                self.commands += 1
+                writer.write(self.execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()  # Inline command (e.g. typed in telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    def execute(self, args: List[bytes]) -> bytes:
+        name = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return f"-ERR unknown command '{name}'\r\n".encode()
+        try:
+            return handler(*args[1:])
+        except TypeError:
+            return f"-ERR wrong number of arguments for '{name}'\r\n".encode()
+
+    # --- Replies
+
+    @staticmethod
+    def _bulk(value: Optional[bytes]) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    @staticmethod
+    def _int(value: int) -> bytes:
+        return b':%d\r\n' % value
+
+    def _array(self, values) -> bytes:
+        return b'*%d\r\n' % len(values) + b''.join(self._bulk(v) for v in values)
+
+    def _set(self, key: bytes) -> Set[bytes]:
+        return self.data.setdefault(key, set())
+
+    # --- Commands
+
+    def cmd_ping(self, *args):
+        return self._bulk(args[0]) if args else b'+PONG\r\n'
+
+    def cmd_client(self, *args):
+        return b'+OK\r\n'  # SETINFO / SETNAME on connect
+
+    def cmd_select(self, db):
+        return b'+OK\r\n'
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        return b'+OK\r\n'
+
+    def cmd_get(self, key):
+        value = self.data.get(key)
+        if isinstance(value, set):
+            return b'-WRONGTYPE Operation against a key holding the wrong kind of value\r\n'
+        return self._bulk(value)
+
+    def cmd_set(self, key, value):
+        self.data[key] = value
+        return b'+OK\r\n'
+
+    def cmd_del(self, *keys):
+        return self._int(sum(self.data.pop(key, None) is not None for key in keys))
+
+    def cmd_exists(self, *keys):
+        return self._int(sum(key in self.data for key in keys))
+
+    def cmd_sadd(self, key, *members):
+        members_set = self._set(key)
+        before = len(members_set)
+        members_set.update(members)
+        return self._int(len(members_set) - before)
+
+    def cmd_srem(self, key, *members):
+        members_set = self._set(key)
+        before = len(members_set)
+        members_set.difference_update(members)
+        if not members_set:
+            del self.data[key]
+        return self._int(before - len(members_set))
+
+    def cmd_smembers(self, key):
+        value = self.data.get(key, set())
+        return self._array(sorted(value))
+
+async def main():
+    parser = argparse.ArgumentParser(description="Redis-protocol stand-in for RedisRoomStore")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+    standin = KVStandin()
+    port = await standin.start(args.host, args.port)
+    print(f"[KV] Stand-in listening on redis://{args.host}:{port}/0")
+    await standin.server.serve_forever()
+
+if __name__ == "__main__":
+    asyncio.run(main())
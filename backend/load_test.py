@@ -0,0 +1,462 @@
+"""
+Socket.IO load generator for main:socket_app.
+
+Starts the ASGI app locally (uvicorn subprocess by default, or in this process
+with --in-process) and drives it with simulated socketio.AsyncClient operators
+and players following realistic scripts:
+
+- Operator: join_game, enable team chat, then for each round start_round,
+  sprinkle apply_not on random players and wait for round_end.
+- Player: join_game into a team, then while a round is PLAYING send
+  player_input bursts with think time and the odd chat_message.
+
+Broadcast latency is measured per action as the time from the emit to the
+first game_state (full or delta) that reflects it (the player's new vote, the
+target's NOT flip).
+
+Usage:
+    python load_test.py --rooms 50 --teams 4 --players 3 --rounds 3
+    python load_test.py --rooms 200 --json load_200.json
+    python load_test.py --url http://localhost:8000 --rooms 10     # existing server (no CPU/RSS)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import socketio
+
+from room_state import apply_delta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TEAM_IDS = 'ABCDEFGHIJKLMNO'
+
+class Metrics:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {'player_input': [], 'apply_not': []}
+        self.sent = 0
+        self.received = 0
+        self.game_states = 0
+        self.bytes_received = 0
+        self.errors = 0
+        self.connect_failures = 0
+        self.resyncs = 0
+
+    def latency(self, kind: str, seconds: float):
+        self.latencies[kind].append(seconds)
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def payload_size(data) -> int:
+    try:
+        return len(json.dumps(data, separators=(',', ':'), default=str))
+    except Exception:
+        return 0
+
+def find_player(state: Dict, sid: str) -> Optional[Dict]:
+    for team in (state.get('teams') or {}).values():
+        player = team.get('players', {}).get(sid)
+        if player is not None:
+            return player
+    return None
+
+class SimClient:
+    """One simulated socket: shared connection / bookkeeping for players and operators"""
+
+    def __init__(self, url: str, room_id: str, metrics: Metrics, rng: random.Random):
+        self.url = url
+        self.room_id = room_id
+        self.metrics = metrics
+        self.rng = rng
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.state: Dict = {}
+        self.resync_requested = False
+        self.round_over = asyncio.Event()
+
+        @self.sio.on('*')
+        async def catch_all(event, data=None):
+            self.metrics.received += 1
+            self.metrics.bytes_received += payload_size(data)
+            if event == 'round_end':
+                self.round_over.set()
+            elif event == 'error':
+                self.metrics.errors += 1
+
+        @self.sio.on('game_state')
+        async def on_game_state(data):
+            self.metrics.received += 1
+            self.metrics.game_states += 1
+            self.metrics.bytes_received += payload_size(data)
+            self.state = data
+            self.resync_requested = False
+            self.on_state(data)
+
+        @self.sio.on('game_state_delta')
+        async def on_game_state_delta(delta):
+            self.metrics.received += 1
+            self.metrics.game_states += 1
+            self.metrics.bytes_received += payload_size(delta)
+            version = self.state.get('version')
+            if version is None or delta['version'] <= version:
+                return  # Our join snapshot is still on its way, or already covers this delta
+            if version != delta['base']:
+                # Same recovery as the web client: ask once for a full snapshot
+                if not self.resync_requested:
+                    self.resync_requested = True
+                    self.metrics.resyncs += 1
+                    await self.emit('resync_state', {'room_id': self.room_id})
+                return
+            self.state = apply_delta(self.state, delta['changes'])
+            self.state['version'] = delta['version']
+            self.on_state(self.state)
+
+    @property
+    def sid(self):
+        return self.sio.get_sid()
+
+    def on_state(self, state: Dict):
+        pass
+
+    async def emit(self, event: str, data: Dict):
+        self.metrics.sent += 1
+        await self.sio.emit(event, data)
+
+    async def connect(self) -> bool:
+        try:
+            await self.sio.connect(self.url, transports=['websocket'])
+            return True
+        except Exception:
+            self.metrics.connect_failures += 1
+            return False
+
+    async def close(self):
+        try:
+            await self.sio.disconnect()
+        except Exception:
+            pass
+
+class SimPlayer(SimClient):
+    def __init__(self, url, room_id, team_id, name, metrics, rng, cfg):
+        super().__init__(url, room_id, metrics, rng)
+        self.team_id = team_id
+        self.name = name
+        self.cfg = cfg
+        self.pending_vote = None  # (vote, sent_at)
+
+    def on_state(self, state):
+        if self.pending_vote is None:
+            return
+        me = find_player(state, self.sid)
+        vote, sent_at = self.pending_vote
+        if me is not None and me.get('vote_value') == vote:
+            self.metrics.latency('player_input', time.perf_counter() - sent_at)
+            self.pending_vote = None
+
+    async def run(self, stop: asyncio.Event, room_ready: asyncio.Event):
+        await room_ready.wait()
+        await self.emit('join_game', {'room_id': self.room_id, 'name': self.name, 'role': 'player',
+                                      'team_id': self.team_id, 'avatar': '🤖'})
+        while not stop.is_set():
+            if self.state.get('state') != 'PLAYING':
+                await asyncio.sleep(0.2)
+                continue
+            # Vote burst: flip the vote a few times, as undecided players do
+            for _ in range(self.rng.randint(1, self.cfg.burst)):
+                me = find_player(self.state, self.sid) or {}
+                vote = 1 - me['vote_value'] if me.get('vote_value') in (0, 1) else self.rng.randint(0, 1)
+                self.pending_vote = (vote, time.perf_counter())
+                await self.emit('player_input', {'vote': vote})
+                await asyncio.sleep(self.rng.uniform(0.05, 0.3))
+            if self.rng.random() < self.cfg.chat_rate:
+                await self.emit('chat_message', {'room_id': self.room_id, 'message': 'load test'})
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.cfg.think)
+
+class SimOperator(SimClient):
+    def __init__(self, url, room_id, metrics, rng, cfg):
+        super().__init__(url, room_id, metrics, rng)
+        self.cfg = cfg
+        self.pending_not = None  # (target_sid, expected has_not_gate, sent_at)
+
+    def on_state(self, state):
+        if self.pending_not is None:
+            return
+        target_sid, expected, sent_at = self.pending_not
+        target = find_player(state, target_sid)
+        if target is not None and target.get('has_not_gate') == expected:
+            self.metrics.latency('apply_not', time.perf_counter() - sent_at)
+            self.pending_not = None
+
+    async def run(self, stop: asyncio.Event, room_ready: asyncio.Event, players_ready: asyncio.Event):
+        await self.emit('join_game', {'room_id': self.room_id, 'name': 'Operator', 'role': 'operator'})
+        # Rooms start with teams A and B once a player joins; the operator sets up the rest first
+        await self.emit('get_room_info', {'room_id': self.room_id})
+        await self.emit('set_max_players', {'room_id': self.room_id, 'count': self.cfg.players})
+        for _ in range(self.cfg.teams - 2):
+            await self.emit('add_team', {'room_id': self.room_id})
+        await asyncio.sleep(0.5)
+        room_ready.set()
+        await players_ready.wait()
+        for tid in TEAM_IDS[:self.cfg.teams]:
+            await self.emit('toggle_chat', {'room_id': self.room_id, 'team_id': tid})
+
+        for _ in range(self.cfg.rounds):
+            if stop.is_set():
+                break
+            self.round_over.clear()
+            await self.emit('start_round', {'room_id': self.room_id, 'duration': self.cfg.duration})
+            deadline = time.perf_counter() + self.cfg.duration
+            while time.perf_counter() < deadline - self.cfg.not_lockout and not self.round_over.is_set():
+                await asyncio.sleep(self.rng.uniform(1, 3))
+                targets = [(sid, p) for team in (self.state.get('teams') or {}).values()
+                           for sid, p in team.get('players', {}).items()]
+                if targets and self.rng.random() < self.cfg.not_rate:
+                    sid, player = self.rng.choice(targets)
+                    self.pending_not = (sid, not player.get('has_not_gate'), time.perf_counter())
+                    await self.emit('apply_not', {'room_id': self.room_id, 'target_sid': sid})
+            try:
+                await asyncio.wait_for(self.round_over.wait(), timeout=self.cfg.duration + 10)
+            except asyncio.TimeoutError:
+                self.metrics.errors += 1
+            await asyncio.sleep(self.cfg.pause)
+
+class ServerMonitor:
+    """Samples CPU and RSS of the server process from /proc (psutil if available)"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.samples: List[Dict] = []
+        self._task = None
+        try:
+            import psutil
+            self._proc = psutil.Process(pid)
+        except Exception:
+            self._proc = None
+
+    def _read(self):
+        if self._proc is not None:
+            cpu = self._proc.cpu_times()
+            return cpu.user + cpu.system, self._proc.memory_info().rss
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        rss = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        return cpu, rss
+
+    async def _loop(self, interval: float):
+        last_cpu, _ = self._read()
+        last_t = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            cpu, rss = self._read()
+            now = time.perf_counter()
+            self.samples.append({'cpu_percent': 100 * (cpu - last_cpu) / (now - last_t), 'rss_mb': rss / 2 ** 20})
+            last_cpu, last_t = cpu, now
+
+    def start(self, interval: float = 0.5):
+        try:
+            self._read()
+        except Exception:
+            print(f"[LOAD] Cannot read CPU/RSS for pid {self.pid}; skipping server stats")
+            return
+        self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self) -> Dict:
+        if self._task:
+            self._task.cancel()
+        if not self.samples:
+            return {}
+        cpu = [s['cpu_percent'] for s in self.samples]
+        rss = [s['rss_mb'] for s in self.samples]
+        return {'cpu_mean_percent': sum(cpu) / len(cpu), 'cpu_max_percent': max(cpu),
+                'rss_max_mb': max(rss), 'rss_final_mb': rss[-1]}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def wait_for_server(url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return
+            except Exception:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up")
+
+async def start_server(args):
+    """Returns (url, pid or None, stopper coroutine function)"""
+    if args.url:
+        return args.url, None, None
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    if args.in_process:
+        import uvicorn
+        sys.path.insert(0, BACKEND_DIR)
+        os.chdir(BACKEND_DIR)
+        import main
+        server = uvicorn.Server(uvicorn.Config(main.socket_app, host='127.0.0.1', port=port, log_level='warning'))
+        task = asyncio.create_task(server.serve())
+        await wait_for_server(url)
+
+        async def stop_in_process():
+            server.should_exit = True
+            await task
+        return url, os.getpid(), stop_in_process
+
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:socket_app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BACKEND_DIR, stdin=subprocess.DEVNULL,
+        stdout=None if args.server_logs else subprocess.DEVNULL,
+        stderr=None if args.server_logs else subprocess.DEVNULL)
+    await wait_for_server(url)
+
+    async def stop_subprocess():
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return url, proc.pid, stop_subprocess
+
+async def run_load(args) -> Dict:
+    url, pid, stop_server = await start_server(args)
+    metrics = Metrics()
+    rng = random.Random(args.seed)
+    monitor = ServerMonitor(pid) if pid else None
+
+    operators, players, room_ready = [], [], {}
+    for r in range(args.rooms):
+        room_id = f"load-{r}"
+        room_ready[room_id] = asyncio.Event()
+        operators.append(SimOperator(url, room_id, metrics, random.Random(rng.random()), args))
+        for tid in TEAM_IDS[:args.teams]:
+            for p in range(args.players):
+                players.append(SimPlayer(url, room_id, tid, f"{tid}{p}", metrics, random.Random(rng.random()), args))
+    clients = operators + players
+    print(f"[LOAD] {len(operators)} operators + {len(players)} players against {url}")
+
+    # Ramp connections so the accept queue is not the bottleneck
+    connect_gate = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(client):
+        async with connect_gate:
+            return await client.connect()
+    t0 = time.perf_counter()
+    connected = await asyncio.gather(*(connect(c) for c in clients))
+    print(f"[LOAD] Connected {sum(connected)}/{len(clients)} in {time.perf_counter() - t0:.1f}s")
+
+    if monitor:
+        monitor.start()
+    stop = asyncio.Event()
+    players_ready = asyncio.Event()
+    start = time.perf_counter()
+    sent_before, received_before = metrics.sent, metrics.received
+
+    live_players = [p for p, ok in zip(players, connected[len(operators):]) if ok]
+    live_operators = [o for o, ok in zip(operators, connected[:len(operators)]) if ok]
+    player_tasks = [asyncio.create_task(p.run(stop, room_ready[p.room_id])) for p in live_players]
+    operator_tasks = [asyncio.create_task(o.run(stop, room_ready[o.room_id], players_ready)) for o in live_operators]
+    await asyncio.sleep(args.join_wait)
+    players_ready.set()
+
+    await asyncio.gather(*operator_tasks, return_exceptions=True)
+    stop.set()
+    await asyncio.gather(*player_tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    server_stats = await monitor.stop() if monitor else {}
+    await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+    if stop_server:
+        await stop_server()
+
+    report = {
+        'config': {k: v for k, v in vars(args).items() if k != 'json'},
+        'clients': len(clients),
+        'elapsed_s': elapsed,
+        'events_sent_per_s': (metrics.sent - sent_before) / elapsed,
+        'events_received_per_s': (metrics.received - received_before) / elapsed,
+        'game_state_per_s': metrics.game_states / elapsed,
+        'mb_received_per_s': metrics.bytes_received / elapsed / 2 ** 20,
+        'errors': metrics.errors,
+        'connect_failures': metrics.connect_failures,
+        'resyncs': metrics.resyncs,
+        'latency_ms': {
+            kind: {
+                'count': len(values),
+                'p50': percentile(values, 0.50) * 1000,
+                'p95': percentile(values, 0.95) * 1000,
+                'p99': percentile(values, 0.99) * 1000,
+                'max': max(values) * 1000 if values else 0
+            } for kind, values in metrics.latencies.items()
+        },
+        'server': server_stats
+    }
+    return report
+
+def print_report(report: Dict):
+    print(f"\n=== Load test: {report['clients']} clients, {report['elapsed_s']:.1f}s ===")
+    print(f"Events sent/s: {report['events_sent_per_s']:,.0f}   received/s: {report['events_received_per_s']:,.0f}   "
+          f"game_state/s: {report['game_state_per_s']:,.0f}   MB/s in: {report['mb_received_per_s']:.2f}")
+    print(f"Errors: {report['errors']}   Connect failures: {report['connect_failures']}   Resyncs: {report['resyncs']}")
+    print(f"\n{'Broadcast latency':<18} | {'count':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+    print("-" * 72)
+    for kind, s in report['latency_ms'].items():
+        print(f"{kind:<18} | {s['count']:>7} | {s['p50']:>8.1f} | {s['p95']:>8.1f} | {s['p99']:>8.1f} | {s['max']:>8.1f}")
+    server = report['server']
+    if server:
+        print(f"\nServer CPU mean {server['cpu_mean_percent']:.0f}% (max {server['cpu_max_percent']:.0f}%)   "
+              f"RSS max {server['rss_max_mb']:.0f} MB (final {server['rss_final_mb']:.0f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO load generator for ArenaLogic")
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--teams', type=int, default=2, help="Teams per room (the room's first N teams)")
+    parser.add_argument('--players', type=int, default=3, help="Players per team")
+    parser.add_argument('--rounds', type=int, default=2, help="Rounds each operator runs")
+    parser.add_argument('--duration', type=int, default=15, help="Round duration in seconds")
+    parser.add_argument('--pause', type=float, default=2, help="Seconds between rounds")
+    parser.add_argument('--not-lockout', type=int, default=5)
+    parser.add_argument('--burst', type=int, default=3, help="Max votes per player burst")
+    parser.add_argument('--think', type=float, default=2, help="Mean seconds between player bursts")
+    parser.add_argument('--chat-rate', type=float, default=0.1, help="Chance of a chat message after a burst")
+    parser.add_argument('--not-rate', type=float, default=0.5, help="Chance the operator applies a NOT per tick")
+    parser.add_argument('--join-wait', type=float, default=2, help="Seconds to let joins settle before round 1")
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    parser.add_argument('--url', help="Target an already running server instead of starting one")
+    parser.add_argument('--in-process', action='store_true', help="Run uvicorn in this process (CPU/RSS include clients)")
+    parser.add_argument('--server-logs', action='store_true', help="Show the spawned server's output")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    if not 2 <= args.teams <= len(TEAM_IDS) or not 1 <= args.players <= 5:
+        parser.error("--teams must be 2-15 and --players 1-5 (server limits)")
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,46 @@ from game_manager import GameManager
 from accessibility import AccessibilityManager
 from assistant_logic import AssistantManager
 from surveys import survey_manager
+from room_state import RoomStateTracker, team_view, view_room
+from card_images import card_image_store, image_response, room_images
+from broadcast_scheduler import BroadcastScheduler
+from round_timers import NOT_LOCKOUT, ROUND_END, RoundTimers
+from room_store import create_room_store, decode_room, encode_room
+from snapshots import SNAPSHOT_PATH, SnapshotWriter
+from event_log import EVENT_LOG_DIR, EventLog
+from room_actors import RoomActors, RoomBusy
+from voice_workers import VOICE_WORKERS, VoicePool
+from tts_cache import tts_cache
+from narration import Narrator, not_alert_segments, round_end_segments, round_start_segments
+import wire
 import asyncio
+import base64
+import functools
+import itertools
+import os
 import sys
 import time
+from collections import defaultdict
 import socketio
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 
+# Emits go through a Redis message queue so they reach sockets connected to other processes
+MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+# Clients may be connected to another process (message queue, or a shard worker behind shard_router)
+remote_sockets = bool(MESSAGE_QUEUE)
+
 sio = socketio.AsyncServer(
     async_mode='asgi', 
     cors_allowed_origins='*',
     ping_timeout=60,
-    ping_interval=25
+    ping_interval=25,
+    json=wire.OrjsonCodec,  # JSON clients: same wire format, faster encoder
+    client_manager=socketio.AsyncRedisManager(MESSAGE_QUEUE) if MESSAGE_QUEUE else None
 )
+# Clients that opt in (auth {'wire': 'msgpack'}, server started with SOCKETIO_MSGPACK=1) get heavy payloads as msgpack
+wire_formats = wire.WireFormats()
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +53,28 @@ app.add_middleware(
 socket_app = socketio.ASGIApp(sio, app)
 
 game_manager = GameManager()
+# Every game mutation, for replaying disputed rounds (python event_log.py); None: disabled (EVENT_LOG_DIR unset)
+event_log = EventLog(EVENT_LOG_DIR) if EVENT_LOG_DIR else None
+if event_log is not None:
+    game_manager.recorder = event_log.record
+# Rooms a restart (or the shard a room moves to) can pick up: saved after each broadcast flush, loaded on join.
+# One process serves a room at a time (shard_router): the store doesn't arbitrate between workers.
+room_store = create_room_store(os.getenv('ROOM_STORE_URL'), card_image_store)
+# Periodic crash-safe copy of every room on local disk, restored on startup (None: disabled)
+snapshots = SnapshotWriter(SNAPSHOT_PATH, images=card_image_store) if SNAPSHOT_PATH else None
+# Every room change runs on the room's own ordered command queue (see room_actors)
+room_actors = RoomActors(exists=game_manager.rooms.__contains__)
+# Evictions close a room between commands, never with some queued or running for it
+game_manager.is_busy = lambda room_id: not room_actors.idle(room_id)
+# STT / TTS / assistant chats in worker processes, off this event loop (None: in-process)
+voice_pool = VoicePool() if VOICE_WORKERS else None
+# Spoken round updates for players with accessibility on, joined from pre-rendered clips
+narrator = Narrator()
+# Ids of TTS audio streamed to clients (see stream_speech)
+speech_streams = itertools.count(1)
+state_tracker = RoomStateTracker()
+# Versions must reach clients in order: compute + emit happen under the room's lock
+broadcast_locks = defaultdict(asyncio.Lock)
 
 # Initialize managers AFTER sio is defined
 # This is done in the startup event handler below
@@ -36,18 +85,56 @@ assistant = None
 async def root():
     return {"message": "Logic Gates Game Backend is running"}
 
+@app.get("/room-queues")
+async def room_queues():
+    """Command queue depth and service times per room"""
+    return room_actors.stats()
+
+@app.get("/voice-workers")
+async def voice_workers():
+    """Voice worker processes: jobs in flight, failures and mean job time by kind"""
+    return voice_pool.stats() if voice_pool is not None else {'workers': 0}
+
+@app.get("/tts-cache")
+async def tts_cache_stats():
+    """Speech cache hits / misses: this process's, and each voice worker's"""
+    stats = {'server': tts_cache.stats()}
+    if voice_pool is not None:
+        stats['workers'] = [await voice_pool.submit('tts_cache_stats', worker=index) for index in range(voice_pool.size)]
+    return stats
+
+@app.get("/card-images/{digest}")
+async def get_card_image(digest: str, if_none_match: Optional[str] = Header(None)):
+    """Serve an uploaded card image by content hash"""
+    return image_response(digest, card_image_store.get(digest), if_none_match)
+
+def busy_guard(handler):
+    """Tell the client to retry when its room's command queue is full (room_actors back-pressure)"""
+    @functools.wraps(handler)
+    async def guarded(sid, *args):
+        try:
+            return await handler(sid, *args)
+        except RoomBusy:
+            await sio.emit('error', {'message': 'The room is busy, try again in a moment'}, to=sid)
+    return guarded
+
 @sio.event
-async def connect(sid, environ):
-    print(f"Client connected: {sid}")
-    await sio.emit('connection_ack', {'sid': sid}, to=sid)
+async def connect(sid, environ, auth=None):
+    wire_format = wire_formats.register(sid, auth)
+    print(f"Client connected: {sid} ({wire_format})")
+    await sio.emit('connection_ack', {'sid': sid, 'wire': wire_format}, to=sid)
 
 @sio.event
 async def disconnect(sid):
     print(f"Client disconnected: {sid}")
-    game_manager.remove_player(sid)
+    room, _, _ = game_manager.locate(sid)
+    if room is not None:
+        await room_actors.run(room.id, game_manager.remove_player, sid)
+    wire_formats.forget(sid)
     # Broadcast update? Ideally yes.
     
 @sio.event
+@busy_guard
 async def join_game(sid, data):
     print(f"DEBUG: join_game called with data: {data}")
     # data: { room_id, name, role, team_id }
@@ -57,17 +144,24 @@ async def join_game(sid, data):
     team_id = data.get('team_id')
     avatar = data.get('avatar', '😀')
     
-    success, info = game_manager.join_room(sid, room_id, name, role, team_id, avatar)
+    success, info = await room_actors.call(room_id, join_command, sid, room_id, name, role, team_id, avatar)
     print(f"DEBUG: join_room result for {sid}: {success} - {info}")
     
     if success:
         await sio.enter_room(sid, room_id)
         print(f"DEBUG: Broadcasting state for room {room_id}")
-        await broadcast_room_state(room_id)
+        await broadcast_room_state(room_id, joined_sid=sid)
     else:
         print(f"DEBUG: Join failed for {sid}: {info}")
         await sio.emit('error', {'message': f'Join Failed: {info}'}, to=sid)
 
+@sio.event
+async def resync_state(sid, data):
+    """Client missed a version (or has none): send a full snapshot"""
+    room_id = data.get('room_id')
+    if room_id in game_manager.rooms:
+        await send_full_state(room_id, sid)
+
 @sio.event
 async def get_room_info(sid, data):
     """Retrieve available teams and player counts for a room"""
@@ -79,52 +173,70 @@ async def get_room_info(sid, data):
         await sio.emit('error', {'message': 'Room not found or could not be initialized'}, to=sid)
 
 @sio.event
+async def clock_sync(sid, data):
+    """Clock-offset handshake (NTP style): the ack carries our clock; the client halves the round trip"""
+    return {'t0': data.get('t0'), 'server_time': time.time() * 1000}
+
+@sio.event
+@busy_guard
 async def start_round(sid, data):
     room_id = data.get('room_id')
     duration = data.get('duration', 30) # Default 30s
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
         print(f"DEBUG: Starting round for room {room_id} initiated by {sid} with duration {duration}s")
-        game_manager.start_round(room_id, duration)
-        await broadcast_room_state(room_id)
-        # Start timer task
-        asyncio.create_task(game_timer(room_id))
+        if await room_actors.call(room_id, start_round_command, room_id, duration):
+            await broadcast_room_state(room_id)
+            narrate(room_id, round_start_segments)
 
 @sio.event
+@busy_guard
 async def player_input(sid, data):
     vote = data.get('vote') # 0 or 1
-    room = game_manager.set_input(sid, vote)
+    room, _, _ = game_manager.locate(sid)
+    if room is None:
+        return
+    room, solved = await room_actors.call(room.id, game_manager.cast_vote, sid, vote)
     if room:
-        # Check logic immediately on input change
-        solved_team = game_manager.check_logic(room.id)
-        if solved_team:
-            await sio.emit('round_result', {'winner': solved_team.id, 'score': solved_team.score}, room=room.id)
-            # Maybe waiting period before next round?
+        await announce_solved(room.id, solved)
+        # Maybe waiting period before next round?
             
-        await broadcast_room_state(room.id)
+        await broadcast_room_state(room.id, urgent=bool(solved))
+
+async def announce_solved(room_id, solved):
+    """A vote (clicked or spoken) solved these teams' gates"""
+    for solved_team in solved:
+        await sio.emit('round_result', {'winner': solved_team.id, 'score': solved_team.score}, room=room_id)
         
 @sio.event
+@busy_guard
 async def attempt_open(sid, data):
-    room, solved_team = game_manager.attempt_open(sid)
+    room, _, _ = game_manager.locate(sid)
+    if room is None:
+        return
+    room, solved_team = await room_actors.call(room.id, game_manager.attempt_open, sid)
     if room:
         if solved_team:
             await sio.emit('round_result', {'winner': solved_team.id, 'score': solved_team.score, 'type': 'success'}, room=room.id)
         else:
             await sio.emit('error', {'message': 'System lock active: Logic output is still 0.'}, to=sid)
-        await broadcast_room_state(room.id)
+        await broadcast_room_state(room.id, urgent=solved_team is not None)
 
 @sio.event
+@busy_guard
 async def apply_not(sid, data):
     target_sid = data.get('target_sid')
     room_id = data.get('room_id')
-    room = game_manager.toggle_not_gate(sid, target_sid, room_id)
+    room = await room_actors.call(room_id, game_manager.toggle_not_gate, sid, target_sid, room_id)
     if room:
         await broadcast_room_state(room.id)
+        narrate_not_gate(room.id, target_sid)
     else:
         # Send error message to requester
         await sio.emit('error', {'message': 'Cannot apply NOT gate (time/score/team restrictions)'}, room=sid)
 
 @sio.event
+@busy_guard
 async def kick_player(sid, data):
     """Operator can kick any player from the room"""
     target_sid = data.get('target_sid')
@@ -134,25 +246,25 @@ async def kick_player(sid, data):
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
         # Disconnect the target player
-        game_manager.remove_player(target_sid)
+        await room_actors.call(room_id, game_manager.remove_player, target_sid)
         await sio.leave_room(target_sid, room_id)
         await sio.emit('kicked', {'message': 'You have been removed from the game'}, room=target_sid)
         await sio.disconnect(target_sid)
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def set_game_mode(sid, data):
     """Operator sets the game mode"""
     room_id = data.get('room_id')
     mode = data.get('mode')  # 'competitive', 'asymmetric', 'campaign'
     
     room = game_manager.rooms.get(room_id)
-    if room and room.operator_sid == sid and mode in ['competitive', 'asymmetric', 'campaign']:
-        room.game_mode = mode
-        room.round_number = 0  # Reset rounds when changing mode
+    if room and room.operator_sid == sid and await room_actors.call(room_id, game_manager.set_game_mode, room_id, mode):
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def set_target_gate(sid, data):
     """Operator sets the target gate sequence or single gate"""
     room_id = data.get('room_id')
@@ -162,37 +274,32 @@ async def set_target_gate(sid, data):
     room = game_manager.rooms.get(room_id)
     if not room or room.operator_sid != sid: return
     
-    valid_gates = ['AND', 'OR', 'XOR', 'XNOR', 'NAND', 'NOR']
-    
-    if gates is not None:
-        if isinstance(gates, str): gates = [gates]
-        if all(g in valid_gates for g in gates):
-            room.target_gates = gates
-            await broadcast_room_state(room_id)
-    elif gate is not None:
-        if gate in valid_gates:
-            room.target_gate = gate
-            await broadcast_room_state(room_id)
+    if isinstance(gates, str): gates = [gates]
+    if await room_actors.call(room_id, game_manager.set_target_gate, room_id, gate, gates):
+        await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def reset_scores(sid, data):
     """Operator resets all team scores"""
     room_id = data.get('room_id')
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
-        game_manager.reset_scores(room_id)
+        await room_actors.call(room_id, game_manager.reset_scores, room_id)
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def reset_game(sid, data):
     """Operator completely resets game to round 0, scores 0"""
     room_id = data.get('room_id')
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
-        game_manager.reset_game(room_id)
+        await room_actors.call(room_id, reset_game_command, room_id)
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def add_team(sid, data):
     """Operator adds a new team to the room"""
     room_id = data.get('room_id')
@@ -221,13 +328,14 @@ async def add_team(sid, data):
         'M': 'Team NU', 'N': 'Team XI', 'O': 'Team OMICRON',
     }
     team_name = TEAM_NAMES.get(next_id, f'Team {next_id}')
-    success = game_manager.add_team(room_id, next_id, team_name)
+    success = await room_actors.call(room_id, game_manager.add_team, room_id, next_id, team_name)
     if success:
         await broadcast_room_state(room_id)
     else:
         await sio.emit('error', {'message': 'Could not add team'}, to=sid)
 
 @sio.event
+@busy_guard
 async def remove_team(sid, data):
     """Operator removes an empty team from the room"""
     room_id = data.get('room_id')
@@ -237,23 +345,25 @@ async def remove_team(sid, data):
         await sio.emit('error', {'message': 'UNAUTHORIZED or room not found'}, to=sid)
         return
 
-    success, msg = game_manager.remove_team(room_id, team_id)
+    success, msg = await room_actors.call(room_id, game_manager.remove_team, room_id, team_id)
     if success:
         await broadcast_room_state(room_id)
     else:
         await sio.emit('error', {'message': msg}, to=sid)
 
 @sio.event
+@busy_guard
 async def toggle_chat(sid, data):
     """Operator toggles chat for a specific team"""
     room_id = data.get('room_id')
     team_id = data.get('team_id')
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
-        game_manager.toggle_team_chat(room_id, team_id)
+        await room_actors.call(room_id, game_manager.toggle_team_chat, room_id, team_id)
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def toggle_accessibility(sid, data):
     """Operator toggles accessibility (voice narration) for a specific player"""
     room_id = data.get('room_id')
@@ -270,17 +380,16 @@ async def toggle_accessibility(sid, data):
         return
     
     # Find player and toggle
-    for team in room.teams.values():
-        if target_sid in team.players:
-            player = team.players[target_sid]
-            player.accessibility_enabled = not player.accessibility_enabled
-            print(f"[ACCESSIBILITY] Player {player.name} accessibility: {player.accessibility_enabled}")
-            await broadcast_room_state(room_id)
-            return
+    player = await room_actors.call(room_id, game_manager.toggle_accessibility, room_id, target_sid)
+    if player is not None:
+        print(f"[ACCESSIBILITY] Player {player.name} accessibility: {player.accessibility_enabled}")
+        await broadcast_room_state(room_id)
+        return
     
     await sio.emit('error', {'message': 'Player not found'}, to=sid)
 
 @sio.event
+@busy_guard
 async def toggle_vote_privacy(sid, data):
     """Operator toggles whether vote discrepancy info is hidden from voice assistant"""
     room_id = data.get('room_id')
@@ -295,11 +404,12 @@ async def toggle_vote_privacy(sid, data):
         await sio.emit('error', {'message': 'UNAUTHORIZED: Only operator can toggle vote privacy'}, to=sid)
         return
     
-    room.hide_vote_info = not getattr(room, 'hide_vote_info', False)
+    await room_actors.call(room_id, game_manager.toggle_vote_privacy, room_id)
     print(f"[VOTE_PRIVACY] Room {room_id} hide_vote_info: {room.hide_vote_info}")
     await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def chat_message(sid, data):
     """Player sends a chat message to their team"""
     room_id = data.get('room_id')
@@ -309,39 +419,33 @@ async def chat_message(sid, data):
     if not room:
         return
 
-    # Check permissions
-    if game_manager.can_chat(room_id, sid):
-        # Find which team the player belongs to
-        target_team = None
-        player_name = "Unknown"
-        for team in room.teams.values():
-            if sid in team.players:
-                target_team = team
-                player_name = team.players[sid].name
-                break
-        
-        if target_team:
-            # Emit ONLY to team members
-            for member_sid in target_team.players.keys():
-                await sio.emit('chat_message', {
-                    'sender': player_name,
-                    'text': message,
-                    'is_me': member_sid == sid
-                }, room=member_sid)
+    team, chat = await room_actors.call(room_id, game_manager.post_chat, room_id, sid, message)
+    if team:
+        # One emit to the team's sub-rooms; clients flag their own messages via sender_sid
+        await sio.emit('chat_message', chat, room=team_rooms(room_id, team.id))
     else:
         await sio.emit('error', {'message': 'Chat is disabled for your team.'}, to=sid)
 
 @sio.event
+async def get_chat_history(sid, data):
+    """Recent messages of the requester's team (late joiners, reconnects)"""
+    room, team, _ = game_manager.locate(sid)
+    if team is not None and room.id == data.get('room_id'):
+        await sio.emit('chat_history', {'messages': list(team.chat_history)}, to=sid)
+
+@sio.event
+@busy_guard
 async def set_logic_mode(sid, data):
     """Operator sets the logic mode ('predict' or 'open')"""
     room_id = data.get('room_id')
     mode = data.get('mode')
     
-    room = game_manager.set_logic_mode(room_id, mode)
+    room = await room_actors.call(room_id, game_manager.set_logic_mode, room_id, mode)
     if room:
         await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def set_max_players(sid, data):
     """Operator sets the maximum members allowed per team"""
     room_id = data.get('room_id')
@@ -349,11 +453,12 @@ async def set_max_players(sid, data):
     
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
-        success = game_manager.set_max_players(room_id, count)
+        success = await room_actors.call(room_id, game_manager.set_max_players, room_id, count)
         if success:
             await broadcast_room_state(room_id)
 
 @sio.event
+@busy_guard
 async def set_not_lockout(sid, data):
     """Operator sets the NOT gate lockout time"""
     room_id = data.get('room_id')
@@ -361,8 +466,7 @@ async def set_not_lockout(sid, data):
     
     room = game_manager.rooms.get(room_id)
     if room and room.operator_sid == sid:
-        success = game_manager.set_not_lockout_time(room_id, seconds)
-        if success:
+        if await room_actors.call(room_id, not_lockout_command, room_id, seconds):
             await broadcast_room_state(room_id)
 
 # ===================== SURVEY EVENTS =====================
@@ -383,20 +487,32 @@ async def submit_survey(sid, data):
     await sio.emit('survey_submitted', {'success': success}, to=sid)
 
 @sio.event
+@busy_guard
 async def upload_card_image(sid, data):
-    """Player uploads custom card image"""
+    """Operator uploads custom card image"""
     room_id = data.get('room_id')
     card_type = data.get('card_type')  # '0' or '1'
     image_data = data.get('image_data')  # base64 string
     
     room = game_manager.rooms.get(room_id)
-    if room:
-        if card_type == '0':
-            room.custom_card_0 = image_data
-        elif card_type == '1':
-            room.custom_card_1 = image_data
+    if room and room.operator_sid == sid and image_data and card_type in ('0', '1'):
+        try:
+            await room_actors.call(room_id, set_card_image, room_id, card_type, image_data)
+        except ValueError as e:
+            await sio.emit('error', {'message': f'Invalid card image: {e}'}, to=sid)
+            return
         await broadcast_room_state(room_id)
 
+def set_card_image(room_id, card_type, image_data):
+    """Store the image for the room and show it on the card (one step in the room's queue)"""
+    room = game_manager.rooms.get(room_id)
+    if room is None:
+        return
+    # Only the content hash goes into the room (and game_state); bytes are served by /card-images
+    digest = card_image_store.put(image_data, room_id)
+    game_manager.set_custom_card(room_id, card_type, digest)
+    card_image_store.attach(room_id, room_images(room))
+
 @sio.event
 async def voice_input(sid, data):
     """
@@ -408,12 +524,8 @@ async def voice_input(sid, data):
     is_auto_narration = data.get('isAutoNarration', False)
     
     # Check if player has accessibility enabled
-    player_has_access = False
-    for room in game_manager.rooms.values():
-        for team in room.teams.values():
-            if sid in team.players:
-                player_has_access = team.players[sid].accessibility_enabled
-                break
+    _, _, player = game_manager.locate(sid)
+    player_has_access = player.accessibility_enabled if player else False
     
     # Skip auto-narration for players without accessibility enabled
     if is_auto_narration and not player_has_access:
@@ -421,12 +533,17 @@ async def voice_input(sid, data):
     
     # Process with Agent
     context = data.get('context')
-    result = await accessibility.process_command(sid, audio_bytes=audio_data, text_input=text_input, context=context)
+    # Clients asking for it get the audio streamed after the text (needs the TTS in this process)
+    audio_stream = next(speech_streams) if data.get('stream') and voice_pool is None else None
+    result = await accessibility.process_command(sid, audio_bytes=audio_data, text_input=text_input, context=context,
+                                                 audio_stream=audio_stream)
     
     if result:
         # Emit response back to client
-        # result has { text, audio, client_actions }
-        await sio.emit('voice_response', result, to=sid)
+        # result has { text, audio, client_actions, audio_stream }
+        await emit_to(sid, 'voice_response', result)
+        if audio_stream is not None:
+            asyncio.create_task(stream_speech(sid, 'voice_audio', audio_stream, accessibility.tts_stream(result['text'])))
         
         # If there are client actions (e.g. fill form), emit them separately or as part of response
         # The client needs to handle 'voice_response' and look for actions
@@ -437,65 +554,189 @@ async def voice_input(sid, data):
                 await sio.emit('agent_action_client', action, to=sid)
         
         # Broadcast room state if player made a state-changing action (vote, etc)
-        for room in game_manager.rooms.values():
-            for team in room.teams.values():
-                if sid in team.players:
-                    await broadcast_room_state(room.id)
-                    break
+        room, team, _ = game_manager.locate(sid)
+        if team is not None:
+            await broadcast_room_state(room.id)
+    else:
+        await emit_to(sid, 'voice_response', {'text': 'No se detectó audio o comando no reconocido.', 'audio': None})
+
+async def broadcast_room_state(room_id, joined_sid=None, urgent=False):
+    """
+    Queue a game_state update for the room. Updates are coalesced per room (see broadcast_scheduler);
+    joins and urgent events (round result / end) are flushed immediately.
+    """
+    if joined_sid or urgent:
+        await broadcast_scheduler.flush_now(room_id, joined_sid=joined_sid)
     else:
-        await sio.emit('voice_response', {'text': 'No se detectó audio o comando no reconocido.', 'audio': None}, to=sid)
+        broadcast_scheduler.mark_dirty(room_id)
 
-async def broadcast_room_state(room_id):
+async def _flush_room_state(room_id, joined_sid=None):
+    room = game_manager.rooms.get(room_id)
+    if not room:
+        broadcast_scheduler.forget(room_id)  # Closed before its update went out: keep nothing for it
+        return
+    async with broadcast_locks[room_id]:
+        # Only what changed since the last broadcast goes out (full state the first time),
+        # one projection per view, each built once and sent to that view's sub-room
+        updates = state_tracker.next_updates(room)
+        if joined_sid:
+            # A new client starts from a full snapshot, queued before any later delta
+            view = await enter_view_room(room, joined_sid)
+            await emit_to(joined_sid, 'game_state', state_tracker.snapshot(room, view))
+        for view, kind, payload in updates:
+            event = 'game_state' if kind == 'full' else 'game_state_delta'
+            target = view_room(room_id, view)
+            await sio.emit(event, payload, room=target, skip_sid=joined_sid)
+            if wire_formats.binary_sids or (remote_sockets and wire_formats.enabled):
+                # Packed once per view, shared by every binary client of that view (on any worker)
+                await sio.emit(event, wire.pack(payload), room=target + wire.BINARY_ROOM_SUFFIX, skip_sid=joined_sid)
+        if updates:
+            await room_store.save(room)
+
+async def load_room(room_id):
+    """Adopt a room saved in the room store if this worker isn't serving it yet"""
+    if not room_id or room_id in game_manager.rooms:
+        return
+    room = await room_store.load(room_id)
+    if room is not None and resume_room(room, await room_store.load_card_images(room_id)):
+        print(f"[ROOMS] Loaded room {room_id} from the room store")
+
+def resume_room(room, card_images=None):
+    """Serve a room that was running elsewhere: index its seats, take its card images, re-arm its deadlines"""
+    if not game_manager.adopt_room(room):
+        return False
+    missing = card_image_store.adopt(room.id, room_images(room), card_images or {})
+    for card_type, digest in zip(('0', '1'), room_images(room)):
+        if digest in missing:
+            game_manager.set_custom_card(room.id, card_type, None)  # Bytes lost: back to the default card
+    if room.state == 'PLAYING':
+        schedule_round_deadlines(room)
+    return True
+
+async def release_room(room_id):
+    """Hand a room over to another process: returns it encoded with its card images (None if not here) and stops serving it"""
+    if room_id not in game_manager.rooms:
+        return None
+    return await room_actors.run(room_id, release_command, room_id)  # After whatever is queued for it
+
+async def accept_room(data):
+    """Counterpart of release_room in the receiving process"""
+    released = wire.unpack(data)
+    room = decode_room(released['room'])
+    card_images = {digest: tuple(blob) for digest, blob in released['card_images'].items()}
+    if not await room_actors.run(room.id, resume_room, room, card_images):
+        return False
+    await room_store.save(room)
+    return True
+
+# --- Room commands: each runs on its room's queue (room_actors) as one step
+
+async def join_command(sid, room_id, name, role, team_id, avatar):
+    await load_room(room_id)  # A room another worker (or a restart) left in the room store
+    return game_manager.join_room(sid, room_id, name, role, team_id, avatar)
+
+def start_round_command(room_id, duration):
+    room = game_manager.start_round(room_id, duration)
+    if room is not None:
+        schedule_round_deadlines(room)  # Replaces the deadlines of a round that was already running
+    return room
+
+def reset_game_command(room_id):
+    game_manager.reset_game(room_id)
+    round_timers.cancel(room_id)
+
+def not_lockout_command(room_id, seconds):
+    if not game_manager.set_not_lockout_time(room_id, seconds):
+        return False
+    reschedule_not_lockout(game_manager.rooms[room_id])
+    return True
+
+async def release_command(room_id):
+    room = game_manager.rooms.get(room_id)
+    if room is None:
+        return None
+    async with broadcast_locks[room_id]:  # Let an in-flight broadcast finish first
+        # The card images go along: forget_room drops them here
+        data = wire.pack({'room': encode_room(room), 'card_images': card_image_store.export(room_images(room))})
+        game_manager.close_room(room_id, notify=False)
+    forget_room(room_id)
+    await room_store.delete(room_id)
+    return data
+
+def team_rooms(room_id, team_id):
+    """Every client seated in a team: the team view's sub-room and its msgpack twin"""
+    team_room = view_room(room_id, team_view(team_id))
+    return [team_room, team_room + wire.BINARY_ROOM_SUFFIX]
+
+async def emit_to(sid, event, payload):
+    """Emit to one client in the format it asked for"""
+    await sio.emit(event, wire_formats.encode_for(sid, event, payload), to=sid)
+
+def narrate(room_id, segments_for, team=None):
+    """Say a round update to the room's players with narration on (only `team`'s if given).
+    segments_for(room, team, player) is evaluated now; the audio goes out in the background."""
+    room = game_manager.rooms.get(room_id)
+    if room is None:
+        return
+    narrations = [(player.sid, segments_for(room, listeners, player))
+                  for listeners in room.teams.values() if team is None or listeners is team
+                  for player in listeners.players.values() if player.accessibility_enabled]
+    if narrations:
+        asyncio.create_task(send_narrations(narrations))
+
+def narrate_not_gate(room_id, target_sid):
+    """A NOT was applied: alert the target's team (not when it was removed)"""
+    room, team, target = game_manager.locate(target_sid)
+    if target is not None and target.has_not_gate and room.id == room_id:
+        narrate(room_id, lambda room, team, player: not_alert_segments(target, player), team)
+
+async def send_narrations(narrations):
+    payloads = {}  # Teammates often hear the same thing: joined and encoded once
+    for sid, segments in narrations:
+        key = tuple(segments)
+        if key not in payloads:
+            try:
+                text, audio = await narrator.render(segments)
+            except Exception as e:
+                print(f"[NARRATION] Could not render: {e}")
+                return
+            payloads[key] = {'text': text, 'audio': base64.b64encode(audio).decode('utf-8')}
+        await emit_to(sid, 'voice_response', payloads[key])
+
+async def stream_speech(sid, event, stream_id, chunks):
+    """Forward TTS audio as the engine produces it: binary events {id, seq, data}, then {id, seq, end}"""
+    seq = 0
+    try:
+        async for chunk in chunks:
+            await sio.emit(event, {'id': stream_id, 'seq': seq, 'data': chunk}, to=sid)
+            seq += 1
+    except Exception as e:
+        print(f"[TTS] Stream {stream_id} failed: {e}")
+    await sio.emit(event, {'id': stream_id, 'seq': seq, 'end': True}, to=sid)
+
+async def enter_view_room(room, sid):
+    """Put a client in the sub-room of the view matching its seat (leaving any other view of the room)"""
+    _, team, _ = game_manager.locate(sid)
+    view = state_tracker.view_for(room, team, sid)
+    target = view_room(room.id, view)
+    if wire_formats.is_binary(sid):
+        target += wire.BINARY_ROOM_SUFFIX
+    prefix = view_room(room.id, '')
+    for joined in sio.rooms(sid):
+        if joined.startswith(prefix) and joined != target:
+            await sio.leave_room(sid, joined)
+    await sio.enter_room(sid, target)
+    return view
+
+async def send_full_state(room_id, sid):
     room = game_manager.rooms.get(room_id)
     if room:
-        # Serialize room state
-        state = {
-            'id': room.id,
-            'state': room.state,
-            'timer': max(0, room.current_round_end_time - time.time()) if room.state == 'PLAYING' else 0,
-            'difficulty': room.difficulty,
-            'game_mode': room.game_mode,
-            'round_number': room.round_number,
-            'custom_card_0': room.custom_card_0,
-            'custom_card_1': room.custom_card_1,
-            'logic_mode': room.logic_mode,
-            'max_players_per_team': room.max_players_per_team,
-            'not_lockout_time': room.not_lockout_time,
-            'hide_vote_info': getattr(room, 'hide_vote_info', False),
-            'target_gate': room.target_gate,
-            'target_gates': room.target_gates,
-            'teams': {
-                tid: {
-                    'id': t.id,
-                    'name': t.name,
-                    'score': t.score,
-                    'solved_current_round': t.solved_current_round,
-                    'last_round_result': t.last_round_result,
-                    'not_gates_used': t.not_gates_used,
-                    'was_sabotaged': t.was_sabotaged,
-                    'round_stats': {
-                        'base': t.last_round_base,
-                        'bonus': t.last_round_bonus,
-                        'penalty': t.last_round_penalty
-                    },
-                    'current_gate': t.current_gate,
-                    'chat_enabled': t.chat_enabled,
-                    'players': {
-                        pid: {
-                            'sid': pid,
-                            'name': p.name,
-                            'card_value': p.card_value,
-                            'vote_value': p.vote_value,
-                            'has_not_gate': p.has_not_gate,
-                            'avatar': p.avatar,
-                            'accessibility_enabled': p.accessibility_enabled
-                        } for pid, p in t.players.items()
-                    }
-                } for tid, t in room.teams.items()
-            },
-            'operator': room.operator_sid
-        }
-        await sio.emit('game_state', state, room=room_id)
+        async with broadcast_locks[room_id]:
+            view = await enter_view_room(room, sid)
+            await emit_to(sid, 'game_state', state_tracker.snapshot(room, view))
+
+# At most one game_state flush per room per window (BROADCAST_WINDOW_MS, default 40ms)
+broadcast_scheduler = BroadcastScheduler(_flush_room_state, float(os.getenv('BROADCAST_WINDOW_MS', '40')) / 1000)
 
 async def terminal_reader():
     """Reads commands from stdin to allow the hacker to control the game"""
@@ -522,7 +763,7 @@ async def terminal_reader():
             team_id = parts[3]
             team_name = parts[4] if len(parts) > 4 else f"Team {team_id}"
             
-            success = game_manager.add_team(room_id, team_id, team_name)
+            success = await room_actors.run(room_id, game_manager.add_team, room_id, team_id, team_name)
             if success:
                 print(f"SUCCESS: Team {team_id} ({team_name}) added to {room_id}")
                 await broadcast_room_state(room_id)
@@ -533,7 +774,7 @@ async def terminal_reader():
             room_id = parts[2]
             try:
                 count = int(parts[3])
-                success = game_manager.set_max_players(room_id, count)
+                success = await room_actors.run(room_id, game_manager.set_max_players, room_id, count)
                 if success:
                     print(f"SUCCESS: Max players set to {count} for {room_id}")
                     await broadcast_room_state(room_id)
@@ -546,7 +787,7 @@ async def terminal_reader():
             room_id = parts[2]
             try:
                 seconds = int(parts[3])
-                success = game_manager.set_not_lockout_time(room_id, seconds)
+                success = await room_actors.run(room_id, not_lockout_command, room_id, seconds)
                 if success:
                     print(f"SUCCESS: NOT lockout set to {seconds} for {room_id}")
                     await broadcast_room_state(room_id)
@@ -587,10 +828,24 @@ async def assistant_chat(sid, data):
     text_input = data.get('text')
     
     print(f"[ASSISTANT] Processing chat for {sid} with character {character}")
-    result = await assistant.process_chat(sid, character, audio_bytes=audio_data, text_input=text_input)
+    if voice_pool is not None:
+        try:
+            # Same worker for the whole conversation: it holds the agent's memory
+            result = await voice_pool.submit('assistant_chat', sid, character, assistant.characters.get(character),
+                                             audio_data, text_input, key=f"{sid}_{character}")
+        except Exception as e:
+            print(f"[ASSISTANT ERROR] {e}")
+            result = {"text": "Hubo un error en mi sistema de comunicación.", "audio": None}
+    else:
+        audio_stream = next(speech_streams) if data.get('stream') else None
+        result = await assistant.process_chat(sid, character, audio_bytes=audio_data, text_input=text_input,
+                                              audio_stream=audio_stream)
     
     if result:
-        await sio.emit('assistant_response', result, to=sid)
+        await emit_to(sid, 'assistant_response', result)
+        if result.get('audio_stream') is not None:
+            asyncio.create_task(stream_speech(sid, 'assistant_audio', result['audio_stream'],
+                                              assistant.tts_stream(result['text'], character)))
 
 @sio.event
 async def add_assistant_character(sid, data):
@@ -664,39 +919,95 @@ async def edit_assistant_character(sid, data):
 @app.on_event("startup")
 async def startup_event():
     global accessibility, assistant
-    accessibility = AccessibilityManager(game_manager, sio)
+    accessibility = AccessibilityManager(game_manager, sio, broadcast_room_state, room_actors)
     assistant = AssistantManager(sio)
     print("✅ AccessibilityManager & AssistantManager initialized")
+    if voice_pool is not None:
+        voice_pool.start()
+        accessibility.voice_pool = voice_pool
+    accessibility.narrate_not_gate = narrate_not_gate
+    accessibility.announce_solved = announce_solved
+    asyncio.create_task(narrator.prerender())
+    if event_log is not None:
+        event_log.start()
+    if snapshots is not None:
+        for room in snapshots.restore():
+            resume_room(room, snapshots.card_images(room))  # Running rounds get their deadlines back
+        asyncio.create_task(snapshots.run(game_manager.rooms))
     asyncio.create_task(terminal_reader())
+    asyncio.create_task(room_sweeper())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if snapshots is not None:
+        await snapshots.save(game_manager.rooms)
+    if event_log is not None:
+        await event_log.close()
+    await room_store.close()
+    if voice_pool is not None:
+        await voice_pool.close()
+
+def schedule_round_deadlines(room):
+    """Arm the round end and (unless it already passed) the NOT lockout of a running round"""
+    remaining = room.current_round_end_time - time.time()
+    round_timers.schedule(room.id, ROUND_END, remaining)
+    if not room.not_gates_locked:
+        round_timers.schedule(room.id, NOT_LOCKOUT, remaining - room.not_lockout_time)
+
+def reschedule_not_lockout(room):
+    """Lockout time changed mid-round: move the lockout relative to the pending round end"""
+    remaining = round_timers.remaining(room.id, ROUND_END)
+    if remaining is None:
+        return
+    round_timers.schedule(room.id, NOT_LOCKOUT, remaining - room.not_lockout_time)
 
-async def game_timer(room_id):
-    room = game_manager.rooms.get(room_id)
-    while room and room.state == "PLAYING":
-        remaining = room.current_round_end_time - time.time()
-        if remaining <= 0:
-            # Final logic evaluation before ending
-            game_manager.check_logic(room_id)
-            
-            # Apply deferred scores
-            game_manager.finalize_round_scores(room_id)
-            
-            room.state = "FINISHED"
-            
-            # Reset for next round (but keep solved_current_round to show results)
-            for team in room.teams.values():
-                # DON'T reset solved_current_round yet - needed to show green results
-                team.not_gates_used = 0
-                for player in team.players.values():
-                    # Preserve values for the results screen
-                    pass
-            
-            await sio.emit('round_end', {'message': 'Time up!'}, room=room_id)
-            await broadcast_room_state(room_id)
-            break
-        
-        # Broadcast timer update every second for frontend to track countdown
-        await broadcast_room_state(room_id)
-        await asyncio.sleep(1)
+async def on_round_deadline(room_id, kind):
+    # Clients count down from round_end_time themselves, so neither deadline is broadcast ahead of time
+    if kind == NOT_LOCKOUT:
+        await room_actors.run(room_id, game_manager.lock_not_gates, room_id)
+        return
+    if await room_actors.run(room_id, game_manager.end_round, room_id):
+        await sio.emit('round_end', {'message': 'Time up!'}, room=room_id)
+        await broadcast_room_state(room_id, urgent=True)
+        narrate(room_id, round_end_segments)
+
+round_timers = RoundTimers(on_round_deadline)
+
+ROOM_SWEEP_SECONDS = 60
+
+def forget_room(room_id):
+    """Drop what this process keeps for a room besides the room itself"""
+    state_tracker.forget(room_id)
+    broadcast_scheduler.forget(room_id)
+    round_timers.cancel(room_id)
+    room_actors.forget(room_id)
+    broadcast_locks.pop(room_id, None)
+    card_image_store.release(room_id)
+
+def on_room_closed(room_id, sids):
+    """GameManager evicted a room: drop everything kept for it and tell whoever was still seated"""
+    forget_room(room_id)
+    # On the room's queue, so a join arriving after the close can't load the stale copy back
+    room_actors.post(room_id, room_store.delete, room_id)
+    if sids:
+        asyncio.get_running_loop().create_task(close_room_sockets(room_id, sids))
+
+async def close_room_sockets(room_id, sids):
+    prefix = view_room(room_id, '')
+    for sid in sids:
+        await sio.emit('room_closed', {'message': 'The room was closed for inactivity'}, to=sid)
+        for joined in sio.rooms(sid):
+            if joined == room_id or joined.startswith(prefix):
+                await sio.leave_room(sid, joined)
+
+async def room_sweeper():
+    # Evicts empty and idle rooms (TTLs in game_manager); create_room also evicts when at MAX_ROOMS.
+    # Rooms with commands queued or running are left for the next sweep (game_manager.is_busy).
+    while True:
+        await asyncio.sleep(ROOM_SWEEP_SECONDS)
+        game_manager.evict_idle()
+
+game_manager.on_room_closed = on_room_closed
 
 if __name__ == "__main__":
     import uvicorn
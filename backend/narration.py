@@ -0,0 +1,124 @@
+"""
+Narration - Spoken round updates for players with accessibility on
+
+Round start / end and NOT alerts are said with a small vocabulary: fixed
+phrases, gate names, numbers, team and player names. Each narration is a list
+of segments; the audio of every segment is rendered once per voice and a
+player's narration is those clips joined in memory (MP3 frames concatenate),
+so narrating to many players at once costs no TTS calls.
+
+The fixed vocabulary is pre-rendered at startup; names and large numbers are
+rendered the first time they are said (through tts_cache, so only once).
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from game_manager import DEFAULT_TEAMS, VALID_GATES, Player, Room, Team
+from speech import collect, edge_chunks
+from tts_cache import TTSCache, tts_cache
+
+NARRATION_VOICE = os.getenv('NARRATION_VOICE', 'es-ES-AlvaroNeural')
+PRERENDERED_NUMBERS = 30  # 0..30: round numbers and usual scores
+PRERENDER_CONCURRENCY = 4
+
+ROUND = "Ronda"
+ROUND_STARTED = "iniciada. Tu puerta es"
+YOUR_CARD = "Tu carta tiene valor"
+TEAMMATES = "Tus compañeros:"
+HAS_CARD = "tiene carta"
+ROUND_WON = "¡Éxito! Tu equipo ha ganado esta ronda."
+ROUND_LOST = "Ronda fallida. Tu equipo no logró el objetivo."
+SCORE = "Puntuación actual:"
+POINTS = "puntos."
+TEAM = "El equipo"
+WON_WITH = "ganó con"
+LOST_WITH = "perdió con"
+YOU_GOT_NOT = "¡Alerta! Tu carta ha sido invertida por una puerta NOT de un rival."
+TEAMMATE = "Tu compañero"
+GOT_NOT = "ha sido saboteado con una puerta NOT."
+
+PHRASES = [ROUND, ROUND_STARTED, YOUR_CARD, TEAMMATES, HAS_CARD, ROUND_WON, ROUND_LOST, SCORE, POINTS,
+           TEAM, WON_WITH, LOST_WITH, YOU_GOT_NOT, TEAMMATE, GOT_NOT]
+
+def say_number(value) -> str:
+    if value is None:
+        return "0"
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:g}".replace('.', ',')
+
+# --- What is said (segments), per listener
+
+def round_start_segments(room: Room, team: Team, player: Player) -> List[str]:
+    segments = [ROUND, say_number(room.round_number), ROUND_STARTED, f"{team.current_gate}.",
+                YOUR_CARD, f"{say_number(player.card_value)}."]
+    teammates = [p for p in team.players.values() if p.sid != player.sid]
+    if teammates:
+        segments.append(TEAMMATES)
+        for mate in teammates:
+            segments += [mate.name, HAS_CARD, f"{say_number(mate.card_value)}."]
+    return segments
+
+def round_end_segments(room: Room, team: Team, player: Player) -> List[str]:
+    segments = [ROUND_WON if team.last_round_result == 'success' else ROUND_LOST,
+                SCORE, say_number(team.score), POINTS]
+    for rival in room.teams.values():
+        if rival is not team and rival.players:
+            segments += [TEAM, rival.name, WON_WITH if rival.last_round_result == 'success' else LOST_WITH,
+                         say_number(rival.score), POINTS]
+    return segments
+
+def not_alert_segments(target: Player, player: Player) -> List[str]:
+    if target.sid == player.sid:
+        return [YOU_GOT_NOT]
+    return [TEAMMATE, target.name, GOT_NOT]
+
+class Narrator:
+    def __init__(self, voice: str = NARRATION_VOICE, synthesize: Optional[Callable[[str], Awaitable[bytes]]] = None,
+                 cache: TTSCache = tts_cache):
+        self.voice = voice
+        self.synthesize = synthesize or (lambda text: collect(edge_chunks(text, voice)))
+        self.cache = cache
+        self.clips: Dict[str, bytes] = {}  # Pre-rendered vocabulary: segment -> audio
+        self.narrations = 0
+
+    def vocabulary(self) -> List[str]:
+        numbers = [str(n) for n in range(PRERENDERED_NUMBERS + 1)]
+        return PHRASES + [f"{gate}." for gate in VALID_GATES] + numbers + ["0.", "1."] + [name for _, name in DEFAULT_TEAMS]
+
+    async def prerender(self):
+        """Render the fixed vocabulary (failures are retried when the segment is first said)"""
+        limit = asyncio.Semaphore(PRERENDER_CONCURRENCY)
+        errors = []
+
+        async def render(segment):
+            async with limit:
+                try:
+                    audio = await self.clip(segment)
+                except Exception as e:
+                    errors.append(e)
+                    return
+                if audio:
+                    self.clips[segment] = audio
+
+        vocabulary = self.vocabulary()
+        await asyncio.gather(*(render(segment) for segment in vocabulary))
+        print(f"[NARRATION] {len(self.clips)}/{len(vocabulary)} clips ready for {self.voice}"
+              + (f" (first error: {errors[0]})" if errors else ""))
+
+    async def clip(self, segment: str) -> bytes:
+        audio = self.clips.get(segment)
+        if audio is None:
+            audio = await self.cache.get('edge', self.voice, segment, lambda: self.synthesize(segment))
+        return audio
+
+    async def render(self, segments: List[str]) -> Tuple[str, bytes]:
+        """(text, audio) of a narration"""
+        clips = self.clips
+        if all(segment in clips for segment in segments):
+            audio = [clips[segment] for segment in segments]
+        else:
+            audio = await asyncio.gather(*(self.clip(segment) for segment in segments))
+        self.narrations += 1
+        return ' '.join(segments), b''.join(audio)
@@ -0,0 +1,162 @@
+"""
+Room Actors - One ordered command queue per room
+
+Every change to a room goes through the room's queue as a command (a plain
+or async function) and is run by the room's worker task, one command at a
+time, in arrival order. Whoever submitted it awaits the command's result (or
+its exception). Socket handlers, round deadlines and voice tools therefore
+can't interleave inside a compound change (vote + logic check, load + join),
+and nothing mutates a room off the event loop.
+
+Queues are bounded (ROOM_QUEUE_SIZE): when a room's queue is full, call()
+raises RoomBusy right away, so a flooded room pushes back on its own clients
+without holding up other rooms. run() is the unbounded variant for work the
+server itself must not drop (deadlines, disconnects, room handovers).
+
+A command must not wait on its own room's queue (that would deadlock): it
+calls GameManager directly.
+
+A room's worker stops once its queue drains and the room doesn't exist (a
+command for an unknown room id, or a room that was closed), so queues never
+outlive their rooms. idle() tells whether a room can be closed outside its
+queue right now: nothing is queued or running for it.
+"""
+import asyncio
+import inspect
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+ROOM_QUEUE_SIZE = int(os.getenv('ROOM_QUEUE_SIZE', '256'))
+
+class RoomBusy(Exception):
+    """The room's command queue is full"""
+
+class RoomActor:
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.pending: Deque[Tuple[Callable, tuple, asyncio.Future, float]] = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.running = False
+        self.worker: Optional[asyncio.Task] = None
+        # Metrics
+        self.served = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.wait_total = 0.0  # Seconds commands spent queued
+        self.service_total = 0.0  # Seconds commands spent running
+        self.service_max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.served or 1
+        return {
+            'depth': len(self.pending),
+            'max_depth': self.max_depth,
+            'served': self.served,
+            'rejected': self.rejected,
+            'mean_wait_ms': round(self.wait_total / served * 1000, 3),
+            'mean_service_ms': round(self.service_total / served * 1000, 3),
+            'max_service_ms': round(self.service_max * 1000, 3),
+        }
+
+class RoomActors:
+    def __init__(self, queue_size: int = ROOM_QUEUE_SIZE, exists: Optional[Callable[[str], bool]] = None):
+        self.queue_size = queue_size
+        self.exists = exists  # exists(room_id): False once a room is gone (None: keep workers until forget)
+        self.actors: Dict[str, RoomActor] = {}
+        self.retiring: Dict[str, asyncio.Task] = {}  # Workers of forgotten rooms still finishing their queue
+
+    async def call(self, room_id: str, command: Callable, *args) -> Any:
+        """Run command(*args) in the room's order and return its result. RoomBusy if the queue is full."""
+        return await self._submit(room_id, command, args, bounded=True)
+
+    async def run(self, room_id: str, command: Callable, *args) -> Any:
+        """Like call, but never rejected (server-side work)"""
+        return await self._submit(room_id, command, args, bounded=False)
+
+    def post(self, room_id: str, command: Callable, *args) -> asyncio.Future:
+        """Like run, from synchronous code: queued before this returns, the future holds the result"""
+        return self._submit(room_id, command, args, bounded=False)
+
+    def depth(self, room_id: str) -> int:
+        actor = self.actors.get(room_id)
+        return len(actor.pending) if actor else 0
+
+    def idle(self, room_id: str) -> bool:
+        """Nothing queued or running for the room"""
+        if room_id in self.retiring:
+            return False
+        actor = self.actors.get(room_id)
+        return actor is None or not (actor.pending or actor.running)
+
+    def forget(self, room_id: str):
+        """The room is gone: its worker finishes what is queued, then stops"""
+        actor = self.actors.pop(room_id, None)
+        if actor is not None:
+            actor.closed = True
+            actor.ready.set()
+            if actor.worker is not None:
+                self.retiring[room_id] = actor.worker
+                actor.worker.add_done_callback(lambda task: self._retired(room_id, task))
+
+    def _retired(self, room_id: str, task: asyncio.Task):
+        if self.retiring.get(room_id) is task:
+            del self.retiring[room_id]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {room_id: actor.stats() for room_id, actor in self.actors.items()}
+
+    def _submit(self, room_id: str, command: Callable, args: tuple, bounded: bool) -> asyncio.Future:
+        actor = self.actors.get(room_id)
+        if actor is None:
+            actor = self.actors[room_id] = RoomActor(room_id)
+        if bounded and len(actor.pending) >= self.queue_size:
+            actor.rejected += 1
+            raise RoomBusy(room_id)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        actor.pending.append((command, args, future, time.perf_counter()))
+        actor.max_depth = max(actor.max_depth, len(actor.pending))
+        if actor.worker is None:
+            # A room re-created right after it was forgotten starts once the old queue is done
+            actor.worker = loop.create_task(self._serve(actor, self.retiring.get(room_id)))
+        actor.ready.set()
+        return future
+
+    async def _serve(self, actor: RoomActor, previous: Optional[asyncio.Task] = None):
+        if previous is not None:
+            await asyncio.wait([previous])
+        pending = actor.pending
+        while True:
+            if not pending:
+                if actor.closed:
+                    return
+                if self.exists is not None and not self.exists(actor.room_id):
+                    if self.actors.get(actor.room_id) is actor:
+                        del self.actors[actor.room_id]
+                    return
+                actor.ready.clear()
+                await actor.ready.wait()
+                continue
+            command, args, future, queued_at = pending.popleft()
+            started = time.perf_counter()
+            actor.running = True
+            try:
+                result = command(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                actor.running = False
+            finished = time.perf_counter()
+            actor.served += 1
+            actor.wait_total += started - queued_at
+            actor.service_total += finished - started
+            actor.service_max = max(actor.service_max, finished - started)
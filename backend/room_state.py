@@ -0,0 +1,298 @@
+"""
+Room State - Serializes a Room into the `game_state` payload sent to clients
+(caching sections that did not change), and tracks versions so broadcasts can
+go out as compact deltas.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from game_manager import Room, Team
+
+def serialize_team(team: Team) -> dict:
+    """Build one team's section of the game_state dict"""
+    return {
+        'id': team.id,
+        'name': team.name,
+        'score': team.score,
+        'solved_current_round': team.solved_current_round,
+        'last_round_result': team.last_round_result,
+        'not_gates_used': team.not_gates_used,
+        'was_sabotaged': team.was_sabotaged,
+        'round_stats': {
+            'base': team.last_round_base,
+            'bonus': team.last_round_bonus,
+            'penalty': team.last_round_penalty
+        },
+        'current_gate': team.current_gate,
+        'chat_enabled': team.chat_enabled,
+        'players': {
+            pid: {
+                'sid': pid,
+                'name': p.name,
+                'card_value': p.card_value,
+                'vote_value': p.vote_value,
+                'has_not_gate': p.has_not_gate,
+                'avatar': p.avatar,
+                'accessibility_enabled': p.accessibility_enabled
+            } for pid, p in team.players.items()
+        }
+    }
+
+def _serialize_header(room: Room) -> dict:
+    # 'teams' is a placeholder (keeps the key order), filled per call
+    return {
+        'id': room.id,
+        'state': room.state,
+        # Server epoch seconds; clients count down locally using their clock_sync offset
+        'round_end_time': room.current_round_end_time if room.state == 'PLAYING' else 0,
+        'difficulty': room.difficulty,
+        'game_mode': room.game_mode,
+        'round_number': room.round_number,
+        'custom_card_0': room.custom_card_0,
+        'custom_card_1': room.custom_card_1,
+        'logic_mode': room.logic_mode,
+        'max_players_per_team': room.max_players_per_team,
+        'not_lockout_time': room.not_lockout_time,
+        'hide_vote_info': getattr(room, 'hide_vote_info', False),
+        'target_gate': room.target_gate,
+        'target_gates': room.target_gates,
+        'teams': None,
+        'operator': room.operator_sid
+    }
+
+def serialize_room(room: Room) -> dict:
+    """Build the full game_state dict for a room from scratch (no caching)"""
+    state = _serialize_header(room)
+    state['teams'] = {tid: serialize_team(t) for tid, t in room.teams.items()}
+    return state
+
+class RoomSerializer:
+    """
+    Caches each room's game_state pieces and rebuilds only what changed since the last call:
+    the room header when Room._rev moved, a team section when that Team._rev moved.
+    Unchanged sections (and the teams dict itself) are returned as the same objects, so
+    callers must treat the result as read-only and can compare pieces with `is`.
+    """
+
+    def __init__(self):
+        self.headers: Dict[str, Tuple[int, dict]] = {}  # room_id -> (room rev, header)
+        self.sections: Dict[str, Dict[str, Tuple[Team, int, dict]]] = {}  # room_id -> tid -> (team, rev, section)
+        self.teams: Dict[str, dict] = {}  # room_id -> last teams dict handed out
+
+    def serialize(self, room: Room) -> dict:
+        cached_header = self.headers.get(room.id)
+        if cached_header is None or cached_header[0] != room._rev:
+            cached_header = self.headers[room.id] = (room._rev, _serialize_header(room))
+
+        sections = self.sections.setdefault(room.id, {})
+        previous = self.teams.get(room.id)
+        changed = previous is None or len(previous) != len(room.teams)
+        teams = {}
+        for tid, t in room.teams.items():
+            cached = sections.get(tid)
+            if cached is None or cached[0] is not t or cached[1] != t._rev:
+                cached = sections[tid] = (t, t._rev, serialize_team(t))
+                changed = True
+            teams[tid] = cached[2]
+        if not changed and teams.keys() == previous.keys():
+            teams = previous
+        else:
+            for tid in [tid for tid in sections if tid not in room.teams]:
+                del sections[tid]
+            self.teams[room.id] = teams
+
+        state = dict(cached_header[1])
+        state['teams'] = teams
+        return state
+
+    def forget(self, room_id: str):
+        self.headers.pop(room_id, None)
+        self.sections.pop(room_id, None)
+        self.teams.pop(room_id, None)
+
+# ---------------------------------------------------------------- Versioned deltas
+#
+# A delta lists only the keys that changed. When a key holds a dict in both the
+# old and new state the value is itself a delta (patched recursively); any other
+# value replaces the old one. Keys that disappeared are listed under DELETED.
+
+DELETED = '$del'
+
+def diff_states(old: dict, new: dict) -> dict:
+    """Changes that turn `old` into `new` (empty dict if nothing changed)"""
+    changes = {}
+    for key, value in new.items():
+        if key not in old:
+            changes[key] = value
+            continue
+        before = old[key]
+        if before is value or before == value:
+            continue  # C-level compare skips unchanged teams/players without recursing
+        if isinstance(before, dict) and isinstance(value, dict):
+            changes[key] = diff_states(before, value)
+        else:
+            changes[key] = value
+    deleted = [key for key in old if key not in new]
+    if deleted:
+        changes[DELETED] = deleted
+    return changes
+
+def apply_delta(state: dict, changes: dict) -> dict:
+    """Inverse of diff_states: returns a new dict, `state` is not modified"""
+    result = dict(state)
+    for key in changes.get(DELETED, ()):
+        result.pop(key, None)
+    for key, value in changes.items():
+        if key == DELETED:
+            continue
+        before = result.get(key)
+        if isinstance(before, dict) and isinstance(value, dict):
+            result[key] = apply_delta(before, value)
+        else:
+            result[key] = value
+    return result
+
+# ---------------------------------------------------------------- Projections
+#
+# Each client gets the view it renders: the operator sees everything, a team sees
+# its own section in full and rivals without cards/votes, spectators see every
+# team as a rival. Each view is emitted to its own Socket.IO sub-room.
+
+OPERATOR_VIEW = 'operator'
+SPECTATOR_VIEW = 'spectator'
+
+# What GameArena renders for a rival player (NOT sabotage buttons)
+RIVAL_PLAYER_FIELDS = ('sid', 'name', 'avatar', 'has_not_gate')
+
+def team_view(team_id: str) -> str:
+    return f"team:{team_id}"
+
+def view_room(room_id: str, view: str) -> str:
+    """Socket.IO sub-room receiving a view, e.g. 'demo-room:team:A'"""
+    return f"{room_id}:{view}"
+
+def rival_section(section: dict) -> dict:
+    """A team section as seen by other teams"""
+    return {
+        **section,
+        'players': {pid: {k: p[k] for k in RIVAL_PLAYER_FIELDS} for pid, p in section['players'].items()}
+    }
+
+class RoomStateTracker:
+    """
+    Remembers the last game_state sent to each view of a room and turns new states into versioned
+    deltas. All views of a room share room.state_version; a view that did not change just skips
+    that version, and its next delta's 'base' is the last version it actually received.
+    """
+
+    def __init__(self, serializer: Optional[RoomSerializer] = None):
+        self.serializer = serializer or RoomSerializer()
+        self.last_sent: Dict[str, Dict[str, dict]] = {}  # room_id -> view -> state
+        self.rivals: Dict[str, Dict[str, Tuple[dict, dict]]] = {}  # room_id -> tid -> (section, rival section)
+        self.projected: Dict[str, Dict[str, Tuple[dict, dict]]] = {}  # room_id -> view -> (teams, projected teams)
+        self.built_from: Dict[str, tuple] = {}  # room_id -> (room rev, (team, team rev)...) of the last build
+
+    def views(self, room: Room) -> List[str]:
+        return [OPERATOR_VIEW, SPECTATOR_VIEW] + [team_view(tid) for tid in room.teams]
+
+    def view_for(self, room: Room, team: Optional[Team], sid: str) -> str:
+        """Which view a client gets, from its seat (GameManager.locate)"""
+        if team is not None:
+            return team_view(team.id)
+        return OPERATOR_VIEW if room.operator_sid == sid else SPECTATOR_VIEW
+
+    def _rival(self, room_id: str, tid: str, section: dict) -> dict:
+        cache = self.rivals.setdefault(room_id, {})
+        cached = cache.get(tid)
+        if cached is None or cached[0] is not section:
+            cached = cache[tid] = (section, rival_section(section))
+        return cached[1]
+
+    def _project(self, room_id: str, state: dict, view: str) -> dict:
+        projected = dict(state)
+        if view == OPERATOR_VIEW:
+            return projected
+        # Built once per teams dict (i.e. per change), shared by every client of the view
+        cache = self.projected.setdefault(room_id, {})
+        cached = cache.get(view)
+        if cached is None or cached[0] is not state['teams']:
+            own = view[len('team:'):] if view.startswith('team:') else None
+            teams = {tid: section if tid == own else self._rival(room_id, tid, section)
+                     for tid, section in state['teams'].items()}
+            cached = cache[view] = (state['teams'], teams)
+        projected['teams'] = cached[1]
+        return projected
+
+    def next_updates(self, room: Room) -> List[Tuple[str, str, dict]]:
+        """
+        Returns (view, kind, payload) for every view that changed since its last broadcast:
+        kind 'full' (payload = state) the first time, 'delta' afterwards. Empty when nothing changed.
+        """
+        # Same revisions as the last build: nothing to serialize, project or diff
+        revs = (room._rev,) + tuple((t, t._rev) for t in room.teams.values())
+        sent = self.last_sent.setdefault(room.id, {})
+        if sent and self.built_from.get(room.id) == revs:
+            return []
+        self.built_from[room.id] = revs
+
+        state = self.serializer.serialize(room)
+        views = self.views(room)
+        changed = []
+        for view in views:
+            projected = self._project(room.id, state, view)
+            previous = sent.get(view)
+            if previous is None:
+                changed.append((view, projected, None))
+                continue
+            projected['version'] = previous['version']
+            changes = diff_states(previous, projected)
+            if changes:
+                changed.append((view, projected, changes))
+        if not changed:
+            return []
+
+        room.state_version += 1
+        updates = []
+        for view, projected, changes in changed:
+            projected['version'] = room.state_version
+            if changes is None:
+                updates.append((view, 'full', projected))
+            else:
+                updates.append((view, 'delta', {
+                    'room_id': room.id,
+                    'base': sent[view]['version'],
+                    'version': room.state_version,
+                    'changes': changes
+                }))
+            sent[view] = projected
+        if len(sent) > len(views):
+            self._drop_stale_views(room.id, views)
+        return updates
+
+    def snapshot(self, room: Room, view: str = OPERATOR_VIEW) -> dict:
+        """Full state of a view at the current version (for joins and resync requests)"""
+        sent = self.last_sent.get(room.id)
+        if not sent:
+            self.next_updates(room)  # Room never broadcast: nobody holds a version yet
+            sent = self.last_sent[room.id]
+        state = sent.get(view)
+        if state is None:
+            # View not broadcast yet (e.g. a team added since the last flush): project the last operator state
+            state = sent[view] = self._project(room.id, sent[OPERATOR_VIEW], view)
+        return state
+
+    def _drop_stale_views(self, room_id: str, views: List[str]):
+        """Forget views of teams that were removed"""
+        live = set(views)
+        for cache in (self.last_sent.get(room_id, {}), self.projected.get(room_id, {})):
+            for view in [view for view in cache if view not in live]:
+                del cache[view]
+        rivals = self.rivals.get(room_id, {})
+        for tid in [tid for tid in rivals if team_view(tid) not in live]:
+            del rivals[tid]
+
+    def forget(self, room_id: str):
+        self.last_sent.pop(room_id, None)
+        self.projected.pop(room_id, None)
+        self.rivals.pop(room_id, None)
+        self.built_from.pop(room_id, None)
+        self.serializer.forget(room_id)
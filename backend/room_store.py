@@ -0,0 +1,171 @@
+"""
+Room Store - Where rooms live between events
+
+GameManager keeps the rooms it is serving in memory. A RoomStore is what
+a restarted worker, or the shard a room moves to, loads them from: main.py
+saves a room after each broadcast flush (so at most once per coalescing
+window, and only when something changed) and loads it when a join arrives
+for a room this worker doesn't have.
+
+The store is not a lock. Each room must be served by a single process at a
+time (shard_router's consistent hashing guarantees it); two workers serving
+the same room would each save their own copy over the other's.
+
+    MemoryRoomStore   single worker (default): holds references, costs nothing
+    RedisRoomStore    survives restarts, shared by shards: rooms as msgpack blobs
+                      in Redis (or anything speaking its protocol, see kv_standin.py)
+
+create_room_store(ROOM_STORE_URL) picks one: unset or 'memory' -> memory,
+'redis://host:port/db' -> Redis.
+
+Card images travel separately from the room (they are large and rarely
+change): a shared store writes a room's images only when its cards change,
+and load_card_images() hands them to the loading worker's card_image_store.
+"""
+from collections import deque
+from dataclasses import fields
+from typing import Dict, List, Optional, Tuple
+
+import wire
+from card_images import room_images
+from game_manager import CHAT_HISTORY_SIZE, Player, Room, Team
+
+# Team fields rebuilt from the players on load (see Team.add_player / _sync)
+DERIVED_TEAM_FIELDS = {'players', 'chat_history', 'member_bits', 'card_bits', 'not_bits',
+                       'voted_bits', 'vote_one_bits', 'vote_zero_bits'}
+
+_PLAYER_FIELDS = [f.name for f in fields(Player)]
+_TEAM_FIELDS = [f.name for f in fields(Team) if f.name not in DERIVED_TEAM_FIELDS]
+_ROOM_FIELDS = [f.name for f in fields(Room) if f.name != 'teams']
+
+def room_to_dict(room: Room) -> dict:
+    """Plain-data form of a room (msgpack/JSON friendly)"""
+    data = {name: getattr(room, name) for name in _ROOM_FIELDS}
+    data['teams'] = [
+        dict({name: getattr(team, name) for name in _TEAM_FIELDS},
+             players=[{name: getattr(p, name) for name in _PLAYER_FIELDS} for p in team.players.values()],
+             chat_history=list(team.chat_history))
+        for team in room.teams.values()
+    ]
+    return data
+
+def room_from_dict(data: dict) -> Room:
+    """Inverse of room_to_dict. Unknown keys (written by a newer version) are ignored."""
+    room = Room(**{k: v for k, v in data.items() if k in _ROOM_FIELDS})
+    for team_data in data.get('teams', []):
+        team = Team(**{k: v for k, v in team_data.items() if k in _TEAM_FIELDS})
+        team.chat_history = deque(team_data.get('chat_history', []), maxlen=CHAT_HISTORY_SIZE)
+        for player_data in team_data.get('players', []):
+            team.add_player(Player(**{k: v for k, v in player_data.items() if k in _PLAYER_FIELDS}))
+        room.teams[team.id] = team
+    return room
+
+def encode_room(room: Room) -> bytes:
+    return wire.pack(room_to_dict(room))
+
+def decode_room(data: bytes) -> Room:
+    return room_from_dict(wire.unpack(data))
+
+class RoomStore:
+    """Interface: async so networked stores don't block the event loop"""
+
+    async def load(self, room_id: str) -> Optional[Room]:
+        raise NotImplementedError
+
+    async def save(self, room: Room):
+        raise NotImplementedError
+
+    async def delete(self, room_id: str):
+        raise NotImplementedError
+
+    async def load_card_images(self, room_id: str) -> Dict[str, Tuple[str, bytes]]:
+        """digest -> (mime, bytes) of the custom cards saved with the room"""
+        raise NotImplementedError
+
+    async def room_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class MemoryRoomStore(RoomStore):
+    """The rooms are the live objects GameManager already holds: nothing to copy"""
+
+    def __init__(self):
+        self.rooms: Dict[str, Room] = {}
+
+    async def load(self, room_id: str) -> Optional[Room]:
+        return self.rooms.get(room_id)
+
+    async def save(self, room: Room):
+        self.rooms[room.id] = room
+
+    async def delete(self, room_id: str):
+        self.rooms.pop(room_id, None)
+
+    async def load_card_images(self, room_id: str) -> Dict[str, Tuple[str, bytes]]:
+        return {}  # Same process: the images never left card_image_store
+
+    async def room_ids(self) -> List[str]:
+        return list(self.rooms)
+
+class RedisRoomStore(RoomStore):
+    """
+    Rooms as msgpack blobs under '<prefix>:room:<id>', plus a set '<prefix>:rooms'
+    of their ids, and their card images under '<prefix>:room-cards:<id>'.
+    Last writer wins: one worker should own a room at a time.
+    """
+
+    def __init__(self, url: str, prefix: str = 'arenalogic', images=None):
+        import redis.asyncio as redis  # Optional dependency, only needed for shared stores
+        self.client = redis.from_url(url, protocol=2)  # Plain RESP2: any Redis-compatible server
+        self.prefix = prefix
+        self.index_key = f"{prefix}:rooms"
+        self.images = images  # card_image_store the images are read from (None: rooms only)
+        self.saved_cards: Dict[str, tuple] = {}  # room_id -> digests last written with it
+
+    def _key(self, room_id: str) -> str:
+        return f"{self.prefix}:room:{room_id}"
+
+    def _cards_key(self, room_id: str) -> str:
+        return f"{self.prefix}:room-cards:{room_id}"
+
+    async def load(self, room_id: str) -> Optional[Room]:
+        data = await self.client.get(self._key(room_id))
+        return decode_room(data) if data is not None else None
+
+    async def save(self, room: Room):
+        cards = room_images(room)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(room.id), encode_room(room))
+            pipe.sadd(self.index_key, room.id)
+            if self.images is not None and self.saved_cards.get(room.id) != cards:
+                pipe.set(self._cards_key(room.id), wire.pack(self.images.export(cards)))
+            await pipe.execute()
+        self.saved_cards[room.id] = cards
+
+    async def delete(self, room_id: str):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(self._key(room_id))
+            pipe.delete(self._cards_key(room_id))
+            pipe.srem(self.index_key, room_id)
+            await pipe.execute()
+        self.saved_cards.pop(room_id, None)
+
+    async def load_card_images(self, room_id: str) -> Dict[str, Tuple[str, bytes]]:
+        data = await self.client.get(self._cards_key(room_id))
+        return {digest: tuple(blob) for digest, blob in wire.unpack(data).items()} if data is not None else {}
+
+    async def room_ids(self) -> List[str]:
+        return sorted(m.decode() for m in await self.client.smembers(self.index_key))
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_room_store(url: Optional[str] = None, images=None) -> RoomStore:
+    """images: the card_image_store whose blobs a shared store saves along with the rooms"""
+    if not url or url == 'memory':
+        return MemoryRoomStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisRoomStore(url, images=images)
+    raise ValueError(f"Unsupported room store URL: {url}")
@@ -0,0 +1,82 @@
+"""
+Round Timers - One deadline scheduler for every room
+
+Round deadlines (ROUND_END) and NOT-gate lockouts (NOT_LOCKOUT) of all rooms
+live in a single heap ordered by loop time (monotonic, so wall-clock jumps
+don't move them). Only the earliest deadline is armed on the event loop; when
+it fires, every due entry is handed to the fire callback and the next one is
+armed. Scheduling a (room, kind) that is already pending replaces it, so a
+second start_round can't leave two timers racing on the same room. Replaced
+and cancelled entries stay in the heap and are skipped when they surface.
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+ROUND_END = 'round_end'
+NOT_LOCKOUT = 'not_lockout'
+
+class RoundTimers:
+    def __init__(self, fire: Callable[[str, str], Awaitable[None]]):
+        self.fire = fire  # async fire(room_id, kind): the deadline was reached
+        self.heap: List[Tuple[float, int, str, str]] = []  # (loop time, seq, room_id, kind)
+        self.active: Dict[Tuple[str, str], Tuple[float, int]] = {}  # (room_id, kind) -> live entry
+        self.seq = itertools.count()
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.fired = 0
+
+    def schedule(self, room_id: str, kind: str, delay: float):
+        """(Re)schedule the room's `kind` deadline `delay` seconds from now (<= 0: as soon as possible)"""
+        loop = asyncio.get_running_loop()
+        entry = (loop.time() + max(0.0, delay), next(self.seq))
+        self.active[(room_id, kind)] = entry
+        heapq.heappush(self.heap, (*entry, room_id, kind))
+        self._arm(loop)
+
+    def cancel(self, room_id: str, kind: Optional[str] = None):
+        """Drop one pending deadline of the room, or all of them"""
+        for k in ([kind] if kind else [ROUND_END, NOT_LOCKOUT]):
+            self.active.pop((room_id, k), None)
+
+    def remaining(self, room_id: str, kind: str) -> Optional[float]:
+        """Seconds until the pending deadline, or None if there is none"""
+        entry = self.active.get((room_id, kind))
+        if entry is None:
+            return None
+        return entry[0] - asyncio.get_running_loop().time()
+
+    def _live(self, item) -> bool:
+        when, seq, room_id, kind = item
+        return self.active.get((room_id, kind)) == (when, seq)
+
+    def _arm(self, loop: asyncio.AbstractEventLoop):
+        while self.heap and not self._live(self.heap[0]):
+            heapq.heappop(self.heap)
+        when = self.heap[0][0] if self.heap else None
+        if self.handle is not None:
+            if when is not None and self.handle.when() == when:
+                return
+            self.handle.cancel()
+            self.handle = None
+        if when is not None:
+            self.handle = loop.call_at(when, self._on_timer, loop, when)
+
+    def _on_timer(self, loop: asyncio.AbstractEventLoop, armed: float):
+        self.handle = None
+        # The loop may run a handle up to its clock resolution early: the armed entry counts as due
+        now = max(loop.time(), armed)
+        while self.heap and self.heap[0][0] <= now:
+            item = heapq.heappop(self.heap)
+            if self._live(item):
+                _, _, room_id, kind = item
+                del self.active[(room_id, kind)]
+                self.fired += 1
+                loop.create_task(self._fire(room_id, kind))
+        self._arm(loop)
+
+    async def _fire(self, room_id: str, kind: str):
+        try:
+            await self.fire(room_id, kind)
+        except Exception as e:
+            print(f"[TIMERS] {kind} failed for room {room_id}: {e}")
@@ -0,0 +1,381 @@
+"""
+Shard Router - Room-affinity sharding across worker processes
+
+One front process holds every client socket. Game logic runs in N worker
+processes (shard_worker.py), each serving its own GameManager shard with the
+handlers of main.py. A consistent hash ring maps each room_id to the worker
+that owns it:
+
+    clients <-> front (Socket.IO, routing) <-> bus <-> worker shards (GameManager)
+
+- Events are forwarded to the shard owning the event's room_id, or the room the
+  client last used (player_input etc. carry no room_id). Events of clients that
+  never named a room go to the owner of the '' key. Acks come back the same way.
+- Workers emit through WorkerBusManager, a pub/sub client manager whose channel
+  is the bus: the front delivers their emits / room joins to its sockets.
+- When a worker joins or leaves (gracefully), the rooms whose owner changes move:
+  routing pauses until forwarded events are answered, the old owner releases
+  each room (encoded as in room_store, with its card images) and the new
+  owner adopts it with its round deadlines re-armed; then held events go to
+  the new owners.
+  If a worker dies, its rooms are only recovered with a shared ROOM_STORE_URL
+  (owners load unknown rooms from the store on their next event).
+
+Usage:
+    python shard_router.py --workers 4 --port 8000
+    python shard_worker.py --bus 127.0.0.1:8765 --name extra-1    # add a shard at runtime
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import itertools
+import os
+import struct
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import socketio
+from fastapi import FastAPI, Header
+from fastapi.middleware.cors import CORSMiddleware
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+import wire
+from card_images import image_response
+
+VNODES = 64  # Points per worker on the ring: more -> more even split
+BUS_PORT = 8765
+GLOBAL_KEY = ''  # Ring key for events of clients that never named a room
+PROBE_EVENTS = {'get_room_info'}  # Carry a room_id without making it the client's room
+
+# ---------------------------------------------------------------- Consistent hashing
+
+def stable_hash(key: str) -> int:
+    """Same value in every process (unlike hash(), which is salted per process)"""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+class HashRing:
+    """Consistent hash ring: adding/removing a node only moves the keys it gains/loses"""
+
+    def __init__(self, nodes=(), vnodes: int = VNODES):
+        self.vnodes = vnodes
+        self.points: List[int] = []
+        self.owners: List[str] = []  # owners[i] owns the arc ending at points[i]
+        self.nodes: Set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = stable_hash(f"{node}#{i}")
+            index = bisect.bisect(self.points, point)
+            self.points.insert(index, point)
+            self.owners.insert(index, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(p, o) for p, o in zip(self.points, self.owners) if o != node]
+        self.points = [p for p, _ in kept]
+        self.owners = [o for _, o in kept]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self.points:
+            return None
+        return self.owners[bisect.bisect(self.points, stable_hash(key)) % len(self.points)]
+
+# ---------------------------------------------------------------- Bus framing
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    """One length-prefixed msgpack message"""
+    size, = struct.unpack('>I', await reader.readexactly(4))
+    return wire.unpack(await reader.readexactly(size))
+
+def write_frame(writer: asyncio.StreamWriter, message: Any):
+    data = wire.pack(message)
+    writer.write(struct.pack('>I', len(data)) + data)
+
+class BusLink:
+    """One end of a front <-> worker connection: fire-and-forget sends plus request/response calls"""
+
+    def __init__(self, name: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.ids = itertools.count()
+
+    def send(self, message: dict):
+        write_frame(self.writer, message)
+
+    async def call(self, op: str, **fields) -> Any:
+        call_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[call_id] = future
+        self.send({'op': op, 'id': call_id, **fields})
+        try:
+            return await future
+        finally:
+            self.pending.pop(call_id, None)
+
+    def resolve(self, message: dict):
+        future = self.pending.get(message.get('id'))
+        if future is not None and not future.done():
+            if 'error' in message:
+                future.set_exception(RuntimeError(f"[{self.name}] {message['error']}"))
+            else:
+                future.set_result(message.get('value'))
+
+    def fail_pending(self):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Shard {self.name} disconnected"))
+
+class BusManager(AsyncPubSubManager):
+    """Pub/sub client manager over the shard bus: publish() sends, listen() yields what arrives"""
+    name = 'shardbus'
+
+    def __init__(self, publish, channel: str = 'shards'):
+        super().__init__(channel=channel)
+        self.publish = publish  # publish(message): hand a pub/sub message to the other side(s)
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def _publish(self, data):
+        self.publish(data)
+
+    async def _listen(self):
+        while True:
+            yield await self.inbox.get()
+
+# ---------------------------------------------------------------- Front process
+
+class ShardRouter:
+    def __init__(self, sio: socketio.AsyncServer):
+        self.sio = sio
+        self.ring = HashRing()
+        self.links: Dict[str, BusLink] = {}
+        self.sid_room: Dict[str, str] = {}  # sid -> room its room-less events belong to
+        self.sid_auth: Dict[str, dict] = {}  # sid -> connect auth (wire format), passed along to shards
+        self.routing = asyncio.Event()  # Cleared while rooms move between shards: new events wait
+        self.routing.set()
+        self.inflight = 0  # Events forwarded and not answered yet
+        self.drained = asyncio.Condition()
+        self.rebalance_lock = asyncio.Lock()
+        self.ready = asyncio.Event()  # At least one shard connected
+        self.stopping = False  # Whole deployment shutting down: leaving shards don't hand rooms over
+        self.routed = 0
+        self.moved = 0
+
+    def publish(self, message: dict):
+        for link in list(self.links.values()):
+            link.send({'op': 'bus', 'message': message})
+
+    # --- Shard membership
+
+    async def serve_bus(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._on_shard, host, port)
+
+    async def _on_shard(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hello = await read_frame(reader)
+        link = BusLink(hello['shard'], reader, writer)
+        self.links[link.name] = link
+        reading = asyncio.create_task(self._read_shard(link))
+        await self.add_shard(link.name)
+        try:
+            await reading
+        finally:
+            link.fail_pending()
+            await self.remove_shard(link.name, graceful=False)
+            writer.close()
+
+    async def _read_shard(self, link: BusLink):
+        try:
+            while True:
+                message = await read_frame(link.reader)
+                op = message['op']
+                if op == 'result':
+                    link.resolve(message)
+                elif op == 'bus':
+                    self.sio.manager.inbox.put_nowait(message['message'])
+                elif op == 'leaving':
+                    asyncio.create_task(self.remove_shard(link.name, graceful=True))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def add_shard(self, name: str):
+        async with self.rebalance_lock, self._paused():
+            owned = await self._rooms_by_shard(exclude=name)
+            self.ring.add(name)
+            moves = [(room_id, old, name) for old, room_ids in owned.items()
+                     for room_id in room_ids if self.ring.owner(room_id) == name]
+            print(f"[SHARDS] {name} joined ({len(self.ring.nodes)} shards), moving {len(moves)} rooms to it")
+            await self._move(moves)
+            self.ready.set()
+
+    async def remove_shard(self, name: str, graceful: bool):
+        async with self.rebalance_lock, self._paused():
+            if name not in self.ring.nodes:
+                return
+            link = self.links.get(name)
+            if graceful and link is not None and not self.stopping:
+                room_ids = await link.call('rooms')
+                self.ring.remove(name)
+                print(f"[SHARDS] {name} leaving, moving its {len(room_ids)} rooms")
+                await self._move([(room_id, name, self.ring.owner(room_id)) for room_id in room_ids])
+            elif not graceful:
+                print(f"[SHARDS] {name} lost; its rooms are reloaded from the room store if it is shared")
+            self.ring.remove(name)
+            if graceful and link is not None:
+                link.send({'op': 'bye'})
+            self.links.pop(name, None)
+            if not self.ring.nodes:
+                self.ready.clear()
+
+    @contextlib.asynccontextmanager
+    async def _paused(self):
+        """Hold new events and wait for the forwarded ones, so room ownership can't change under them"""
+        self.routing.clear()
+        try:
+            async with self.drained:
+                await self.drained.wait_for(lambda: not self.inflight)
+            yield
+        finally:
+            self.routing.set()
+
+    async def _rooms_by_shard(self, exclude: str) -> Dict[str, List[str]]:
+        names = [name for name in self.ring.nodes if name != exclude]
+        results = await asyncio.gather(*(self.links[name].call('rooms') for name in names))
+        return dict(zip(names, results))
+
+    async def _move(self, moves: List[Tuple[str, str, Optional[str]]]):
+        """Release each room from its old shard and have the new one accept it (routing is paused)"""
+        for room_id, old, new in moves:
+            data = await self.links[old].call('release', room_id=room_id)
+            if data is not None and new is not None:
+                await self.links[new].call('accept', data=data)
+                self.moved += 1
+
+    # --- Event routing
+
+    def room_for(self, sid: str, event: str, args: list) -> Optional[str]:
+        data = args[0] if args and isinstance(args[0], dict) else None
+        room_id = data.get('room_id') if data else None
+        if room_id and isinstance(room_id, str):
+            if event not in PROBE_EVENTS:
+                self.sid_room[sid] = room_id
+            return room_id
+        return self.sid_room.get(sid)
+
+    async def forward(self, sid: str, event: str, args: list, room_id: Optional[str]) -> Any:
+        while not (self.ready.is_set() and self.routing.is_set()):
+            await self.ready.wait()
+            await self.routing.wait()
+        link = self.links[self.ring.owner(room_id or GLOBAL_KEY)]
+        self.inflight += 1
+        self.routed += 1
+        try:
+            return await link.call('event', sid=sid, event=event, args=args, room_id=room_id,
+                                   auth=self.sid_auth.get(sid), rooms=self.sio.rooms(sid))
+        finally:
+            self.inflight -= 1
+            if not self.inflight and not self.routing.is_set():
+                async with self.drained:
+                    self.drained.notify_all()
+
+    async def card_image(self, digest: str):
+        """Images live in the shard serving the room that shows them: ask each shard"""
+        for link in list(self.links.values()):
+            blob = await link.call('card_image', digest=digest)
+            if blob is not None:
+                return tuple(blob)
+        return None
+
+def create_front() -> Tuple[ShardRouter, FastAPI, Any]:
+    """Front Socket.IO server + FastAPI app; every client event is forwarded to a shard"""
+    manager = BusManager(publish=None)
+    sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', ping_timeout=60, ping_interval=25,
+                               json=wire.OrjsonCodec, client_manager=manager)
+    router = ShardRouter(sio)
+    manager.publish = router.publish
+    wire_formats = wire.WireFormats()
+
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                       allow_methods=["*"], allow_headers=["*"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "Logic Gates Game Backend is running",
+                "shards": sorted(router.ring.nodes), "routed": router.routed, "moved": router.moved}
+
+    @app.get("/card-images/{digest}")
+    async def get_card_image(digest: str, if_none_match: Optional[str] = Header(None)):
+        return image_response(digest, await router.card_image(digest), if_none_match)
+
+    @sio.event
+    async def connect(sid, environ, auth=None):
+        router.sid_auth[sid] = auth if isinstance(auth, dict) else {}
+        await sio.emit('connection_ack', {'sid': sid, 'wire': wire_formats.register(sid, auth)}, to=sid)
+        wire_formats.forget(sid)  # Shards encode per client; the front only reports the format
+
+    @sio.event
+    async def disconnect(sid):
+        room_id = router.sid_room.pop(sid, None)
+        try:
+            await router.forward(sid, 'disconnect', [], room_id)
+        finally:
+            router.sid_auth.pop(sid, None)
+
+    @sio.on('*')
+    async def any_event(event, sid, *args):
+        return await router.forward(sid, event, list(args), router.room_for(sid, event, list(args)))
+
+    return router, app, socketio.ASGIApp(sio, app)
+
+# ---------------------------------------------------------------- Launcher
+
+async def run(args):
+    router, app, socket_app = create_front()
+    router.sio.manager_initialized = True  # Shards may emit before the first client connects
+    router.sio.manager.initialize()
+    bus = await router.serve_bus(args.bus_host, args.bus_port)
+    bus_address = f"{args.bus_host}:{bus.sockets[0].getsockname()[1]}"
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    workers = [await asyncio.create_subprocess_exec(sys.executable, os.path.join(here, 'shard_worker.py'),
+                                                    '--bus', bus_address, '--name', f"shard-{i}",
+                                                    cwd=here, stdin=asyncio.subprocess.DEVNULL)
+               for i in range(args.workers)]
+    print(f"[SHARDS] Front on :{args.port}, bus on {bus_address}, {args.workers} workers")
+
+    async def stop_workers():
+        router.stopping = True  # Workers get 'bye' when they announce they're leaving
+        for worker in workers:
+            if worker.returncode is None:
+                worker.terminate()
+        await asyncio.wait_for(asyncio.gather(*(worker.wait() for worker in workers)), timeout=10)
+        bus.close()
+    app.add_event_handler("shutdown", stop_workers)
+
+    import uvicorn
+    await uvicorn.Server(uvicorn.Config(socket_app, host=args.host, port=args.port, log_level='warning')).serve()
+
+def main():
+    parser = argparse.ArgumentParser(description="Room-affinity sharded game server")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--bus-host', default='127.0.0.1')
+    parser.add_argument('--bus-port', type=int, default=BUS_PORT)
+    try:
+        asyncio.run(run(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
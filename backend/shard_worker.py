@@ -0,0 +1,143 @@
+"""
+Shard Worker - One GameManager shard behind shard_router.py
+
+Runs the handlers of main.py (same GameManager, broadcasts, timers, voice)
+without serving any socket: the front forwards events over the bus and the
+worker's emits / room changes go back through WorkerBusManager. Started by
+shard_router.py, or by hand to add a shard to a running deployment:
+
+    python shard_worker.py --bus 127.0.0.1:8765 --name extra-1
+
+SIGTERM/SIGINT hands this shard's rooms over to the others before exiting.
+"""
+import argparse
+import asyncio
+import os
+import signal
+from typing import Dict, Set
+
+from shard_router import BusLink, BusManager, read_frame
+
+class WorkerBusManager(BusManager):
+    """
+    Sockets live in the front, so this manager's own room lists are empty: it keeps
+    each client's rooms as the front last reported them (plus what we joined/left since)
+    for sio.rooms(sid).
+    """
+
+    def __init__(self, publish):
+        super().__init__(publish)
+        self.sid_rooms: Dict[str, Set[str]] = {}
+
+    def get_rooms(self, sid, namespace):
+        return list(self.sid_rooms.get(sid, ()))
+
+    async def enter_room(self, sid, namespace, room, eio_sid=None):
+        self.sid_rooms.setdefault(sid, set()).add(room)
+        await super().enter_room(sid, namespace, room, eio_sid=eio_sid)
+
+    async def leave_room(self, sid, namespace, room):
+        self.sid_rooms.get(sid, set()).discard(room)
+        await super().leave_room(sid, namespace, room)
+
+class ShardWorker:
+    def __init__(self, name: str, link: BusLink, main):
+        self.name = name
+        self.link = link
+        self.main = main  # The main module: its GameManager is this shard
+        self.manager: WorkerBusManager = main.sio.manager
+        self.known_sids: Set[str] = set()
+        self.bye = asyncio.Event()
+
+    async def serve(self):
+        while not self.bye.is_set():
+            try:
+                message = await read_frame(self.link.reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            op = message['op']
+            if op == 'bus':
+                self.manager.inbox.put_nowait(message['message'])
+            elif op == 'bye':
+                self.bye.set()
+            else:
+                asyncio.create_task(self._answer(message))
+
+    async def _answer(self, message: dict):
+        reply = {'op': 'result', 'id': message.get('id')}
+        try:
+            reply['value'] = await getattr(self, f"op_{message['op']}")(message)
+        except Exception as e:
+            print(f"[SHARD {self.name}] {message['op']} failed: {e}")
+            reply['error'] = str(e)
+        self.link.send(reply)
+
+    async def op_event(self, message: dict):
+        sid, event, args = message['sid'], message['event'], message.get('args') or []
+        main = self.main
+        if sid not in self.known_sids:
+            self.known_sids.add(sid)
+            main.wire_formats.register(sid, message.get('auth'))
+        self.manager.sid_rooms[sid] = set(message.get('rooms') or ())
+        if message.get('room_id'):
+            await main.load_room(message['room_id'])  # A room we don't have (e.g. its shard died)
+
+        if event == 'disconnect':
+            self.known_sids.discard(sid)
+            try:
+                return await main.disconnect(sid)
+            finally:
+                self.manager.sid_rooms.pop(sid, None)
+        handler = main.sio.handlers.get('/', {}).get(event)
+        if handler is None:
+            return None
+        return await handler(sid, *args)
+
+    async def op_rooms(self, message: dict):
+        return list(self.main.game_manager.rooms)
+
+    async def op_release(self, message: dict):
+        return await self.main.release_room(message['room_id'])
+
+    async def op_accept(self, message: dict):
+        return await self.main.accept_room(message['data'])
+
+    async def op_card_image(self, message: dict):
+        blob = self.main.card_image_store.get(message['digest'])
+        return list(blob) if blob is not None else None
+
+async def run(args):
+    host, port = args.bus.rsplit(':', 1)
+    reader, writer = await asyncio.open_connection(host, int(port))
+    link = BusLink(args.name, reader, writer)
+
+    import main  # Builds the game server; its sockets are replaced by the bus below
+    manager = WorkerBusManager(lambda message: link.send({'op': 'bus', 'message': message}))
+    main.sio.manager = manager
+    manager.set_server(main.sio)
+    main.sio.manager_initialized = True
+    manager.initialize()
+    main.remote_sockets = True
+    main.snapshots = None  # Rooms move between shards: a shared ROOM_STORE_URL is what survives restarts here
+    if main.event_log is not None:
+        main.event_log.directory = os.path.join(main.event_log.directory, args.name)  # One log per shard
+    await main.startup_event()
+
+    worker = ShardWorker(args.name, link, main)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: link.send({'op': 'leaving'}))
+
+    link.send({'op': 'hello', 'shard': args.name, 'pid': os.getpid()})
+    print(f"[SHARD {args.name}] Serving (pid {os.getpid()})")
+    await worker.serve()
+    print(f"[SHARD {args.name}] Stopped with {len(main.game_manager.rooms)} rooms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Game shard behind shard_router.py")
+    parser.add_argument('--bus', required=True, help="host:port of the front's shard bus")
+    parser.add_argument('--name', required=True, help="Unique shard name (its position on the hash ring)")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
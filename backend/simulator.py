@@ -0,0 +1,337 @@
+"""
+Batch Round Simulator - Headless balancing / load-modelling tool built on GameManager's rules.
+
+Rounds are simulated in bulk with NumPy: every simulated team is a row, cards,
+NOT masks and votes are packed into int64 bitmasks (same layout as gate_kernel),
+and gates are evaluated with vectorized mask compares and popcount.
+
+Rules reused from game_manager:
+- Dealing: every card is an independent 50/50 draw (start_round)
+- Gate assignment per mode and round (GameManager.assign_gates)
+- Gate outputs (GATE_LOGIC, via the bitmask kernel) and scores (GATE_SCORES)
+- Round scoring: base + 0.5 sabotage bonus if solved, -2 if not, total clamped at 0 (finalize_round_scores)
+- Sabotage: a rival NOT needs more than 4 points and costs the saboteur 1 point when applied and
+  1 more in its round penalty (toggle_not_gate)
+
+Player behaviour is a model, not a rule - see Behaviour.
+
+Usage:
+    python simulator.py                                  # sweep gates x team sizes x modes
+    python simulator.py --gate XNOR --size 4 --sabotages 1
+    python simulator.py --exact --json sim_results.json  # exact rates over the full state space
+"""
+import argparse
+import json
+import time
+from dataclasses import dataclass, asdict
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from game_manager import GameManager, Room, Team, GATE_LOGIC, GATE_SCORES, GAME_MODES
+
+GATES = list(GATE_LOGIC)
+FAIL_PENALTY = 2  # finalize_round_scores: unsolved round
+SABOTAGE_BONUS = 0.5  # check_logic: solved while sabotaged
+SABOTAGE_COST = 1  # toggle_not_gate: charged when the NOT is applied, and again as round penalty
+SABOTAGE_MIN_SCORE = 4  # toggle_not_gate: a team needs more than this to sabotage
+MAX_TEAM_SIZE = 62  # Bits available in an int64 mask
+
+@dataclass
+class Behaviour:
+    """How simulated players act. Tune these to match what you see at events."""
+    base_error: float = 0.05  # Chance a player misjudges a difficulty-1 gate (scaled by GATE_SCORES)
+    sabotage_error: float = 0.05  # Extra error per NOT applied to the team (votes reset, time pressure)
+    abstain_rate: float = 0.02  # Chance a player never (re)votes before the round ends
+    repair_rate: float = 0.5  # 'open' mode: chance the team flips a 0 output to 1 with self-NOTs
+
+    def error_rate(self, gate: str, sabotages: int) -> float:
+        return min(1.0, self.base_error * GATE_SCORES.get(gate, 2) + self.sabotage_error * sabotages)
+
+# ---------------------------------------------------------------- kernel
+
+def gate_outputs(gate: str, inputs: np.ndarray, members: int) -> np.ndarray:
+    """Vectorized gate_kernel.evaluate over already-masked inputs"""
+    if gate == 'OR':
+        return inputs != 0
+    if gate == 'NOR':
+        return inputs == 0
+    if gate == 'NAND':
+        return inputs != members
+    if gate in ('XOR', 'XNOR'):
+        odd = (np.bitwise_count(inputs) & 1) == 1
+        return odd if gate == 'XOR' else ~odd
+    return inputs == members
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """(rows, size) bool array -> (rows,) int64 masks, column i in bit i"""
+    weights = np.left_shift(np.int64(1), np.arange(bits.shape[1], dtype=np.int64))
+    return bits.astype(np.int64) @ weights
+
+def sabotage_masks(size: int, sabotages: int, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """A random set of `sabotages` distinct NOT targets per row"""
+    if sabotages <= 0:
+        return np.zeros(rows, dtype=np.int64)
+    choices = np.array([sum(1 << i for i in combo) for combo in combinations(range(size), sabotages)], dtype=np.int64)
+    return choices[rng.integers(0, len(choices), size=rows)]
+
+def solved_by_votes(out: np.ndarray, voted: np.ndarray, vote_one: np.ndarray, vote_zero: np.ndarray,
+                    members: int, logic_mode: str) -> np.ndarray:
+    """Vectorized Team.is_solved"""
+    everyone_voted = voted == members
+    if logic_mode == 'open':
+        return out & everyone_voted & (vote_one == members)
+    consensus = np.where(out, vote_one, vote_zero)
+    return everyone_voted & (consensus == members)
+
+def round_scores(gate: str, solved: np.ndarray, sabotaged) -> np.ndarray:
+    """check_logic / finalize_round_scores: a team's round total before its sabotage penalty"""
+    bonus = np.where(sabotaged, SABOTAGE_BONUS, 0)
+    return np.where(solved, GATE_SCORES.get(gate, 2) + bonus, -FAIL_PENALTY).astype(np.float64)
+
+def affordable_sabotages(scores: np.ndarray, wanted: int) -> np.ndarray:
+    """How many of `wanted` rival NOTs a team can apply: each needs score > 4 and costs 1 point"""
+    return np.clip(np.ceil(scores - SABOTAGE_MIN_SCORE), 0, wanted).astype(np.int64)
+
+def settle_scores(scores: np.ndarray, round_total: np.ndarray, spent: np.ndarray) -> np.ndarray:
+    """Scores after the round: NOTs paid for when applied, again in the penalty, total clamped at 0"""
+    return np.maximum(0, scores - SABOTAGE_COST * spent + round_total - SABOTAGE_COST * spent)
+
+# ---------------------------------------------------------------- Monte Carlo
+
+def play_rounds(gate: str, size: int, rows: int, sabotages: int = 0, behaviour: Behaviour = None,
+                logic_mode: str = 'predict', rng: np.random.Generator = None):
+    """
+    Simulate `rows` independent rounds of one team that receives `sabotages` rival NOTs.
+    Returns (solved bool array, round_total float array) before the score clamp; what the
+    NOTs cost the saboteur is not included (see settle_scores).
+    """
+    behaviour = behaviour or Behaviour()
+    rng = rng or np.random.default_rng()
+    if not 1 <= size <= MAX_TEAM_SIZE:
+        raise ValueError(f"Team size must be between 1 and {MAX_TEAM_SIZE}")
+    sabotages = min(sabotages, size)
+    members = (1 << size) - 1
+
+    cards = rng.integers(0, members, size=rows, dtype=np.int64, endpoint=True)
+    nots = sabotage_masks(size, sabotages, rows, rng)
+    out = gate_outputs(gate, (cards ^ nots) & members, members)
+
+    wrong = pack_bits(rng.random((rows, size)) < behaviour.error_rate(gate, sabotages))
+    voted = members & ~pack_bits(rng.random((rows, size)) < behaviour.abstain_rate)
+
+    if logic_mode == 'open':
+        out = out | (rng.random(rows) < behaviour.repair_rate)
+        vote_one = members & ~wrong  # Everyone confirms 1 unless mistaken
+    else:
+        vote_one = np.where(out, members & ~wrong, wrong)  # Correct players vote the real output
+    vote_one &= voted
+    vote_zero = voted & ~vote_one
+
+    solved = solved_by_votes(out, voted, vote_one, vote_zero, members, logic_mode)
+    return solved, round_scores(gate, solved, sabotages > 0)
+
+def simulate_mode(mode: str, team_count: int = 2, size: int = 3, rounds: int = 10, games: int = 100000,
+                  sabotages: int = 0, behaviour: Behaviour = None, logic_mode: str = 'predict',
+                  target_gate: str = 'AND', target_gates: Optional[List[str]] = None,
+                  rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Play `games` full games of `rounds` rounds. Gates come from GameManager.assign_gates.
+    Each round every team aims `sabotages` NOTs at the next team, as many as its score pays for.
+    Returns final scores, shape (games, team_count).
+    """
+    rng = rng or np.random.default_rng()
+    room = Room(id='simulator', game_mode=mode, target_gate=target_gate,
+                target_gates=list(target_gates) if target_gates else ['AND'])
+    for i in range(team_count):
+        tid = chr(ord('A') + i)
+        room.teams[tid] = Team(id=tid, name=f"Team {tid}")
+
+    gm = GameManager()
+    scores = np.zeros((games, team_count))
+    for round_number in range(1, rounds + 1):
+        room.round_number = round_number
+        gm.assign_gates(room)
+        spent = np.zeros((games, team_count), dtype=np.int64)
+        if team_count > 1:
+            for t in range(team_count):
+                spent[:, t] = affordable_sabotages(scores[:, t], sabotages)
+        for t, team in enumerate(room.teams.values()):
+            received = spent[:, t - 1]  # From the previous team
+            round_total = np.empty(games)
+            for k in np.unique(received):
+                rows = received == k
+                _, round_total[rows] = play_rounds(team.current_gate, size, int(rows.sum()), int(k),
+                                                   behaviour, logic_mode, rng)
+            scores[:, t] = settle_scores(scores[:, t], round_total, spent[:, t])
+    return scores
+
+def summarize(values: np.ndarray) -> Dict:
+    values = np.asarray(values, dtype=np.float64).ravel()
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'p10': float(p10),
+        'p50': float(p50),
+        'p90': float(p90),
+        'max': float(values.max())
+    }
+
+def distribution(values: np.ndarray) -> Dict[str, float]:
+    """Share of each distinct value (round totals are discrete)"""
+    uniques, counts = np.unique(values, return_counts=True)
+    return {f"{u:g}": float(c) / len(values) for u, c in zip(uniques, counts)}
+
+# ---------------------------------------------------------------- Exact (full state space)
+
+def enumerate_state_space(size: int):
+    """
+    Every (cards, NOTs, votes) state of a team of `size`: 2^n * 2^n * 3^n rows.
+    Votes per player are None / 0 / 1. Returns a dict of int64 mask arrays.
+    """
+    members = (1 << size) - 1
+    masks = np.arange(members + 1, dtype=np.int64)
+    vote_digits = np.indices((3,) * size).reshape(size, -1).T  # 0 = None, 1 = voted 0, 2 = voted 1
+    voted = pack_bits(vote_digits > 0)
+    vote_one = pack_bits(vote_digits == 2)
+
+    cards, nots, votes = np.meshgrid(masks, masks, np.arange(len(voted)), indexing='ij')
+    votes = votes.ravel()
+    return {
+        'cards': cards.ravel(),
+        'nots': nots.ravel(),
+        'voted': voted[votes],
+        'vote_one': vote_one[votes],
+        'vote_zero': voted[votes] & ~vote_one[votes]
+    }
+
+def exact_solve_rate(gate: str, size: int, sabotages: int = 0, behaviour: Behaviour = None,
+                     logic_mode: str = 'predict', space: Dict = None) -> float:
+    """Solve probability under Behaviour, summed exactly over the full state space"""
+    behaviour = behaviour or Behaviour()
+    space = space if space is not None else enumerate_state_space(size)
+    members = (1 << size) - 1
+    sabotages = min(sabotages, size)
+    p_err = behaviour.error_rate(gate, sabotages)
+    p_abstain = behaviour.abstain_rate
+
+    out = gate_outputs(gate, (space['cards'] ^ space['nots']) & members, members)
+    if logic_mode == 'open':
+        target_one = np.ones_like(out)  # Everyone aims to confirm 1
+        solved = solved_by_votes(np.ones_like(out), space['voted'], space['vote_one'], space['vote_zero'], members, 'open')
+        solved_weight = np.where(out, 1.0, behaviour.repair_rate)
+    else:
+        target_one = out
+        solved = solved_by_votes(out, space['voted'], space['vote_one'], space['vote_zero'], members, 'predict')
+        solved_weight = 1.0
+
+    # P(cards) is uniform; P(NOTs) is uniform over masks with exactly `sabotages` bits
+    not_ok = np.bitwise_count(space['nots']) == sabotages
+    n_not_choices = len(list(combinations(range(size), sabotages)))
+    p_state = not_ok / (2 ** size * n_not_choices)
+
+    # P(votes | output): each player abstains, votes right or votes wrong independently
+    right_bits = np.where(target_one, space['vote_one'], space['vote_zero'])
+    n_abstain = np.bitwise_count(members & ~space['voted'])
+    n_right = np.bitwise_count(right_bits)
+    n_wrong = size - n_abstain - n_right
+    p_votes = (p_abstain ** n_abstain) * (((1 - p_abstain) * (1 - p_err)) ** n_right) * (((1 - p_abstain) * p_err) ** n_wrong)
+
+    return float(np.sum(p_state * p_votes * solved * solved_weight))
+
+# ---------------------------------------------------------------- CLI
+
+def run_sweep(args, behaviour: Behaviour, rng: np.random.Generator) -> Dict:
+    gates = [args.gate] if args.gate else GATES
+    sizes = [args.size] if args.size else list(range(1, 6))
+    results = {'behaviour': asdict(behaviour), 'logic_mode': args.logic_mode, 'sabotages': args.sabotages,
+               'per_gate': {}, 'per_mode': {}}
+
+    total_rounds = 0
+    start = time.perf_counter()
+    for gate in gates:
+        for size in sizes:
+            solved, round_total = play_rounds(gate, size, args.rounds, args.sabotages, behaviour, args.logic_mode, rng)
+            total_rounds += args.rounds
+            entry = {
+                'solve_rate': float(solved.mean()),
+                'round_score': summarize(round_total),
+                'round_score_distribution': distribution(round_total)
+            }
+            if args.exact:
+                entry['exact_solve_rate'] = exact_solve_rate(gate, size, args.sabotages, behaviour, args.logic_mode)
+            results['per_gate'].setdefault(gate, {})[str(size)] = entry
+
+    for mode in GAME_MODES:
+        for size in sizes:
+            scores = simulate_mode(mode, args.teams, size, args.game_rounds, args.games, args.sabotages, behaviour,
+                                   args.logic_mode, args.target_gate, args.campaign, rng)
+            total_rounds += args.games * args.game_rounds * args.teams
+            results['per_mode'].setdefault(mode, {})[str(size)] = {
+                'final_score': summarize(scores),
+                'per_team_mean': [float(m) for m in scores.mean(axis=0)]
+            }
+    elapsed = time.perf_counter() - start
+    results['simulated_rounds'] = total_rounds
+    results['elapsed_s'] = elapsed
+    results['rounds_per_s'] = total_rounds / elapsed if elapsed else 0
+    return results
+
+def print_results(results: Dict):
+    print(f"\nPer gate / team size ({results['logic_mode']} mode, {results['sabotages']} sabotage(s))")
+    print(f"{'Gate':<5} | {'Size':>4} | {'Solve %':>8} | {'Exact %':>8} | {'Mean pts':>8} | {'p10':>5} | {'p90':>5}")
+    print("-" * 62)
+    for gate, by_size in results['per_gate'].items():
+        for size, entry in by_size.items():
+            exact = entry.get('exact_solve_rate')
+            exact_str = f"{exact * 100:>7.2f}%" if exact is not None else f"{'-':>8}"
+            score = entry['round_score']
+            print(f"{gate:<5} | {size:>4} | {entry['solve_rate'] * 100:>7.2f}% | {exact_str} | "
+                  f"{score['mean']:>8.2f} | {score['p10']:>5g} | {score['p90']:>5g}")
+
+    print("\nFinal score per mode / team size")
+    print(f"{'Mode':<12} | {'Size':>4} | {'Mean':>7} | {'Std':>6} | {'p10':>6} | {'p50':>6} | {'p90':>6}")
+    print("-" * 62)
+    for mode, by_size in results['per_mode'].items():
+        for size, entry in by_size.items():
+            s = entry['final_score']
+            print(f"{mode:<12} | {size:>4} | {s['mean']:>7.2f} | {s['std']:>6.2f} | {s['p10']:>6g} | {s['p50']:>6g} | {s['p90']:>6g}")
+
+    print(f"\n{results['simulated_rounds']:,} team-rounds in {results['elapsed_s']:.2f}s "
+          f"({results['rounds_per_s'] / 1e6:.1f}M rounds/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized ArenaLogic round simulator")
+    parser.add_argument('--gate', choices=GATES, help="Only this gate (default: all)")
+    parser.add_argument('--size', type=int, help="Only this team size (default: 1-5)")
+    parser.add_argument('--sabotages', type=int, default=0, help="Rival NOT gates each team receives (per gate) / aims at the next team (per mode) per round")
+    parser.add_argument('--logic-mode', choices=['predict', 'open'], default='predict')
+    parser.add_argument('--rounds', type=int, default=1_000_000, help="Rounds per gate/size cell")
+    parser.add_argument('--games', type=int, default=100_000, help="Games per mode/size cell")
+    parser.add_argument('--game-rounds', type=int, default=10, help="Rounds per simulated game")
+    parser.add_argument('--teams', type=int, default=2, help="Teams per simulated game")
+    parser.add_argument('--target-gate', choices=GATES, default='AND', help="Competitive mode gate")
+    parser.add_argument('--campaign', nargs='+', choices=GATES, default=['AND', 'OR', 'XOR'], help="Campaign gate sequence")
+    parser.add_argument('--base-error', type=float, default=Behaviour.base_error)
+    parser.add_argument('--sabotage-error', type=float, default=Behaviour.sabotage_error)
+    parser.add_argument('--abstain-rate', type=float, default=Behaviour.abstain_rate)
+    parser.add_argument('--repair-rate', type=float, default=Behaviour.repair_rate)
+    parser.add_argument('--exact', action='store_true', help="Also compute exact solve rates over the full state space")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    behaviour = Behaviour(args.base_error, args.sabotage_error, args.abstain_rate, args.repair_rate)
+    results = run_sweep(args, behaviour, np.random.default_rng(args.seed))
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
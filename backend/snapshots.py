@@ -0,0 +1,215 @@
+"""
+Snapshots - Crash-safe copies of every room on local disk
+
+When SNAPSHOT_PATH is set (off by default), every SNAPSHOT_INTERVAL seconds
+the rooms GameManager serves are written to it, and on startup main.py
+restores them: teams, scores, settings, chat history and the round in
+progress (its deadlines are re-armed from current_round_end_time, which is
+wall-clock). Seats are not restored: the sockets died with the old process,
+so players join again.
+
+Keeping the event loop free:
+    - A room is re-encoded (room_store.encode_room) only when its revision
+      moved since the last snapshot (Room._rev, each Team._rev and chat);
+      unchanged rooms reuse their cached bytes. Encoded bytes are immutable,
+      so the list handed to the writer thread is already a consistent copy.
+    - Framing, checksum, write, fsync and rename happen in a thread.
+
+File: MAGIC, crc32 of the body (4 bytes, big-endian), body = msgpack
+{'version', 'saved_at', 'rooms': [encoded room, ...]}. It is written to a
+temporary file and renamed over the previous snapshot, so a crash leaves
+either the old or the new snapshot, never half of one.
+
+Card images the rooms show are kept next to it, one file per digest in
+<SNAPSHOT_PATH>.card-images/ (mime line, then the bytes). A digest's file never
+changes, so each is written once, before the snapshot that refers to it, and
+removed (with anything else in that directory, e.g. files left by a crash)
+after the first snapshot that no longer does.
+"""
+import asyncio
+import os
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import wire
+from card_images import room_images
+from game_manager import Room
+from room_store import decode_room, encode_room
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', '')  # Opt-in, e.g. 'snapshots/rooms.snapshot'
+SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', '5'))  # Seconds
+
+MAGIC = b'ALSNAP1\n'
+VERSION = 1
+
+def room_revision(room: Room) -> tuple:
+    """Changes whenever anything encode_room writes changes (the teams themselves are compared by identity)"""
+    return (room._rev, [(team, team._rev, team._chat_rev) for team in room.teams.values()])
+
+def write_snapshot(path: str, rooms: List[bytes], saved_at: float) -> int:
+    """Atomically replace the snapshot at path (blocking: run it off the loop). Returns its size."""
+    body = wire.pack({'version': VERSION, 'saved_at': saved_at, 'rooms': rooms})
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(zlib.crc32(body).to_bytes(4, 'big'))
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # The rename itself must reach the disk too
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return len(MAGIC) + 4 + len(body)
+
+def write_card_images(directory: str, images: Dict[str, Tuple[str, bytes]]):
+    """Write the images that aren't on disk yet (blocking: run it off the loop)"""
+    os.makedirs(directory, exist_ok=True)
+    present = set(os.listdir(directory))
+    written = False
+    for digest, (mime, data) in images.items():
+        if digest in present:
+            continue
+        tmp = os.path.join(directory, f"{digest}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(mime.encode() + b'\n' + data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(directory, digest))
+        written = True
+    if written:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def prune_card_images(directory: str, keep: Iterable[str]):
+    """Remove the images no room in the latest snapshot shows"""
+    keep = set(keep)
+    for name in os.listdir(directory):
+        if name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+def read_card_image(directory: str, digest: str) -> Optional[Tuple[str, bytes]]:
+    """(mime, bytes) saved for digest, None if there is no such file"""
+    if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+        return None  # Not a digest: never a path
+    try:
+        with open(os.path.join(directory, digest), 'rb') as f:
+            mime, _, data = f.read().partition(b'\n')
+    except OSError:
+        return None
+    return mime.decode(), data
+
+def read_snapshot(path: str) -> Tuple[List[Room], float]:
+    """Rooms of the snapshot at path and when it was saved. ([], 0) if there is none; ValueError if it is damaged."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0.0
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a room snapshot")
+    checksum, body = data[len(MAGIC):len(MAGIC) + 4], data[len(MAGIC) + 4:]
+    if zlib.crc32(body).to_bytes(4, 'big') != checksum:
+        raise ValueError("checksum mismatch")
+    snapshot = wire.unpack(body)
+    return [decode_room(blob) for blob in snapshot['rooms']], snapshot['saved_at']
+
+def vacate(room: Room) -> Room:
+    """Empty the seats of a restored room (their sockets are gone); everything else stays"""
+    room.operator_sid = None
+    for team in room.teams.values():
+        for sid in list(team.players):
+            team.remove_player(sid)
+    return room
+
+class SnapshotWriter:
+    def __init__(self, path: str = SNAPSHOT_PATH, interval: float = SNAPSHOT_INTERVAL, images=None):
+        self.path = path
+        self.interval = interval
+        self.images = images  # card_image_store whose blobs the rooms show (None: rooms only)
+        self.image_dir = f"{path}.card-images"
+        self.cache: Dict[str, Tuple[Room, tuple, bytes]] = {}  # room_id -> (room, revision, encoded)
+        self.lock = asyncio.Lock()  # One write at a time, in order
+        self.saves = 0
+        self.encoded = 0  # Rooms re-encoded (the rest came from the cache)
+        self.last_size = 0
+        self.last_pause = 0.0  # Seconds the last save spent on the event loop
+
+    def encode(self, rooms: Iterable[Room]) -> List[bytes]:
+        """Encoded form of every room, re-encoding only those that changed since the last call"""
+        cache = self.cache
+        fresh = {}
+        blobs = []
+        for room in rooms:
+            revision = room_revision(room)
+            cached = cache.get(room.id)
+            if cached is None or cached[0] is not room or cached[1] != revision:
+                cached = (room, revision, encode_room(room))
+                self.encoded += 1
+            fresh[room.id] = cached
+            blobs.append(cached[2])
+        self.cache = fresh  # Closed rooms drop out
+        return blobs
+
+    async def save(self, rooms: Dict[str, Room]) -> int:
+        """Snapshot the rooms: encode on the loop (incremental), write in a thread. Returns the file size."""
+        async with self.lock:
+            started = time.perf_counter()
+            rooms = list(rooms.values())
+            blobs = self.encode(rooms)
+            images = None
+            if self.images is not None:
+                images = self.images.export(digest for room in rooms for digest in room_images(room))
+            self.last_pause = time.perf_counter() - started
+            self.last_size = await asyncio.to_thread(self._write, blobs, images, time.time())
+            self.saves += 1
+            return self.last_size
+
+    def _write(self, blobs: List[bytes], images: Optional[Dict[str, Tuple[str, bytes]]], saved_at: float) -> int:
+        if images is None:
+            return write_snapshot(self.path, blobs, saved_at)
+        write_card_images(self.image_dir, images)
+        size = write_snapshot(self.path, blobs, saved_at)
+        prune_card_images(self.image_dir, images)
+        return size
+
+    def restore(self) -> List[Room]:
+        """Rooms of the latest snapshot with their seats vacated ([] if none or unreadable)"""
+        try:
+            rooms, saved_at = read_snapshot(self.path)
+        except (ValueError, OSError) as e:
+            print(f"[SNAPSHOT] Ignoring {self.path}: {e}")
+            return []
+        if rooms:
+            print(f"[SNAPSHOT] Restoring {len(rooms)} rooms saved {time.time() - saved_at:.0f}s ago")
+        return [vacate(room) for room in rooms]
+
+    def card_images(self, room: Room) -> Dict[str, Tuple[str, bytes]]:
+        """The saved images a restored room shows (for card_image_store.adopt)"""
+        images = {}
+        for digest in room_images(room):
+            blob = read_card_image(self.image_dir, digest) if digest else None
+            if blob is not None:
+                images[digest] = blob
+        return images
+
+    async def run(self, rooms: Dict[str, Room]):
+        """Save every interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save(rooms)
+            except Exception as e:
+                print(f"[SNAPSHOT] Save failed: {e}")
@@ -0,0 +1,26 @@
+"""
+Speech - TTS engines as streams of audio chunks
+
+Each engine yields MP3 bytes as soon as it produces them, so callers can
+forward audio before the whole clip is synthesized, or join the chunks once
+with collect().
+"""
+from typing import AsyncIterator
+
+import edge_tts
+
+EDGE_VOICE = 'es-ES-AlvaroNeural'
+
+async def edge_chunks(text: str, voice: str = EDGE_VOICE) -> AsyncIterator[bytes]:
+    communicate = edge_tts.Communicate(text, voice)
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
+
+async def openai_chunks(client, text: str, voice: str = 'nova') -> AsyncIterator[bytes]:
+    async with client.audio.speech.with_streaming_response.create(model="tts-1", voice=voice, input=text) as response:
+        async for chunk in response.iter_bytes():
+            yield chunk
+
+async def collect(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
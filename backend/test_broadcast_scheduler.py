@@ -0,0 +1,43 @@
+import asyncio
+
+from broadcast_scheduler import BroadcastScheduler
+
+def test_burst_is_coalesced_into_latest_state():
+    async def scenario():
+        room = {'votes': 0}
+        sent = []
+
+        async def flush(room_id, **kwargs):
+            sent.append((room_id, room['votes'], kwargs))
+
+        scheduler = BroadcastScheduler(flush, window=0.05)
+
+        # 1. First change after a quiet period goes out on the next loop iteration
+        room['votes'] += 1
+        scheduler.mark_dirty('r1')
+        await asyncio.sleep(0.01)
+        assert sent == [('r1', 1, {})]
+
+        # 2. A burst inside the window becomes a single flush carrying the latest state
+        for _ in range(20):
+            room['votes'] += 1
+            scheduler.mark_dirty('r1')
+            await asyncio.sleep(0)
+        assert len(sent) == 1
+        await asyncio.sleep(0.08)
+        assert sent[1] == ('r1', 21, {}) and len(sent) == 2
+        assert scheduler.coalesced == 19
+
+        # 3. Urgent flushes go out at once and absorb the pending one
+        scheduler.mark_dirty('r1')
+        await scheduler.flush_now('r1', joined_sid='p1')
+        assert sent[2] == ('r1', 21, {'joined_sid': 'p1'})
+        await asyncio.sleep(0.08)
+        assert len(sent) == 3 and not scheduler.pending
+
+    asyncio.run(scenario())
+
+    print("SUCCESS: Broadcast bursts are coalesced!")
+
+if __name__ == "__main__":
+    test_burst_is_coalesced_into_latest_state()
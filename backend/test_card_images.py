@@ -0,0 +1,83 @@
+import base64
+import hashlib
+
+from card_images import CardImageStore, MAX_IMAGE_BYTES, image_response
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+def test_identical_uploads_are_stored_once():
+    store = CardImageStore()
+    raw = base64.b64encode(PNG).decode()
+
+    # 1. Data URL and bare base64 of the same bytes share one digest
+    digest = store.put(f"data:image/png;base64,{raw}", "room")
+    assert digest == hashlib.sha256(PNG).hexdigest()
+    assert store.put(raw, "room") == digest
+    assert len(store.blobs) == 1
+    assert store.get(digest) == ('image/png', PNG)
+
+    # 2. Bare base64 gets its type from the magic bytes
+    jpeg = b'\xff\xd8\xff\xe0' + b'\x01' * 16
+    assert store.get(store.put(base64.b64encode(jpeg).decode(), "room"))[0] == 'image/jpeg'
+    assert store.get("missing") is None
+
+    # 3. The declared type is ignored: the bytes decide
+    assert store.get(store.put(f"data:text/html;base64,{raw}", "room"))[0] == 'image/png'
+    headers = image_response(digest, store.get(digest), None).headers
+    assert headers['content-type'] == 'image/png'
+    assert headers['x-content-type-options'] == 'nosniff'
+    assert "sandbox" in headers['content-security-policy']
+
+def test_rejects_bad_uploads():
+    store = CardImageStore()
+    html = base64.b64encode(b'<html><script>alert(1)</script></html>').decode()
+    svg = base64.b64encode(b'<svg onload="alert(1)"></svg>').decode()
+    for bad in ["not base64!!", "", base64.b64encode(b'\x00' * (MAX_IMAGE_BYTES + 1)).decode(),
+                f"data:text/html;base64,{html}", f"data:image/svg+xml;base64,{svg}", svg]:
+        try:
+            store.put(bad, "room")
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    assert not store.blobs and not store.rooms
+
+def test_images_live_as_long_as_their_rooms():
+    store = CardImageStore(max_bytes=3 * len(PNG))
+    images = [PNG[:-1] + bytes([i]) for i in range(4)]
+    uploads = [base64.b64encode(image).decode() for image in images]
+
+    # 1. Two rooms share an image; replacing a room's cards drops what only it used
+    shared = store.put(uploads[0], "r1")
+    assert store.put(uploads[0], "r2") == shared
+    own = store.put(uploads[1], "r1")
+    store.attach("r1", (shared, None))
+    assert store.get(own) is None and store.size == len(PNG)
+
+    # 2. Past max_bytes uploads are refused
+    store.put(uploads[1], "r1")
+    store.put(uploads[2], "r2")
+    try:
+        store.put(uploads[3], "r2")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # 3. Closing the rooms frees everything
+    store.release("r1")
+    assert store.get(shared) is not None
+    store.release("r2")
+    assert not store.blobs and not store.refs and not store.rooms and store.size == 0
+
+    # 4. A room loaded from elsewhere brings its images; bytes that don't match their digest stay out
+    moved = CardImageStore()
+    good, bad = hashlib.sha256(images[0]).hexdigest(), hashlib.sha256(images[1]).hexdigest()
+    missing = moved.adopt("r3", (good, bad, None), {good: ('image/png', images[0]), bad: ('image/png', images[2])})
+    assert missing == {bad} and moved.export((good, bad)) == {good: ('image/png', images[0])}
+    assert moved.rooms == {"r3": {good}}
+
+    print("SUCCESS: Card images are content-addressed!")
+
+if __name__ == "__main__":
+    test_identical_uploads_are_stored_once()
+    test_rejects_bad_uploads()
+    test_images_live_as_long_as_their_rooms()
@@ -0,0 +1,33 @@
+from itertools import product
+
+import gate_kernel
+from game_manager import GATE_LOGIC
+
+def test_kernel_matches_gate_logic():
+    # Exhaustive over every card/NOT combination for teams of 1-5
+    for size in range(1, 6):
+        members = (1 << size) - 1
+        for cards in product([0, 1], repeat=size):
+            for nots in product([False, True], repeat=size):
+                inputs = [bool(c) != n for c, n in zip(cards, nots)]
+                for gate, gate_func in GATE_LOGIC.items():
+                    expected = gate_func(inputs)
+                    got = gate_kernel.evaluate(gate, gate_kernel.pack(cards), gate_kernel.pack(nots), members)
+                    assert got == expected, (gate, cards, nots)
+    print("SUCCESS: Gate kernel matches GATE_LOGIC!")
+
+def test_unknown_gate_falls_back_to_and():
+    assert gate_kernel.evaluate('???', 0b11, 0, 0b11) == True
+    assert gate_kernel.evaluate('???', 0b01, 0, 0b11) == False
+    print("SUCCESS: Unknown gates evaluate as AND")
+
+def test_lowest_free_slot():
+    assert gate_kernel.lowest_free_slot(0) == 0b1
+    assert gate_kernel.lowest_free_slot(0b1011) == 0b100
+    assert gate_kernel.lowest_free_slot(0b111) == 0b1000
+    print("SUCCESS: Lowest free slot is found")
+
+if __name__ == "__main__":
+    test_kernel_matches_gate_logic()
+    test_unknown_gate_falls_back_to_and()
+    test_lowest_free_slot()
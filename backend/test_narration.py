@@ -0,0 +1,46 @@
+import asyncio
+
+from game_manager import GameManager
+from narration import Narrator, not_alert_segments, round_end_segments, round_start_segments
+from tts_cache import TTSCache
+
+def test_narrations_are_joined_from_rendered_clips():
+    async def scenario():
+        calls = []
+
+        async def synthesize(text):
+            calls.append(text)
+            return f"<{text}>".encode()
+
+        narrator = Narrator("test-voice", synthesize, TTSCache("", memory_bytes=1 << 20))
+        await narrator.prerender()
+        assert len(calls) == len(narrator.vocabulary()) == len(narrator.clips)
+
+        gm = GameManager()
+        gm.join_room("op", "narration-room", "Op", "operator")
+        for i, tid in enumerate("AAB"):
+            gm.join_room(f"p{i}", "narration-room", f"Player {i}", "player", tid)
+        room = gm.start_round("narration-room", 30)
+        team = room.teams["A"]
+        me = team.players["p0"]
+        mate = team.players["p1"]
+
+        calls.clear()
+        text, audio = await narrator.render(round_start_segments(room, team, me))
+        assert text == (f"Ronda 1 iniciada. Tu puerta es {team.current_gate}. Tu carta tiene valor {me.card_value}. "
+                        f"Tus compañeros: Player 1 tiene carta {mate.card_value}.")
+        assert audio == b"".join(f"<{segment}>".encode() for segment in round_start_segments(room, team, me))
+        assert calls == ["Player 1"]  # Only the name was new, and only once
+        await narrator.render(round_start_segments(room, team, mate))
+        await narrator.render(not_alert_segments(mate, me))
+        assert calls == ["Player 1", "Player 0"]
+
+        gm.end_round("narration-room")
+        text, _ = await narrator.render(round_end_segments(room, team, me))
+        assert text.startswith("Ronda fallida.") and "El equipo Team BETA perdió con 0 puntos." in text
+        assert calls == ["Player 1", "Player 0"]  # Team names and scores were pre-rendered
+    asyncio.run(scenario())
+    print("SUCCESS: narrations are assembled from pre-rendered clips without new TTS calls")
+
+if __name__ == "__main__":
+    test_narrations_are_joined_from_rendered_clips()
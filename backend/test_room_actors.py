@@ -0,0 +1,98 @@
+import asyncio
+
+from room_actors import RoomActors, RoomBusy
+
+def test_commands_run_in_order_one_at_a_time():
+    async def scenario():
+        actors = RoomActors(queue_size=3)
+        log = []
+
+        async def compound(name):
+            log.append(f"{name} start")
+            await asyncio.sleep(0.01)  # A handler awaiting mid-change (e.g. a room store load)
+            log.append(f"{name} end")
+            return name
+
+        first = asyncio.ensure_future(actors.call("r1", compound, "a"))
+        second = asyncio.ensure_future(actors.call("r1", compound, "b"))
+        await asyncio.sleep(0.001)
+        assert actors.depth("r1") == 1  # 'a' running, 'b' queued
+
+        # Another room isn't held up by r1
+        assert await actors.call("r2", lambda: "other") == "other"
+        assert log == ["a start"]
+
+        assert await asyncio.gather(first, second) == ["a", "b"]
+        assert log == ["a start", "a end", "b start", "b end"]
+
+        # Errors reach the caller; the room keeps serving
+        try:
+            await actors.call("r1", lambda: 1 / 0)
+            assert False
+        except ZeroDivisionError:
+            pass
+        stats = actors.stats()["r1"]
+        assert stats["served"] == 3 and stats["depth"] == 0 and stats["max_service_ms"] >= 10
+    asyncio.run(scenario())
+
+def test_full_queue_pushes_back_and_forgotten_rooms_drain():
+    async def scenario():
+        actors = RoomActors(queue_size=2)
+        gate = asyncio.Event()
+        log = []
+
+        async def blocked(name):
+            await gate.wait()
+            log.append(name)
+
+        queued = [asyncio.ensure_future(actors.call("r1", blocked, "a"))]
+        await asyncio.sleep(0.001)  # 'a' running
+        queued += [asyncio.ensure_future(actors.call("r1", blocked, n)) for n in ("b", "c")]
+        await asyncio.sleep(0.001)  # 'b' and 'c' queued: full
+        try:
+            await actors.call("r1", blocked, "d")
+            assert False
+        except RoomBusy:
+            pass
+        queued.append(asyncio.ensure_future(actors.run("r1", blocked, "deadline")))  # Server work is never dropped
+        assert actors.stats()["r1"]["rejected"] == 1
+
+        # The room closes and comes back under the same id: the new queue waits for the old one
+        actors.forget("r1")
+        after = asyncio.ensure_future(actors.call("r1", log.append, "new room"))
+        await asyncio.sleep(0.001)
+        assert log == []
+        gate.set()
+        await asyncio.gather(*queued, after)
+        assert log == ["a", "b", "c", "deadline", "new room"]
+        await asyncio.sleep(0)
+        assert not actors.retiring
+    asyncio.run(scenario())
+
+def test_workers_stop_when_their_room_is_gone():
+    async def scenario():
+        rooms = {"live"}
+        actors = RoomActors(exists=rooms.__contains__)
+        gate = asyncio.Event()
+
+        # Commands for unknown rooms still run, but leave no queue or task behind
+        assert await asyncio.gather(*(actors.call(f"ghost{i}", lambda: "ran") for i in range(100))) == ["ran"] * 100
+        running = asyncio.ensure_future(actors.call("live", gate.wait))
+        await asyncio.sleep(0.001)
+        assert list(actors.actors) == ["live"] and len(asyncio.all_tasks()) == 3  # scenario, call, live worker
+        assert not actors.idle("live") and actors.idle("ghost0")
+
+        gate.set()
+        await running
+        assert actors.idle("live")
+        rooms.discard("live")
+        await actors.call("live", lambda: None)  # The worker notices on its next drain
+        await asyncio.sleep(0)
+        assert not actors.actors and len(asyncio.all_tasks()) == 1
+    asyncio.run(scenario())
+    print("SUCCESS: room commands run in order per room, push back when full and drain on close")
+
+if __name__ == "__main__":
+    test_commands_run_in_order_one_at_a_time()
+    test_full_queue_pushes_back_and_forgotten_rooms_drain()
+    test_workers_stop_when_their_room_is_gone()
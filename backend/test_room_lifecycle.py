@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import time
+
+from game_manager import GameManager
+
+def test_room_info_does_not_allocate():
+    gm = GameManager()
+    info = gm.get_room_info("probe")
+    assert not gm.rooms
+    assert sorted(info['teams']) == ['A', 'B'] and info['teams']['A']['player_count'] == 0
+    assert gm.get_room_info("") is None
+
+def test_idle_rooms_are_evicted_and_capped():
+    gm = GameManager()
+    closed = []
+    gm.on_room_closed = lambda room_id, sids: closed.append((room_id, sorted(sids)))
+    gm.max_rooms = 2
+
+    gm.join_room("a1", "busy", "Alice", "player")
+    gm.create_room("empty")
+    now = gm.last_activity["busy"]
+
+    # 1. Empty rooms go after the empty TTL, seated ones only after the idle TTL
+    assert gm.evict_idle(now + gm.empty_ttl - 1) == []
+    assert gm.evict_idle(now + gm.empty_ttl + 1) == ["empty"]
+
+    # 2. A running round is never idle; a stalled room is closed and its seats dropped
+    gm.start_round("busy", 30)
+    later = gm.last_activity["busy"] + gm.idle_ttl + 1
+    assert gm.evict_idle(later) == []
+    gm.end_round("busy")
+    assert gm.evict_idle(gm.last_activity["busy"] + gm.idle_ttl + 1) == ["busy"]
+    assert closed[-1] == ("busy", ["a1"]) and gm.locate("a1") == (None, None, None)
+
+    # 3. At capacity the least recently active empty room makes way; busy rooms never do,
+    #    nor rooms with commands queued or running
+    gm.create_room("old")
+    gm.create_room("new")
+    gm.is_busy = lambda room_id: room_id == "old"
+    assert gm.evict_idle(gm.last_activity["new"] + gm.idle_ttl + 1) == ["new"]
+    assert gm.create_room("new") is not None
+    gm.is_busy = lambda room_id: False
+    assert gm.create_room("newest") is not None and "old" not in gm.rooms
+    gm.join_room("b1", "new", "Bob", "player")
+    gm.join_room("c1", "newest", "Carol", "player")
+    ok, message = gm.join_room("d1", "overflow", "Dave", "player")
+    assert not ok and "full" in message and "overflow" not in gm.rooms
+
+
+def test_closed_rooms_leave_nothing_behind():
+    import main  # The server's own wiring: queues, card images and broadcast state per room
+
+    async def scenario():
+        gm = main.game_manager
+        for i in range(200):
+            room_id, operator = f"cycle-{i}", f"op-{i}"
+            await main.room_actors.call(room_id, gm.join_room, operator, room_id, "Op", "operator")
+            image = base64.b64encode(b'\x89PNG\r\n\x1a\n' + i.to_bytes(4, 'big')).decode()
+            await main.upload_card_image(operator, {'room_id': room_id, 'card_type': '0', 'image_data': image})
+            await main.set_logic_mode(operator, {'room_id': f"made-up-{i}", 'mode': 'open'})
+            await main.room_actors.run(room_id, gm.remove_player, operator)
+            assert gm.rooms[room_id].custom_card_0 in main.card_image_store.blobs
+            gm.evict_idle(time.monotonic() + gm.empty_ttl + 1)
+            await main.broadcast_room_state(room_id)  # A handler's update landing after the close
+            assert len(main.room_actors.actors) <= 1 and len(main.card_image_store.blobs) <= 1
+        await asyncio.sleep(0.1)  # Pending broadcasts flush into closed rooms
+
+        assert not gm.rooms and not main.room_actors.actors and not main.room_actors.retiring
+        assert not main.card_image_store.blobs and main.card_image_store.size == 0
+        assert not main.state_tracker.last_sent and not main.broadcast_scheduler.last_flush
+        assert len(asyncio.all_tasks()) == 1
+    asyncio.run(scenario())
+
+def test_closed_rooms_are_not_loaded_back():
+    import main
+
+    async def scenario():
+        gm = main.game_manager
+        await main.room_actors.call("reopened", gm.join_room, "op", "reopened", "Op", "operator")
+        gm.rooms["reopened"].round_number = 4
+        await main.room_store.save(gm.rooms["reopened"])
+        await main.room_actors.run("reopened", gm.remove_player, "op")
+
+        # A join right after the close runs once the store entry is gone (deletes take a while, as over Redis)
+        store = main.room_store
+        delete = store.delete
+        async def slow_delete(room_id):
+            await asyncio.sleep(0.01)
+            await delete(room_id)
+        store.delete = slow_delete
+        try:
+            gm.evict_idle(time.monotonic() + gm.empty_ttl + 1)
+            assert "reopened" not in gm.rooms
+            ok, _ = await main.room_actors.call("reopened", main.join_command, "p1", "reopened", "P1", "player", "A", None)
+        finally:
+            del store.delete
+        assert ok and gm.rooms["reopened"].round_number == 0
+        assert await store.load("reopened") is None
+        gm.close_room("reopened")
+        await asyncio.sleep(0)
+    asyncio.run(scenario())
+
+def test_released_rooms_take_their_card_images():
+    import main
+
+    async def scenario():
+        gm = main.game_manager
+        await main.room_actors.call("handover", gm.join_room, "op", "handover", "Op", "operator")
+        image = base64.b64encode(b'\x89PNG\r\n\x1a\nmoving').decode()
+        await main.upload_card_image("op", {'room_id': 'handover', 'card_type': '1', 'image_data': image})
+        digest = gm.rooms["handover"].custom_card_1
+
+        # The old shard keeps nothing; the new one serves the room and its image
+        data = await main.release_room("handover")
+        assert "handover" not in gm.rooms and main.card_image_store.get(digest) is None
+        assert await main.accept_room(data)
+        assert gm.rooms["handover"].custom_card_1 == digest and main.card_image_store.get(digest) is not None
+        gm.close_room("handover")
+    asyncio.run(scenario())
+    print("SUCCESS: Idle rooms are evicted and capped!")
+
+if __name__ == "__main__":
+    test_room_info_does_not_allocate()
+    test_idle_rooms_are_evicted_and_capped()
+    test_closed_rooms_leave_nothing_behind()
+    test_closed_rooms_are_not_loaded_back()
+    test_released_rooms_take_their_card_images()
@@ -0,0 +1,142 @@
+from game_manager import GameManager
+from room_state import RoomSerializer, RoomStateTracker, apply_delta, diff_states, serialize_room
+
+def test_diff_apply_roundtrip():
+    old = {'a': 1, 'teams': {'A': {'score': 0, 'players': {'p1': {'vote_value': None}}}, 'B': {'score': 5}}}
+    new = {'a': 1, 'teams': {'A': {'score': 2, 'players': {'p1': {'vote_value': 1}}}}, 'b': True}
+    changes = diff_states(old, new)
+    assert 'a' not in changes
+    assert changes['teams']['$del'] == ['B']
+    assert apply_delta(old, changes) == new
+    assert diff_states(new, new) == {}
+
+def test_tracker_versions_follow_room():
+    gm = GameManager()
+    gm.join_room("op", "delta_room", "Hacker", "operator")
+    gm.join_room("p1", "delta_room", "P1", "player", "A")
+    room = gm.rooms["delta_room"]
+    tracker = RoomStateTracker()
+
+    # 1. First broadcast is a full state for every view
+    updates = {view: (kind, payload) for view, kind, payload in tracker.next_updates(room)}
+    assert set(updates) == {'operator', 'spectator', 'team:A', 'team:B'}
+    kind, state = updates['team:A']
+    assert kind == 'full' and state['version'] == 1
+
+    # 2. Nothing changed -> nothing to send, version untouched
+    assert tracker.next_updates(room) == []
+    assert room.state_version == 1
+
+    # 3. A vote becomes a small delta, only for the views that render it
+    gm.set_input("p1", 1)
+    updates = {view: (kind, payload) for view, kind, payload in tracker.next_updates(room)}
+    assert set(updates) == {'operator', 'team:A'}
+    kind, delta = updates['team:A']
+    assert kind == 'delta' and delta['base'] == 1 and delta['version'] == 2
+    assert delta['changes'] == {'teams': {'A': {'players': {'p1': {'vote_value': 1}}}}}
+    client = {**apply_delta(state, delta['changes']), 'version': delta['version']}
+    assert client == tracker.snapshot(room, 'team:A')
+
+    # 4. Views that skipped a version get a delta based on the last one they received
+    gm.toggle_not_gate("op", "p1", "delta_room")
+    _, rival_delta = {view: (kind, payload) for view, kind, payload in tracker.next_updates(room)}['team:B']
+    assert rival_delta['base'] == 1 and rival_delta['version'] == 3
+
+def test_rival_teams_are_projected():
+    gm = GameManager()
+    gm.join_room("op", "view_room", "Hacker", "operator")
+    gm.join_room("a1", "view_room", "A1", "player", "A")
+    gm.join_room("b1", "view_room", "B1", "player", "B")
+    room = gm.rooms["view_room"]
+    tracker = RoomStateTracker()
+    tracker.next_updates(room)
+
+    # 1. Own team in full, rivals without cards/votes; operator sees everything
+    view_a = tracker.snapshot(room, 'team:A')
+    assert 'card_value' in view_a['teams']['A']['players']['a1']
+    assert set(view_a['teams']['B']['players']['b1']) == {'sid', 'name', 'avatar', 'has_not_gate'}
+    assert 'vote_value' in tracker.snapshot(room, 'operator')['teams']['B']['players']['b1']
+    assert 'card_value' not in tracker.snapshot(room, 'spectator')['teams']['A']['players']['a1']
+
+    # 2. Rival sections are built once and shared between views
+    assert view_a['teams']['B'] is tracker.snapshot(room, 'spectator')['teams']['B']
+
+    # 3. Seats map to views
+    assert tracker.view_for(room, room.teams['A'], "a1") == 'team:A'
+    assert tracker.view_for(room, None, "op") == 'operator'
+    assert tracker.view_for(room, None, "someone") == 'spectator'
+
+def test_playing_room_is_quiet_between_changes():
+    gm = GameManager()
+    gm.join_room("p1", "clock_room", "P1", "player", "A")
+    room = gm.rooms["clock_room"]
+    tracker = RoomStateTracker()
+    tracker.next_updates(room)
+
+    # The round deadline goes out once; nothing time-dependent changes after that
+    gm.start_round("clock_room", 30)
+    (view, kind, delta), *_ = tracker.next_updates(room)
+    assert view == 'operator' and kind == 'delta'
+    assert delta['changes']['round_end_time'] == room.current_round_end_time
+    assert tracker.next_updates(room) == []
+
+def test_unchanged_room_skips_the_build():
+    gm = GameManager()
+    gm.join_room("p1", "idle_room", "P1", "player", "A")
+    room = gm.rooms["idle_room"]
+    tracker = RoomStateTracker()
+    tracker.next_updates(room)
+
+    # No revision moved: returned before the serializer runs
+    calls = []
+    serialize = tracker.serializer.serialize
+    tracker.serializer.serialize = lambda r: calls.append(r) or serialize(r)
+    assert tracker.next_updates(room) == []
+    assert calls == []
+
+    # A player change moves its team's revision and is picked up
+    gm.set_input("p1", 1)
+    (view, kind, _), *_ = tracker.next_updates(room)
+    assert kind == 'delta' and len(calls) == 1
+
+def test_serializer_rebuilds_only_dirty_teams():
+    gm = GameManager()
+    gm.join_room("p1", "cache_room", "P1", "player", "A")
+    gm.join_room("p2", "cache_room", "P2", "player", "B")
+    room = gm.rooms["cache_room"]
+    serializer = RoomSerializer()
+
+    first = serializer.serialize(room)
+    assert first == serialize_room(room)
+
+    # 1. No change: the same team sections come back
+    again = serializer.serialize(room)
+    assert again['teams'] is first['teams']
+
+    # 2. A vote in team A rebuilds A only
+    gm.set_input("p1", 0)
+    after_vote = serializer.serialize(room)
+    assert after_vote['teams']['A'] is not first['teams']['A']
+    assert after_vote['teams']['B'] is first['teams']['B']
+    assert after_vote == serialize_room(room)
+
+    # 3. Direct field writes (as main.py does) and room-level changes are picked up too
+    room.teams['B'].score = 7
+    room.game_mode = 'asymmetric'
+    gm.add_team("cache_room", "C", "Team C")
+    latest = serializer.serialize(room)
+    assert latest['teams']['B']['score'] == 7 and latest['game_mode'] == 'asymmetric'
+    assert latest == serialize_room(room)
+
+    gm.remove_player("p2")
+    assert serializer.serialize(room) == serialize_room(room)
+
+    print("SUCCESS: Cached serializer and versioned deltas match the room state!")
+
+if __name__ == "__main__":
+    test_diff_apply_roundtrip()
+    test_tracker_versions_follow_room()
+    test_rival_teams_are_projected()
+    test_playing_room_is_quiet_between_changes()
+    test_unchanged_room_skips_the_build()
+    test_serializer_rebuilds_only_dirty_teams()
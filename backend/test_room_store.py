@@ -0,0 +1,75 @@
+import asyncio
+import base64
+
+from card_images import CardImageStore
+from game_manager import GameManager
+from kv_standin import KVStandin
+from room_state import serialize_room
+from room_store import MemoryRoomStore, RedisRoomStore, create_room_store, decode_room, encode_room
+
+def build_room():
+    gm = GameManager()
+    gm.join_room("op", "store-room", "Hacker", "operator")
+    for i, tid in enumerate("AABB"):
+        gm.join_room(f"p{i}", "store-room", f"Player {i}", "player", tid)
+    gm.toggle_team_chat("store-room", "A")
+    gm.post_chat("store-room", "p0", "hola")
+    gm.start_round("store-room", 30)
+    gm.set_input("p0", 1)
+    gm.toggle_not_gate("op", "p2", "store-room")
+    return gm.rooms["store-room"]
+
+def test_room_roundtrip_rebuilds_gate_state():
+    room = build_room()
+    copy = decode_room(encode_room(room))
+
+    # Everything clients see survives, and the bitmasks are rebuilt from the players
+    assert serialize_room(copy) == serialize_room(room)
+    for tid, team in room.teams.items():
+        restored = copy.teams[tid]
+        assert restored.gate_output() == team.gate_output()
+        assert (restored.card_bits, restored.not_bits, restored.vote_one_bits) == (team.card_bits, team.not_bits, team.vote_one_bits)
+    assert list(copy.teams["A"].chat_history) == list(room.teams["A"].chat_history)
+    assert copy.state_version == room.state_version
+
+def test_stores_against_local_standin():
+    async def scenario():
+        standin = KVStandin()
+        port = await standin.start()
+        room = build_room()
+        try:
+            memory = create_room_store()
+            images = CardImageStore()
+            shared = create_room_store(f"redis://127.0.0.1:{port}/0", images)
+            assert isinstance(memory, MemoryRoomStore) and isinstance(shared, RedisRoomStore)
+
+            for store in (memory, shared):
+                assert await store.load("store-room") is None
+                await store.save(room)
+                assert await store.room_ids() == ["store-room"]
+                loaded = await store.load("store-room")
+                assert serialize_room(loaded) == serialize_room(room)
+                await store.delete("store-room")
+                assert await store.room_ids() == [] and await store.load("store-room") is None
+
+            # A second client (another worker) sees what the first one saved, card images included
+            other = RedisRoomStore(f"redis://127.0.0.1:{port}/0")
+            png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 8
+            room.custom_card_1 = images.put(base64.b64encode(png).decode(), room.id)
+            await shared.save(room)
+            assert (await other.load("store-room")).teams["A"].players["p0"].vote_value == 1
+            assert await other.load_card_images("store-room") == {room.custom_card_1: ('image/png', png)}
+            await shared.delete("store-room")
+            assert await other.load_card_images("store-room") == {}
+            await other.close()
+            await shared.close()
+        finally:
+            await standin.stop()
+
+    asyncio.run(scenario())
+
+    print("SUCCESS: Room stores round-trip rooms!")
+
+if __name__ == "__main__":
+    test_room_roundtrip_rebuilds_gate_state()
+    test_stores_against_local_standin()
@@ -0,0 +1,63 @@
+import asyncio
+
+from game_manager import GameManager
+from round_timers import NOT_LOCKOUT, ROUND_END, RoundTimers
+
+def test_deadlines_fire_once_in_order():
+    async def scenario():
+        fired = []
+
+        async def fire(room_id, kind):
+            fired.append((room_id, kind))
+
+        timers = RoundTimers(fire)
+
+        # 1. Restarting a round replaces its deadlines instead of adding a second timer
+        timers.schedule('r1', ROUND_END, 0.05)
+        timers.schedule('r1', NOT_LOCKOUT, 0.02)
+        timers.schedule('r1', ROUND_END, 0.06)
+        timers.schedule('r2', ROUND_END, 0.03)
+        assert len(timers.active) == 3
+
+        # 2. Deadlines of all rooms fire in order from one heap
+        await asyncio.sleep(0.1)
+        assert fired == [('r1', NOT_LOCKOUT), ('r2', ROUND_END), ('r1', ROUND_END)]
+        assert len(timers.active) == 0 and timers.handle is None
+
+        # 3. Cancelled deadlines never fire
+        timers.schedule('r3', ROUND_END, 0.02)
+        timers.cancel('r3')
+        assert len(timers.active) == 0
+        await asyncio.sleep(0.04)
+        assert len(fired) == 3 and timers.fired == 3
+
+    asyncio.run(scenario())
+
+def test_lockout_and_round_end():
+    gm = GameManager()
+    room = gm.create_room("timer-room")
+    gm.join_room("op", room.id, "Hacker", "operator")
+    gm.join_room("a1", room.id, "Alice", "player", "A")
+    gm.join_room("b1", room.id, "Bob", "player", "B")
+    gm.start_round(room.id, 30)
+
+    # 1. Before the lockout deadline players can still toggle NOT
+    room.logic_mode = 'open'
+    assert gm.toggle_not_gate("a1", "a1", room.id)
+    assert gm.lock_not_gates(room.id)
+    assert gm.toggle_not_gate("a1", "a1", room.id) is None
+
+    # 2. The round end deadline finishes the round once
+    assert gm.end_round(room.id) is room and room.state == 'FINISHED'
+    assert gm.end_round(room.id) is None
+    assert not gm.lock_not_gates(room.id)
+
+    # 3. A new round clears the lockout
+    gm.start_round(room.id, 30)
+    assert not room.not_gates_locked
+
+    print("SUCCESS: Round deadlines are scheduled centrally!")
+
+if __name__ == "__main__":
+    test_deadlines_fire_once_in_order()
+    test_lockout_and_round_end()
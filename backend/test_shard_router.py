@@ -0,0 +1,44 @@
+from shard_router import HashRing, ShardRouter
+
+ROOMS = [f"room-{i}" for i in range(2000)]
+
+def owners(ring):
+    return {room: ring.owner(room) for room in ROOMS}
+
+def test_ring_moves_only_the_rooms_that_change_owner():
+    ring = HashRing(["shard-0", "shard-1", "shard-2"])
+    before = owners(ring)
+
+    # 1. Same placement in every process (no salted hash())
+    assert owners(HashRing(["shard-2", "shard-0", "shard-1"])) == before
+
+    # 2. Every shard gets a fair share
+    for shard in ring.nodes:
+        assert 0.2 < list(before.values()).count(shard) / len(ROOMS) < 0.5
+
+    # 3. A new shard only takes rooms (~1/4 of them); nothing moves between old shards
+    ring.add("shard-3")
+    after = owners(ring)
+    moved = [room for room in ROOMS if after[room] != before[room]]
+    assert all(after[room] == "shard-3" for room in moved)
+    assert 0.15 < len(moved) / len(ROOMS) < 0.35
+
+    # 4. Removing it sends exactly those rooms back
+    ring.remove("shard-3")
+    assert owners(ring) == before
+    assert HashRing().owner("room-0") is None
+
+def test_events_follow_the_clients_room():
+    router = ShardRouter(sio=None)
+    assert router.room_for("s1", "clock_sync", [{'t0': 1}]) is None
+    assert router.room_for("s1", "get_room_info", [{'room_id': 'probe'}]) == 'probe'
+    assert router.room_for("s1", "player_input", [{'vote': 1}]) is None
+    assert router.room_for("s1", "join_game", [{'room_id': 'r1', 'name': 'A'}]) == 'r1'
+    assert router.room_for("s1", "player_input", [{'vote': 1}]) == 'r1'
+    assert router.room_for("s1", "voice_command", [b'audio']) == 'r1'
+
+    print("SUCCESS: Rooms are routed to their shard!")
+
+if __name__ == "__main__":
+    test_ring_moves_only_the_rooms_that_change_owner()
+    test_events_follow_the_clients_room()
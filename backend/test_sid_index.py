@@ -0,0 +1,60 @@
+from game_manager import GameManager
+
+def test_sid_index_tracks_join_and_leave():
+    gm = GameManager()
+    room_id = "index_room"
+    gm.join_room("op", room_id, "Hacker", "operator")
+    gm.join_room("p1", room_id, "P1", "player", "A")
+    gm.join_room("p2", room_id, "P2", "player", "B")
+
+    room = gm.rooms[room_id]
+
+    # 1. Lookups resolve without scanning
+    assert gm.locate("op") == (room, None, None)
+    r, team, player = gm.locate("p1")
+    assert r is room and team.id == 'A' and player.name == "P1"
+    assert gm.locate("ghost") == (None, None, None)
+
+    # 2. Team change moves the player instead of duplicating them
+    gm.join_room("p1", room_id, "P1", "player", "B")
+    assert "p1" not in room.teams['A'].players
+    assert gm.locate("p1")[1] is room.teams['B']
+
+    # 3. Leaving (disconnect/kick) clears the entry
+    assert gm.remove_player("p1") is room
+    assert gm.locate("p1") == (None, None, None)
+    assert "p1" not in room.teams['B'].players
+
+    gm.remove_player("op")
+    assert room.operator_sid is None
+    assert gm.locate("op") == (None, None, None)
+
+    # 4. Empty team removal keeps the index consistent
+    gm.remove_player("p2")
+    success, _ = gm.remove_team(room_id, 'B')
+    assert success
+    assert gm.sid_index == {}
+
+def test_sid_index_used_by_handlers():
+    gm = GameManager()
+    gm.join_room("p1", "r1", "P1", "player", "A")
+    gm.join_room("p2", "r2", "P2", "player", "A")
+
+    # Votes land in the right room even with several rooms open
+    assert gm.set_input("p2", 1) is gm.rooms["r2"]
+    assert gm.rooms["r2"].teams['A'].players["p2"].vote_value == 1
+    assert gm.rooms["r1"].teams['A'].players["p1"].vote_value is None
+
+    # Chat permission is scoped to the room the player is actually in
+    gm.toggle_team_chat("r1", 'A')
+    assert gm.can_chat("r1", "p1") == True
+    assert gm.can_chat("r2", "p1") == False
+
+    # NOT toggles refuse targets outside the requested room
+    assert gm.toggle_not_gate("p1", "p2", "r1") is None
+
+    print("SUCCESS: sid index lookups work!")
+
+if __name__ == "__main__":
+    test_sid_index_tracks_join_and_leave()
+    test_sid_index_used_by_handlers()
@@ -0,0 +1,92 @@
+import numpy as np
+
+import gate_kernel
+from game_manager import GameManager, GATE_LOGIC
+from simulator import (Behaviour, affordable_sabotages, enumerate_state_space, exact_solve_rate, gate_outputs,
+                       play_rounds, round_scores, settle_scores, solved_by_votes)
+
+def test_vectorized_gates_match_kernel():
+    for size in range(1, 6):
+        members = (1 << size) - 1
+        inputs = np.arange(members + 1, dtype=np.int64)
+        for gate in GATE_LOGIC:
+            expected = [gate_kernel.evaluate(gate, int(x), 0, members) for x in inputs]
+            assert gate_outputs(gate, inputs, members).tolist() == expected
+
+def test_state_space_matches_game_manager():
+    # Replay a sample of enumerated states through the real GameManager win check
+    size = 3
+    space = enumerate_state_space(size)
+    members = (1 << size) - 1
+    assert len(space['cards']) == 2 ** size * 2 ** size * 3 ** size
+
+    gm = GameManager()
+    room_id = "sim_room"
+    for i in range(size):
+        gm.join_room(f"p{i}", room_id, f"P{i}", "player", "A")
+    room = gm.rooms[room_id]
+    team = room.teams['A']
+    rng = np.random.default_rng(3)
+
+    for logic_mode in ('predict', 'open'):
+        room.logic_mode = logic_mode
+        for row in rng.choice(len(space['cards']), size=300, replace=False):
+            for i, player in enumerate(team.players.values()):
+                bit = 1 << i
+                player.card_value = 1 if space['cards'][row] & bit else 0
+                player.has_not_gate = bool(space['nots'][row] & bit)
+                if not space['voted'][row] & bit:
+                    player.vote_value = None
+                else:
+                    player.vote_value = 1 if space['vote_one'][row] & bit else 0
+            for gate in GATE_LOGIC:
+                team.current_gate = gate
+                out = gate_outputs(gate, np.array([(space['cards'][row] ^ space['nots'][row]) & members]), members)
+                assert bool(out[0]) == gm.check_gate_logic(team)
+                solved = solved_by_votes(out, space['voted'][row:row + 1], space['vote_one'][row:row + 1],
+                                         space['vote_zero'][row:row + 1], members, logic_mode)
+                assert bool(solved[0]) == team.is_solved(logic_mode)
+
+def test_scores_match_game_manager():
+    # Team A sabotages team B, then both finish the round; the simulator's scoring must agree
+    for start in (0, 4, 5, 5.5, 6, 9):
+        for wanted in range(4):
+            for a_solves in (True, False):
+                gm = GameManager()
+                room_id = "sim_scores"
+                for i in range(3):
+                    gm.join_room(f"a{i}", room_id, f"A{i}", "player", "A")
+                    gm.join_room(f"b{i}", room_id, f"B{i}", "player", "B")
+                room = gm.rooms[room_id]
+                a, b = room.teams['A'], room.teams['B']
+                a.score = start
+                gm.start_round(room_id)
+                applied = sum(gm.toggle_not_gate("a0", f"b{i}") is not None for i in range(wanted))
+                for team, solves in ((a, a_solves), (b, True)):
+                    out = int(team.gate_output())
+                    for sid in team.players:
+                        gm.cast_vote(sid, out if solves else 1 - out)
+                gm.end_round(room_id)
+
+                spent = affordable_sabotages(np.array([start]), wanted)
+                assert spent[0] == applied, (start, wanted)
+                a_total = round_scores(a.current_gate, np.array([a_solves]), False)
+                assert settle_scores(np.array([start]), a_total, spent)[0] == a.score, (start, wanted, a_solves)
+                b_total = round_scores(b.current_gate, np.array([True]), applied > 0)
+                assert settle_scores(np.zeros(1), b_total, np.zeros(1))[0] == b.score
+
+def test_monte_carlo_converges_to_exact():
+    behaviour = Behaviour()
+    rng = np.random.default_rng(11)
+    for logic_mode in ('predict', 'open'):
+        solved, _ = play_rounds('XNOR', 4, 400_000, 1, behaviour, logic_mode, rng)
+        exact = exact_solve_rate('XNOR', 4, 1, behaviour, logic_mode)
+        assert abs(solved.mean() - exact) < 0.005
+
+    print("SUCCESS: Simulator agrees with GameManager rules!")
+
+if __name__ == "__main__":
+    test_vectorized_gates_match_kernel()
+    test_state_space_matches_game_manager()
+    test_scores_match_game_manager()
+    test_monte_carlo_converges_to_exact()
@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import os
+import tempfile
+
+from card_images import CardImageStore
+from game_manager import GameManager
+from room_state import serialize_team
+from snapshots import SnapshotWriter, read_snapshot
+
+def build_manager():
+    gm = GameManager()
+    for r in range(3):
+        room_id = f"snap-{r}"
+        gm.join_room(f"op{r}", room_id, "Hacker", "operator")
+        for i, tid in enumerate("AB"):
+            gm.join_room(f"p{r}{i}", room_id, f"Player {i}", "player", tid)
+        gm.toggle_team_chat(room_id, "A")
+        gm.post_chat(room_id, f"p{r}0", "hola")
+    gm.start_round("snap-0", 30)
+    gm.rooms["snap-1"].teams["B"].score = 7
+    return gm
+
+def test_only_changed_rooms_are_reencoded():
+    async def scenario():
+        gm = build_manager()
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SnapshotWriter(os.path.join(tmp, "rooms.snapshot"))
+            await writer.save(gm.rooms)
+            assert writer.encoded == 3
+
+            await writer.save(gm.rooms)
+            assert writer.encoded == 3  # Nothing moved: all from the cache
+
+            gm.set_input("p00", 1)
+            gm.post_chat("snap-2", "p20", "again")  # Chat doesn't move Team._rev but is in the snapshot
+            await writer.save(gm.rooms)
+            assert writer.encoded == 5
+
+            rooms, _ = read_snapshot(writer.path)
+            by_id = {room.id: room for room in rooms}
+            assert by_id["snap-0"].teams["A"].players["p00"].vote_value == 1
+            assert len(by_id["snap-2"].teams["A"].chat_history) == 2
+            assert not os.path.exists(writer.path + ".tmp")
+    asyncio.run(scenario())
+
+def test_restore_keeps_game_and_vacates_seats():
+    async def scenario():
+        gm = build_manager()
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SnapshotWriter(os.path.join(tmp, "rooms.snapshot"))
+            await writer.save(gm.rooms)
+
+            restored = {room.id: room for room in SnapshotWriter(writer.path).restore()}
+            room = restored["snap-0"]
+            assert room.state == "PLAYING" and room.current_round_end_time == gm.rooms["snap-0"].current_round_end_time
+            assert room.operator_sid is None and not any(team.players for team in room.teams.values())
+            assert restored["snap-1"].teams["B"].score == 7
+            assert serialize_team(room.teams["A"])["chat_enabled"]
+
+            # Old sids are gone, so a rejoin takes a fresh seat in the restored room
+            fresh = GameManager()
+            for room in restored.values():
+                assert fresh.adopt_room(room)
+            assert fresh.join_room("new-sid", "snap-1", "Back", "player", "B")[0]
+            assert fresh.rooms["snap-1"].teams["B"].score == 7
+
+            # A damaged file is ignored rather than crashing startup
+            with open(writer.path, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"\x00")
+            assert SnapshotWriter(writer.path).restore() == []
+    asyncio.run(scenario())
+
+def test_card_images_are_kept_next_to_the_snapshot():
+    async def scenario():
+        gm = build_manager()
+        images = CardImageStore()
+        png = b'\x89PNG\r\n\x1a\n' + b'\x07' * 8
+        digest = images.put(base64.b64encode(png).decode(), "snap-1")
+        gm.set_custom_card("snap-1", "0", digest)
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SnapshotWriter(os.path.join(tmp, "rooms.snapshot"), images=images)
+            await writer.save(gm.rooms)
+            assert os.listdir(writer.image_dir) == [digest]
+
+            # After a restart the restored room gets its image back
+            restarted = SnapshotWriter(writer.path)
+            restored = {room.id: room for room in restarted.restore()}
+            assert restarted.card_images(restored["snap-1"]) == {digest: ('image/png', png)}
+            assert restarted.card_images(restored["snap-0"]) == {}
+
+            # An image no room shows any more leaves with the next snapshot
+            gm.set_custom_card("snap-1", "0", None)
+            images.release("snap-1")
+            await writer.save(gm.rooms)
+            assert os.listdir(writer.image_dir) == []
+    asyncio.run(scenario())
+    print("SUCCESS: snapshots are incremental, atomic and restore the game without stale seats")
+
+if __name__ == "__main__":
+    test_only_changed_rooms_are_reencoded()
+    test_restore_keeps_game_and_vacates_seats()
+    test_card_images_are_kept_next_to_the_snapshot()
@@ -0,0 +1,29 @@
+from game_manager import CHAT_HISTORY_SIZE, GameManager
+
+def test_chat_history_is_bounded_per_team():
+    gm = GameManager()
+    room = gm.create_room("chat-room")
+    gm.join_room("op", room.id, "Hacker", "operator")
+    gm.join_room("a1", room.id, "Alice", "player", "A")
+    gm.join_room("b1", room.id, "Bob", "player", "B")
+
+    # 1. Chat is off by default
+    assert gm.post_chat(room.id, "a1", "hola") == (None, None)
+
+    # 2. Only the enabled team keeps history
+    gm.toggle_team_chat(room.id, "A")
+    for i in range(CHAT_HISTORY_SIZE + 10):
+        team, message = gm.post_chat(room.id, "a1", f"msg {i}")
+    assert team.id == "A" and message['sender'] == "Alice" and message['sender_sid'] == "a1"
+    assert gm.post_chat(room.id, "b1", "hi") == (None, None)
+
+    # 3. The ring buffer keeps the most recent messages only
+    history = list(room.teams["A"].chat_history)
+    assert len(history) == CHAT_HISTORY_SIZE
+    assert history[0]['text'] == "msg 10" and history[-1]['text'] == f"msg {CHAT_HISTORY_SIZE + 9}"
+    assert not room.teams["B"].chat_history
+
+    print("SUCCESS: Team chat history is bounded!")
+
+if __name__ == "__main__":
+    test_chat_history_is_bounded_per_team()
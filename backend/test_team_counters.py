@@ -0,0 +1,69 @@
+import random
+from game_manager import GameManager, GATE_LOGIC
+
+def brute_force_output(team):
+    inputs = [bool(p.card_value) != p.has_not_gate for p in team.players.values()]
+    return GATE_LOGIC.get(team.current_gate, GATE_LOGIC['AND'])(inputs)
+
+def test_counters_follow_every_mutation():
+    gm = GameManager()
+    room_id = "counter_room"
+    gm.join_room("op", room_id, "Hacker", "operator")
+    for i in range(3):
+        gm.join_room(f"a{i}", room_id, f"A{i}", "player", "A")
+        gm.join_room(f"b{i}", room_id, f"B{i}", "player", "B")
+    room = gm.rooms[room_id]
+    room.logic_mode = 'open'
+    rng = random.Random(7)
+
+    for _ in range(200):
+        action = rng.choice(['round', 'vote', 'not', 'leave', 'join', 'gate'])
+        sid = rng.choice([f"{t}{i}" for t in "ab" for i in range(3)])
+        if action == 'round':
+            gm.start_round(room_id, 30)
+        elif action == 'vote':
+            gm.set_input(sid, rng.choice([0, 1]))
+        elif action == 'not':
+            gm.toggle_not_gate("op", sid, room_id)
+        elif action == 'leave':
+            gm.remove_player(sid)
+        elif action == 'join':
+            gm.join_room(sid, room_id, sid.upper(), "player", sid[0].upper())
+        else:
+            for team in room.teams.values():
+                team.current_gate = rng.choice(list(GATE_LOGIC))
+
+        for team in room.teams.values():
+            players = list(team.players.values())
+            assert team.ones_count == sum(bool(p.card_value) != p.has_not_gate for p in players)
+            assert team.pending_votes == sum(p.vote_value is None for p in players)
+            assert team.votes_one == sum(p.vote_value == 1 for p in players)
+            assert team.gate_output() == brute_force_output(team)
+
+def test_check_logic_reports_all_solved_teams():
+    gm = GameManager()
+    room_id = "multi_room"
+    gm.join_room("a1", room_id, "A1", "player", "A")
+    gm.join_room("b1", room_id, "B1", "player", "B")
+    gm.start_round(room_id, 30)
+    room = gm.rooms[room_id]
+
+    # AND gate, both teams hold a single 1 card and vote 1
+    for team in room.teams.values():
+        for player in team.players.values():
+            player.card_value = 1
+            player.vote_value = 1
+
+    # Re-checking only team A leaves team B untouched
+    assert [t.id for t in gm.check_logic(room_id, 'A')] == ['A']
+    assert room.teams['B'].solved_current_round == False
+
+    room.teams['A'].solved_current_round = False
+    solved = gm.check_logic(room_id)
+    assert sorted(t.id for t in solved) == ['A', 'B']
+
+    print("SUCCESS: Incremental team counters work!")
+
+if __name__ == "__main__":
+    test_counters_follow_every_mutation()
+    test_check_logic_reports_all_solved_teams()
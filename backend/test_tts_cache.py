@@ -0,0 +1,78 @@
+import asyncio
+import os
+import tempfile
+
+from tts_cache import TTSCache, cache_key
+
+def test_phrases_are_synthesized_once():
+    async def scenario():
+        with tempfile.TemporaryDirectory() as tmp:
+            calls = []
+
+            async def synthesize(text):
+                calls.append(text)
+                await asyncio.sleep(0.01)  # The TTS round trip
+                return f"audio:{text}".encode() * 10
+
+            cache = TTSCache(tmp, memory_bytes=300, disk_bytes=400)
+            # Concurrent identical requests share one synthesis; spacing doesn't change the phrase
+            first = await asyncio.gather(*(cache.get("edge", "alvaro", text, lambda: synthesize("Voted 1"))
+                                           for text in ("Voted 1", "  Voted  1", "Voted 1\n")))
+            assert calls == ["Voted 1"] and len(set(first)) == 1 and cache.shared == 2
+            assert await cache.get("edge", "alvaro", "Voted 1", lambda: synthesize("x")) == first[0]
+            # Another voice or engine is another entry
+            await cache.get("edge", "nova", "Voted 1", lambda: synthesize("Voted 1"))
+            assert calls == ["Voted 1", "Voted 1"] and (cache.hits, cache.misses) == (1, 2)
+
+            # Memory keeps the most recent phrases; older ones come back from disk (bounded too)
+            for text in ("a", "b", "c"):
+                await cache.get("edge", "alvaro", text, lambda: synthesize(text))
+            assert cache.memory_size <= 300 and cache.disk_size <= 400
+            assert len(os.listdir(tmp)) == len(cache.disk) < 5
+            assert cache_key("edge", "nova", "Voted 1") not in cache.memory
+            audio = await cache.get("edge", "nova", "Voted 1", lambda: synthesize("never"))
+            assert audio == b"audio:Voted 1" * 10 and cache.disk_hits == 1 and "never" not in calls
+
+            # A restart finds the disk tier; failed syntheses aren't cached
+            restarted = TTSCache(tmp, memory_bytes=300, disk_bytes=400)
+            assert await restarted.get("edge", "alvaro", "c", lambda: synthesize("never")) == b"audio:c" * 10
+            assert restarted.stats()["disk_hits"] == 1 and f"{cache_key('edge', 'alvaro', 'c')}.audio" in os.listdir(tmp)
+
+            async def failing():
+                raise ConnectionError("TTS down")
+            for _ in range(2):
+                try:
+                    await restarted.get("openai", "nova", "hola", failing)
+                    assert False
+                except ConnectionError:
+                    pass
+            assert restarted.misses == 2
+    asyncio.run(scenario())
+
+def test_stream_forwards_chunks_as_produced():
+    async def scenario():
+        cache = TTSCache("", memory_bytes=1 << 20)
+        produced = []
+
+        async def chunks():
+            for i in range(3):
+                await asyncio.sleep(0.05)  # The engine synthesizing the next piece
+                produced.append(i)
+                yield f"chunk{i}".encode()
+
+        # The first chunk arrives while the rest is still being synthesized
+        first_listener = cache.stream("edge", "alvaro", "Hola", chunks)
+        assert await first_listener.__anext__() == b"chunk0" and produced == [0]
+        # An identical request meanwhile waits for the whole clip instead of synthesizing it again
+        second = asyncio.ensure_future(cache.get("edge", "alvaro", "Hola", lambda: None))
+        assert [chunk async for chunk in first_listener] == [b"chunk1", b"chunk2"]
+        assert await second == b"chunk0chunk1chunk2" and produced == [0, 1, 2]
+        # Cached: one piece, no synthesis
+        assert [chunk async for chunk in cache.stream("edge", "alvaro", "Hola", chunks)] == [b"chunk0chunk1chunk2"]
+        assert (cache.misses, cache.shared, cache.hits) == (1, 1, 1)
+    asyncio.run(scenario())
+    print("SUCCESS: repeated phrases are served from memory or disk, synthesized once, and streamed as produced")
+
+if __name__ == "__main__":
+    test_phrases_are_synthesized_once()
+    test_stream_forwards_chunks_as_produced()
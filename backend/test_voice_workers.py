@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+
+from voice_workers import VoicePool, VoiceWorkerError
+
+def fake_voice_jobs():
+    """Stand-in for voice_jobs: a blocking 'transcription', an async call, an error and a crash"""
+    async def reply(text):
+        await asyncio.sleep(0.2)  # An API round trip
+        return f"echo {text}"
+
+    def fail():
+        raise RuntimeError("no audio")
+
+    return {
+        'transcribe': lambda seconds: time.sleep(seconds) or os.getpid(),
+        'reply': reply,
+        'fail': fail,
+        'crash': lambda: os._exit(3),
+    }
+
+def test_voice_jobs_run_off_the_event_loop():
+    async def scenario():
+        pool = VoicePool(workers=2, setup=fake_voice_jobs, timeout=10)
+        pool.start()
+        try:
+            # A blocking job doesn't hold up the loop
+            ticks = 0
+            job = asyncio.ensure_future(pool.submit('transcribe', 0.5))
+            while not job.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert job.result() != os.getpid() and ticks > 20
+
+            # A worker serves its jobs concurrently; keyed jobs stick to one worker
+            started = time.perf_counter()
+            assert await asyncio.gather(*(pool.submit('reply', n, key="sid_hero") for n in range(3))) == \
+                ["echo 0", "echo 1", "echo 2"]
+            assert time.perf_counter() - started < 0.5
+            pids = {await pool.submit('transcribe', 0, key="sid_hero") for _ in range(3)}
+            assert len(pids) == 1
+
+            try:
+                await pool.submit('fail')
+                assert False
+            except VoiceWorkerError as e:
+                assert "no audio" in str(e)
+
+            # A dead worker fails its jobs and is replaced
+            try:
+                await pool.submit('crash', key="sid_hero")
+                assert False
+            except VoiceWorkerError:
+                pass
+            new_pid = await pool.submit('transcribe', 0, key="sid_hero")
+            assert new_pid not in pids
+
+            stats = pool.stats()
+            assert stats['alive'] == stats['ready'] == 2 and stats['jobs']['reply']['count'] == 3 and stats['failed'] >= 1
+        finally:
+            await pool.close()
+    asyncio.run(scenario())
+    print("SUCCESS: voice jobs run in worker processes, concurrently, and survive a dead worker")
+
+if __name__ == "__main__":
+    test_voice_jobs_run_off_the_event_loop()
@@ -0,0 +1,35 @@
+from socketio import packet
+
+import wire
+
+def test_msgpack_is_opt_in():
+    payload = {'id': 'r', 'teams': {'A': {'score': 1.5, 'players': {}}}, 'operator': None}
+
+    # 1. Server mode off: everyone stays on JSON
+    formats = wire.WireFormats(enabled=False)
+    assert formats.register("s1", {'wire': 'msgpack'}) == 'json'
+    assert formats.encode_for("s1", 'game_state', payload) is payload
+
+    # 2. Server mode on: only clients that ask get msgpack, and only for heavy events
+    formats = wire.WireFormats(enabled=True)
+    assert formats.register("s1", {'wire': 'msgpack'}) == 'msgpack'
+    assert formats.register("s2", None) == 'json'
+    assert wire.unpack(formats.encode_for("s1", 'game_state', payload)) == payload
+    assert formats.encode_for("s1", 'round_end', payload) is payload
+    assert formats.encode_for("s2", 'game_state', payload) is payload
+    formats.forget("s1")
+    assert not formats.is_binary("s1")
+
+def test_orjson_codec_in_socketio_packets():
+    class OrjsonPacket(packet.Packet):
+        json = wire.OrjsonCodec
+
+    encoded = OrjsonPacket(packet.EVENT, data=['game_state', {'a': [1, None, 'ñ']}], namespace='/').encode()
+    decoded = OrjsonPacket(encoded_packet=encoded)
+    assert decoded.data == ['game_state', {'a': [1, None, 'ñ']}]
+
+    print("SUCCESS: Wire formats round-trip!")
+
+if __name__ == "__main__":
+    test_msgpack_is_opt_in()
+    test_orjson_codec_in_socketio_packets()
@@ -0,0 +1,200 @@
+"""
+TTS Cache - Synthesized speech, kept in memory and on disk
+
+Many spoken responses repeat word for word (confirmations, refusals,
+instruction readings). Audio is cached under (engine, voice, normalized text):
+
+- Memory: LRU bounded by TTS_CACHE_MEMORY_BYTES.
+- Disk: one file per phrase under TTS_CACHE_DIR, bounded by
+  TTS_CACHE_DISK_BYTES (least recently used files go first; the order
+  survives restarts through file mtimes). Voice worker processes share it.
+  Empty TTS_CACHE_DIR: memory only.
+
+Concurrent requests for the same phrase share one synthesis. Failed or empty
+syntheses aren't cached. stream() hands out the audio while it is being
+synthesized (see speech).
+"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', 'tts_cache')
+TTS_CACHE_MEMORY_BYTES = int(os.getenv('TTS_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv('TTS_CACHE_DISK_BYTES', str(512 * 1024 * 1024)))
+
+_SPACES = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Spoken the same -> same key: Unicode form and whitespace don't matter (case and punctuation do)"""
+    return _SPACES.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+def cache_key(engine: str, voice: str, text: str) -> str:
+    return hashlib.sha256(f"{engine}\0{voice}\0{normalize_text(text)}".encode()).hexdigest()
+
+class TTSCache:
+    def __init__(self, directory: str = TTS_CACHE_DIR, memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = TTS_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self.memory: 'OrderedDict[str, bytes]' = OrderedDict()  # Least recently used first
+        self.memory_size = 0
+        self.disk: Optional['OrderedDict[str, int]'] = None  # key -> file size, least recently used first (loaded lazily)
+        self.disk_size = 0
+        self.disk_lock = threading.Lock()  # Several file operations can run in threads at once
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.shared = 0  # Requests that waited on an identical synthesis in flight
+
+    async def get(self, engine: str, voice: str, text: str, synthesize: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Cached audio for the phrase, or synthesize() it once (its exceptions reach every caller waiting on it)"""
+        async def produce():
+            yield await synthesize()
+        return b"".join([chunk async for chunk in self.stream(engine, voice, text, produce)])
+
+    async def stream(self, engine: str, voice: str, text: str,
+                     produce: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        The phrase's audio as chunks: a cached clip in one piece, or produce()'s chunks as they come
+        (kept once complete). Identical requests meanwhile wait for the whole clip.
+        """
+        key = cache_key(engine, voice, text)
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            yield audio
+            return
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            self.shared += 1
+            audio = await asyncio.shield(inflight)
+            if audio:
+                yield audio
+            return
+
+        future = self.inflight[key] = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.exception())  # Nobody else waiting is fine
+        try:
+            audio = await self._read_disk(key) if self.directory else None
+            if audio is not None:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                future.set_result(audio)
+                yield audio
+                return
+            self.misses += 1
+            chunks = []
+            async for chunk in produce():
+                chunks.append(chunk)
+                yield chunk
+            audio = b"".join(chunks)
+            if audio:
+                if self.directory:
+                    await self._write_disk(key, audio)
+                self._remember(key, audio)
+            future.set_result(audio)
+        except BaseException as e:
+            if not future.done():
+                # Failed, cancelled, or the consumer stopped reading: waiters get an error
+                future.set_exception(e if isinstance(e, Exception) else ConnectionAbortedError("TTS request abandoned"))
+            raise
+        finally:
+            del self.inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory_size,
+            'disk_entries': len(self.disk or ()),
+            'disk_bytes': self.disk_size,
+        }
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_limit:
+            return
+        self.memory[key] = audio
+        self.memory_size += len(audio)
+        while self.memory_size > self.memory_limit:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    # --- Disk tier (file work runs in a thread)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.audio")
+
+    async def _read_disk(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read_file, key)
+
+    async def _write_disk(self, key: str, audio: bytes):
+        try:
+            await asyncio.to_thread(self._write_file, key, audio)
+        except OSError as e:
+            print(f"[TTS CACHE] Could not write to disk: {e}")
+
+    def _load_index(self):
+        # Existing files, least recently used first
+        self.disk = OrderedDict()
+        os.makedirs(self.directory, exist_ok=True)
+        self.disk_size = 0
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.audio'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len('.audio')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_size += size
+
+    def _read_file(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                audio = f.read()
+            os.utime(self._path(key))  # Recently used (another worker may have written it)
+        except FileNotFoundError:
+            return None
+        with self.disk_lock:
+            if self.disk is None:
+                self._load_index()
+            self.disk_size += len(audio) - self.disk.pop(key, 0)
+            self.disk[key] = len(audio)
+        return audio
+
+    def _write_file(self, key: str, audio: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(audio)
+        os.replace(temp, path)  # Readers never see a partial file
+        with self.disk_lock:
+            if self.disk is None:
+                self._load_index()
+            self.disk_size += len(audio) - self.disk.pop(key, 0)
+            self.disk[key] = len(audio)
+            evicted = []
+            while self.disk_size > self.disk_limit and len(self.disk) > 1:
+                oldest, size = self.disk.popitem(last=False)
+                self.disk_size -= size
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(self._path(oldest))
+            except FileNotFoundError:
+                pass
+
+# Shared by every voice manager of the process
+tts_cache = TTSCache()
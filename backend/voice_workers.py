@@ -0,0 +1,230 @@
+"""
+Voice Workers - Optional process pool for the voice pipeline
+
+With VOICE_WORKERS > 0, speech-to-text (Whisper API, falling back to the local
+Whisper model), text-to-speech plus its base64 encoding, and the whole AI
+Assistant chat (STT, moderation, agent, TTS) run in that many separate
+processes instead of on the game's event loop, so game latency doesn't depend
+on voice load. 0 (the default) keeps the pipeline in-process.
+
+    game process                          worker process (one of N)
+    submit(kind, *args) --job queue-->    handlers[kind](*args) on its own loop
+    future resolved     <--results---     (job id, ok, value)
+
+Each worker builds the voice managers once when it starts (and loads the local
+Whisper model if the package is installed), then runs its jobs concurrently.
+Jobs with a key (an assistant conversation) always go to the same worker,
+which holds that conversation's memory; other jobs go to the least busy one.
+The accessibility agent stays in the game process: its tools change rooms and
+emit to sockets.
+"""
+import asyncio
+import base64
+import inspect
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+VOICE_WORKERS = int(os.getenv('VOICE_WORKERS', '0'))
+VOICE_JOB_TIMEOUT = float(os.getenv('VOICE_JOB_TIMEOUT', '60'))
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')  # Local STT fallback, preloaded per worker ('' skips it)
+WATCH_INTERVAL = 1.0  # Seconds between checks for dead workers
+
+class VoiceWorkerError(Exception):
+    """A job raised in its worker, or its worker died"""
+
+# --- Worker process
+
+def voice_jobs() -> Dict[str, Callable]:
+    """Job handlers by kind, built once per worker (the default setup)"""
+    from accessibility import AccessibilityManager
+    from assistant_logic import AssistantManager
+    from tts_cache import tts_cache
+
+    speech = AccessibilityManager(None, None, None, None)  # No game here: only its STT / TTS are used
+    assistant = AssistantManager(None)
+    if WHISPER_MODEL:
+        try:
+            import whisper
+            speech.local_whisper_model = whisper.load_model(WHISPER_MODEL)
+        except ImportError:
+            print("[VOICE] Local whisper not installed: STT relies on the API")
+
+    async def speak(text: str) -> str:
+        return base64.b64encode(await speech.tts(text)).decode('utf-8')
+
+    async def assistant_chat(sid: str, character_key: str, character: Optional[dict],
+                             audio_bytes: Optional[bytes], text_input: Optional[str]):
+        if character and assistant.characters.get(character_key) != character:
+            # Added or edited in the game process since this worker started
+            assistant.characters[character_key] = character
+            assistant.agents.pop(character_key, None)
+        return await assistant.process_chat(sid, character_key, audio_bytes=audio_bytes, text_input=text_input)
+
+    return {'stt': speech.stt, 'speak': speak, 'assistant_chat': assistant_chat, 'tts_cache_stats': tts_cache.stats}
+
+def _worker_main(setup: Callable[[], Dict[str, Callable]], jobs, results, index: int):
+    handlers = setup()
+    results.put((None, True, index))  # Ready
+    asyncio.run(_serve_jobs(handlers, jobs, results))
+
+async def _serve_jobs(handlers: Dict[str, Callable], jobs, results):
+    running = set()
+
+    async def run(job_id: int, kind: str, args: tuple):
+        try:
+            value = handlers[kind](*args)
+            if inspect.isawaitable(value):
+                value = await value
+        except Exception as e:
+            results.put((job_id, False, f"{type(e).__name__}: {e}"))
+        else:
+            results.put((job_id, True, value))
+
+    while True:
+        job = await asyncio.to_thread(jobs.get)
+        if job is None:
+            break
+        task = asyncio.create_task(run(*job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    if running:
+        await asyncio.wait(running)
+
+# --- Game process
+
+class VoicePool:
+    def __init__(self, workers: int = VOICE_WORKERS, setup: Callable[[], Dict[str, Callable]] = voice_jobs,
+                 timeout: float = VOICE_JOB_TIMEOUT):
+        self.size = workers
+        self.setup = setup  # Module-level function: it is pickled into each worker
+        self.timeout = timeout
+        self.context = multiprocessing.get_context('spawn')  # Fresh interpreters: none of the server's loop or sockets
+        self.processes: List[Any] = []
+        self.queues: List[Any] = []
+        self.load: List[int] = []  # Jobs in flight per worker
+        self.results = None
+        self.reader: Optional[threading.Thread] = None
+        self.watcher: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.pending: Dict[int, Tuple[asyncio.Future, int]] = {}
+        self.ids = itertools.count()
+        self.ready: Set[int] = set()  # Workers that reported their models loaded
+        # Metrics
+        self.failed = 0
+        self.timings: Dict[str, List[float]] = {}  # kind -> [jobs, seconds]
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.results = self.context.Queue()
+        for index in range(self.size):
+            self._spawn(index)
+        self.reader = threading.Thread(target=self._read_results, name='voice-results', daemon=True)
+        self.reader.start()
+        self.watcher = asyncio.create_task(self._watch())
+
+    async def submit(self, kind: str, *args, key: Optional[str] = None, worker: Optional[int] = None) -> Any:
+        """Run a job in a worker and return its result (VoiceWorkerError / TimeoutError if it fails)"""
+        if worker is not None:
+            index = worker
+        elif key is not None:
+            index = zlib.crc32(key.encode()) % self.size
+        else:
+            index = min(range(self.size), key=self.load.__getitem__)
+        if not self.processes[index].is_alive():
+            self._respawn(index)
+        job_id = next(self.ids)
+        future = self.loop.create_future()
+        self.pending[job_id] = (future, index)
+        self.load[index] += 1
+        started = time.perf_counter()
+        try:
+            self.queues[index].put((job_id, kind, args))
+            return await asyncio.wait_for(future, self.timeout)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            del self.pending[job_id]
+            self.load[index] -= 1
+            timing = self.timings.setdefault(kind, [0, 0.0])
+            timing[0] += 1
+            timing[1] += time.perf_counter() - started
+
+    async def close(self):
+        self.watcher.cancel()
+        for jobs in self.queues:
+            jobs.put(None)
+        await asyncio.to_thread(self._join)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.size,
+            'alive': sum(process.is_alive() for process in self.processes),
+            'ready': len(self.ready),
+            'in_flight': list(self.load),
+            'failed': self.failed,
+            'jobs': {kind: {'count': count, 'mean_ms': round(total / count * 1000, 1)}
+                     for kind, (count, total) in self.timings.items()},
+        }
+
+    def _spawn(self, index: int):
+        jobs = self.context.Queue()
+        process = self.context.Process(target=_worker_main, args=(self.setup, jobs, self.results, index),
+                                       name=f"voice-worker-{index}", daemon=True)
+        process.start()
+        if index < len(self.processes):
+            self.processes[index], self.queues[index] = process, jobs
+        else:
+            self.processes.append(process)
+            self.queues.append(jobs)
+            self.load.append(0)
+
+    def _respawn(self, index: int):
+        print(f"[VOICE] Worker {index} died (exit code {self.processes[index].exitcode}), restarting it")
+        for future, worker in self.pending.values():
+            if worker == index and not future.done():
+                future.set_exception(VoiceWorkerError(f"voice worker {index} died"))
+        self.ready.discard(index)  # Only if it got that far
+        self._spawn(index)
+
+    async def _watch(self):
+        # A dead worker fails its jobs right away and is replaced (model loaded) before the next one
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if not process.is_alive():
+                    self._respawn(index)
+
+    def _read_results(self):
+        # Reader thread: hand each result to the event loop
+        while True:
+            message = self.results.get()
+            if message is None:
+                return
+            self.loop.call_soon_threadsafe(self._resolve, *message)
+
+    def _resolve(self, job_id: Optional[int], ok: bool, value: Any):
+        if job_id is None:
+            self.ready.add(value)
+            print(f"[VOICE] Worker {value} ready ({len(self.ready)}/{self.size})")
+            return
+        entry = self.pending.get(job_id)
+        if entry is None or entry[0].done():
+            return  # Timed out (or its worker was restarted) meanwhile
+        if ok:
+            entry[0].set_result(value)
+        else:
+            entry[0].set_exception(VoiceWorkerError(value))
+
+    def _join(self):
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self.results.put(None)
+        self.reader.join()
@@ -0,0 +1,65 @@
+"""
+Wire - Payload encodings for Socket.IO events
+
+Old clients get every event as JSON (encoded with orjson instead of the
+stdlib). Clients that connect with auth {'wire': 'msgpack'} get the heavy
+events (BINARY_EVENTS) as a msgpack blob instead, which Socket.IO's default
+parser carries as a binary attachment, so neither side needs a custom packet
+parser and both kinds of client can share a server. Opt-in is honoured only
+when the server runs with SOCKETIO_MSGPACK=1.
+"""
+import os
+from typing import Any, Optional, Set
+
+import orjson
+import ormsgpack
+
+ENABLED = os.getenv('SOCKETIO_MSGPACK', '0') == '1'
+
+# Events whose payload goes out as msgpack for binary clients
+BINARY_EVENTS = {'game_state', 'game_state_delta', 'voice_response', 'assistant_response'}
+
+MSGPACK = 'msgpack'
+BINARY_ROOM_SUFFIX = ':msgpack'  # Sub-room of binary clients, e.g. 'demo-room:team:A:msgpack'
+
+def pack(payload: Any) -> bytes:
+    return ormsgpack.packb(payload, option=ormsgpack.OPT_NON_STR_KEYS)
+
+def unpack(data: bytes) -> Any:
+    return ormsgpack.unpackb(data)
+
+class OrjsonCodec:
+    """Drop-in for the `json` module as python-socketio uses it (dumps(obj, separators=...) -> str)"""
+
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+class WireFormats:
+    """Which connected clients asked for msgpack payloads"""
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.binary_sids: Set[str] = set()
+
+    def register(self, sid: str, auth: Optional[dict]) -> str:
+        """Called on connect; returns the format the client will get"""
+        if self.enabled and isinstance(auth, dict) and auth.get('wire') == MSGPACK:
+            self.binary_sids.add(sid)
+            return MSGPACK
+        return 'json'
+
+    def forget(self, sid: str):
+        self.binary_sids.discard(sid)
+
+    def is_binary(self, sid: str) -> bool:
+        return sid in self.binary_sids
+
+    def encode_for(self, sid: str, event: str, payload: Any) -> Any:
+        if event in BINARY_EVENTS and sid in self.binary_sids:
+            return pack(payload)
+        return payload
@@ -2,6 +2,8 @@ import { useState, useEffect } from 'react';
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom';
 import { SocketProvider, useSocket } from './context/SocketContext';
 import { useGameStore } from './store/gameStore';
+import { applyDelta } from './utils/stateDelta';
+import { decodePayload } from './utils/msgpack';
 import Lobby from './components/Lobby';
 import GameArena from './components/GameArena';
 import InstructionsPage from './pages/InstructionsPage';
@@ -22,8 +24,7 @@ const GameContent = () => {
       console.log(`[SOCKET DEBUG] Incoming event: ${event}`, args);
     });
 
-    socket.on('game_state', (state) => {
-      console.log('Received Game State:', state);
+    const handleGameState = (state) => {
       setGameState(state);
 
       // Auto-detect player info from game_state (for voice join)
@@ -57,6 +58,40 @@ const GameContent = () => {
       }
 
       setInGame(true);
+    };
+
+    // Full snapshot: on join, on resync, or a room's first broadcast
+    let resyncRequested = false;
+    socket.on('game_state', (payload) => {
+      const state = decodePayload(payload);
+      console.log('Received Game State:', state);
+      resyncRequested = false;
+      handleGameState(state);
+    });
+
+    // Compact diff against the previous version; ask for a snapshot if we missed one
+    socket.on('game_state_delta', (payload) => {
+      const delta = decodePayload(payload);
+      const current = useGameStore.getState().gameState;
+      if (!current || current.id !== delta.room_id || delta.version <= current.version) {
+        return; // Our join snapshot is still on its way, or already covers this delta
+      }
+      if (current.version !== delta.base) {
+        if (!resyncRequested) {
+          console.log('[STATE] Version gap, requesting resync', current?.version, delta.base);
+          resyncRequested = true;
+          socket.emit('resync_state', { room_id: delta.room_id });
+        }
+        return;
+      }
+      handleGameState({ ...applyDelta(current, delta.changes), version: delta.version });
+    });
+
+    // The server evicted our room (idle too long): back to the lobby
+    socket.on('room_closed', (data) => {
+      console.log('[ROOM] Closed:', data?.message);
+      setGameState(null);
+      setInGame(false);
     });
 
     // Handle agent actions globally (for Lobby form filling)
@@ -72,6 +107,8 @@ const GameContent = () => {
 
     return () => {
       socket.off('game_state');
+      socket.off('game_state_delta');
+      socket.off('room_closed');
       socket.off('agent_action_client');
     };
   }, [socket, setGameState, setPlayer]);
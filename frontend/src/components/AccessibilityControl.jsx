@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Button, Spinner } from 'react-bootstrap';
 import { useSocket } from '../context/SocketContext';
 import { useGameStore } from '../store/gameStore';
+import { decodePayload } from '../utils/msgpack';
+import { createAudioStreams } from '../utils/audioStream';
 
 const AccessibilityControl = () => {
     const { socket } = useSocket();
@@ -17,12 +19,12 @@ const AccessibilityControl = () => {
     const mediaRecorderRef = useRef(null);
     const isPressedRef = useRef(false);
     const lastNarratedRoundRef = useRef(-1);
-    const lastNotGatesRef = useRef({});
 
     useEffect(() => {
         if (!socket) return;
 
-        socket.on('voice_response', (data) => {
+        socket.on('voice_response', (payload) => {
+            const data = decodePayload(payload);
             console.log("Voice Response:", data);
             setProcessing(false);
             if (data.text) {
@@ -35,8 +37,12 @@ const AccessibilityControl = () => {
             }
         });
 
+        // Audio of responses asked for with stream: true, played as it arrives
+        socket.on('voice_audio', createAudioStreams());
+
         return () => {
             socket.off('voice_response');
+            socket.off('voice_audio');
         };
     }, [socket, setDraftProfile]);
     // Auto-activate when backend says accessibility is enabled
@@ -53,7 +59,8 @@ const AccessibilityControl = () => {
         }
     }, [gameState, socket, isActive]);
 
-    // Auto-narration on game state changes
+    // Round cues. The narrations themselves (round start / end, NOT alerts) come from the server
+    // as voice_response, assembled from pre-rendered clips.
     useEffect(() => {
         if (!socket || !gameState || !isActive) return;
 
@@ -63,103 +70,20 @@ const AccessibilityControl = () => {
 
         if (!myPlayer) return;
 
-        // Narrate round start
         if (gameState.state === 'PLAYING' && gameState.round_number !== lastNarratedRoundRef.current) {
             lastNarratedRoundRef.current = gameState.round_number;
-
-            for (const team of Object.values(gameState.teams || {})) {
-                if (team.players[socket.id]) {
-                    // Build teammate info
-                    const teammates = Object.values(team.players).filter(p => p.sid !== socket.id);
-                    const teammateInfo = teammates.map(p => `${p.name} tiene carta ${p.card_value}`).join(', ');
-
-                    const narration = `Ronda ${gameState.round_number} iniciada. Tu puerta es ${team.current_gate}. Tu carta tiene valor ${myPlayer.card_value}${teammates.length > 0 ? `. Tus compañeros: ${teammateInfo}` : ''}.`;
-                    socket.emit('voice_input', {
-                        audio: null,
-                        text: narration,
-                        context: { view: 'IN_GAME', state: gameState },
-                        isAutoNarration: true
-                    });
-                    break;
-                }
-            }
         }
 
-        // Detect NOT gate changes
-        const currentNotGates = {};
-        for (const team of Object.values(gameState.teams || {})) {
-            for (const [pid, player] of Object.entries(team.players || {})) {
-                currentNotGates[pid] = player.has_not_gate || false;
-            }
-        }
-
-        for (const [pid, hasNot] of Object.entries(currentNotGates)) {
-            const wasNot = lastNotGatesRef.current[pid] || false;
-            if (hasNot && !wasNot) {
-                const player = Object.values(gameState.teams || {})
-                    .flatMap(t => Object.values(t.players || {}))
-                    .find(p => p.sid === pid);
-
-                if (player) {
-                    const isMe = pid === socket.id;
-                    const narration = isMe
-                        ? "¡Alerta! Tu carta ha sido invertida por una puerta NOT de un rival."
-                        : `Tu compañero ${player.name} ha sido saboteado con una puerta NOT.`;
-
-                    socket.emit('voice_input', {
-                        audio: null,
-                        text: narration,
-                        context: { view: 'IN_GAME', state: gameState },
-                        isAutoNarration: true
-                    });
-                }
-            }
-        }
-
-        lastNotGatesRef.current = currentNotGates;
-
-        // Detect round end and narrate results
+        // Detect round end and play the result sound
         if (gameState.state === 'FINISHED' && lastNarratedRoundRef.current === gameState.round_number) {
-            // Mark as narrated so we don't repeat
+            // Mark as played so we don't repeat
             lastNarratedRoundRef.current = -999;
 
-            // Find my team
-            let myTeam = null;
-            let myTeamId = null;
-            for (const [teamId, team] of Object.entries(gameState.teams || {})) {
-                if (team.players[socket.id]) {
-                    myTeam = team;
-                    myTeamId = teamId;
-                    break;
-                }
-            }
+            const myTeam = Object.values(gameState.teams || {}).find(team => team.players[socket.id]);
 
             if (myTeam) {
                 const success = myTeam.last_round_result === 'success';
 
-                // Build result narration
-                let resultText = success
-                    ? `¡Éxito! Tu equipo ha ganado esta ronda.`
-                    : `Ronda fallida. Tu equipo no logró el objetivo.`;
-
-                // Add score info
-                resultText += ` Puntuación actual: ${myTeam.score} puntos.`;
-
-                // Add rival teams info
-                const rivalTeams = Object.entries(gameState.teams || {})
-                    .filter(([id]) => id !== myTeamId)
-                    .map(([id, team]) => {
-                        const hasPlayers = Object.keys(team.players || {}).length > 0;
-                        if (!hasPlayers) return null;
-                        const rivalResult = team.last_round_result === 'success' ? 'ganó' : 'perdió';
-                        return `El equipo rival ${rivalResult} con ${team.score} puntos`;
-                    })
-                    .filter(Boolean);
-
-                if (rivalTeams.length > 0) {
-                    resultText += ` ${rivalTeams.join('. ')}.`;
-                }
-
                 // Play success/failure sound effect
                 const playResultSound = (isSuccess) => {
                     try {
@@ -200,18 +124,7 @@ const AccessibilityControl = () => {
                     }
                 };
 
-                // Play sound first
                 playResultSound(success);
-
-                // Then narrate after a short delay
-                setTimeout(() => {
-                    socket.emit('voice_input', {
-                        audio: null,
-                        text: resultText,
-                        context: { view: 'IN_GAME', state: gameState },
-                        isAutoNarration: true
-                    });
-                }, 600);
             }
         }
     }, [gameState, socket, isActive]);
@@ -296,7 +209,8 @@ const AccessibilityControl = () => {
         const context = gameState ? "IN_GAME" : "LOBBY";
         socket.emit('voice_input', {
             audio: blob,
-            context: { view: context, state: gameState }
+            context: { view: context, state: gameState },
+            stream: true
         });
     };
 
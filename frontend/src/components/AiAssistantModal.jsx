@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Modal, Button, Form, Row, Col, Card, Badge } from 'react-bootstrap';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useSocket } from '../context/SocketContext';
+import { decodePayload } from '../utils/msgpack';
+import { createAudioStreams } from '../utils/audioStream';
 
 const AiAssistantModal = ({ show, onClose }) => {
     const { socket, isConnected } = useSocket();
@@ -37,7 +39,8 @@ const AiAssistantModal = ({ show, onClose }) => {
                 }
             };
 
-            const handleResponse = (data) => {
+            const handleResponse = (payload) => {
+                const data = decodePayload(payload);
                 setIsThinking(false);
                 if (data.text) {
                     // Check if moderated
@@ -72,8 +75,15 @@ const AiAssistantModal = ({ show, onClose }) => {
                 alert(data.message || "Hubo un error");
             };
 
+            // Audio of streamed responses, played as it arrives
+            const handleAudio = createAudioStreams({
+                onStart: () => setIsSpeaking(true),
+                onEnd: () => setIsSpeaking(false)
+            });
+
             socket.on('assistant_characters', handleCharacters);
             socket.on('assistant_response', handleResponse);
+            socket.on('assistant_audio', handleAudio);
             socket.on('character_added', handleCharacterAdded);
             socket.on('character_updated', handleCharacterUpdated);
             socket.on('assistant_error', handleAssistantError);
@@ -81,6 +91,7 @@ const AiAssistantModal = ({ show, onClose }) => {
             return () => {
                 socket.off('assistant_characters', handleCharacters);
                 socket.off('assistant_response', handleResponse);
+                socket.off('assistant_audio', handleAudio);
                 socket.off('character_added', handleCharacterAdded);
                 socket.off('character_updated', handleCharacterUpdated);
                 socket.off('assistant_error', handleAssistantError);
@@ -167,7 +178,8 @@ const AiAssistantModal = ({ show, onClose }) => {
             const buffer = reader.result;
             socket.emit('assistant_chat', {
                 character: selectedChar,
-                audio: buffer
+                audio: buffer,
+                stream: true
             });
         };
     };
@@ -9,6 +9,7 @@ import { LogicGate } from './Visuals';
 import HackerDashboard from './HackerDashboard';
 import { getGateInfo } from '../utils/gateHelpers';
 import TeamChat from './TeamChat';
+import { secondsUntil } from '../utils/serverClock';
 import { Container, Row, Col, Card, Button, ProgressBar, Badge, Navbar, Nav, OverlayTrigger, Tooltip } from 'react-bootstrap';
 
 const GameArena = () => {
@@ -28,79 +29,69 @@ const GameArena = () => {
     }, []);
 
     // Alert sound when time is running out (hurry mode - last 5 seconds)
+    const hurry = gameState?.state === 'PLAYING' && timeLeft <= 5 && timeLeft > 0;
     React.useEffect(() => {
-        if (gameState?.state === 'PLAYING' && gameState?.timer !== undefined) {
-            const timeLeft = gameState.timer; // Use raw timer value
+        if (hurry) {
+            console.log('[ALERT] Activating beeps! Time:', timeLeft);
 
-            console.log('[ALERT] Timer:', timeLeft, 'State:', gameState.state);
+            const playBeep = () => {
+                console.log('[ALERT] Playing beep at:', new Date().toISOString());
+                try {
+                    const audioContext = new (window.AudioContext || window.webkitAudioContext)();
+                    const oscillator = audioContext.createOscillator();
+                    const gainNode = audioContext.createGain();
 
-            // Start repeating beeps when <= 5 seconds
-            if (timeLeft <= 5 && timeLeft > 0) {
-                console.log('[ALERT] Activating beeps! Time:', timeLeft);
+                    oscillator.connect(gainNode);
+                    gainNode.connect(audioContext.destination);
 
-                const playBeep = () => {
-                    console.log('[ALERT] Playing beep at:', new Date().toISOString());
-                    try {
-                        const audioContext = new (window.AudioContext || window.webkitAudioContext)();
-                        const oscillator = audioContext.createOscillator();
-                        const gainNode = audioContext.createGain();
+                    oscillator.frequency.value = 1000; // Higher frequency for urgency
+                    oscillator.type = 'sine';
 
-                        oscillator.connect(gainNode);
-                        gainNode.connect(audioContext.destination);
+                    gainNode.gain.setValueAtTime(0.4, audioContext.currentTime);
+                    gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.2);
 
-                        oscillator.frequency.value = 1000; // Higher frequency for urgency
-                        oscillator.type = 'sine';
-
-                        gainNode.gain.setValueAtTime(0.4, audioContext.currentTime);
-                        gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.2);
-
-                        oscillator.start(audioContext.currentTime);
-                        oscillator.stop(audioContext.currentTime + 0.2);
-                    } catch (e) {
-                        console.error("[ALERT] Sound error:", e);
-                    }
-                };
+                    oscillator.start(audioContext.currentTime);
+                    oscillator.stop(audioContext.currentTime + 0.2);
+                } catch (e) {
+                    console.error("[ALERT] Sound error:", e);
+                }
+            };
 
-                // Play initial beep
-                playBeep();
+            // Play initial beep
+            playBeep();
 
-                // Repeat every 1 second
-                const interval = setInterval(playBeep, 1000);
+            // Repeat every 1 second
+            const interval = setInterval(playBeep, 1000);
 
-                return () => {
-                    console.log('[ALERT] Cleaning up interval');
-                    clearInterval(interval);
-                };
-            }
+            return () => {
+                console.log('[ALERT] Cleaning up interval');
+                clearInterval(interval);
+            };
         }
-    }, [gameState?.timer, gameState?.state]);
+    }, [hurry]);
 
-    // Reliable Timer Logic
+    // Reliable Timer Logic: count down locally to the server's round_end_time
     useEffect(() => {
-        if (gameState?.state === 'PLAYING' && gameState?.timer > 0) {
-            // Set the target end time relative to now
-            const endTime = Date.now() + (gameState.timer * 1000);
+        if (gameState?.state === 'PLAYING' && gameState?.round_end_time) {
+            const endTime = gameState.round_end_time;
+            const tick = () => {
+                const diff = Math.ceil(secondsUntil(endTime));
+                setTimeLeft(diff);
+                return diff;
+            };
 
             const timerInterval = setInterval(() => {
-                const now = Date.now();
-                const diff = Math.ceil((endTime - now) / 1000);
-
-                if (diff <= 0) {
-                    setTimeLeft(0);
-                    clearInterval(timerInterval);
-                } else {
-                    setTimeLeft(diff);
-                }
+                if (tick() <= 0) clearInterval(timerInterval);
             }, 500); // Update twice a second for smoothness
 
             // Initial set
-            setTimeLeft(Math.ceil(gameState.timer));
+            tick();
 
             return () => clearInterval(timerInterval);
         } else {
             setTimeLeft(0);
         }
-    }, [gameState?.state]); // Only re-run when game state changes (PLAYING/not PLAYING)
+    }, [gameState?.state, gameState?.round_end_time]);
 
     // Reset dismiss state when a new round starts
     React.useEffect(() => {
@@ -2,31 +2,25 @@ import React from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Container, Row, Col, Card, Button, Form, Badge, ProgressBar, InputGroup } from 'react-bootstrap';
 import { useSocket } from '../context/SocketContext';
+import { secondsUntil } from '../utils/serverClock';
 
 const HackerDashboard = ({ gameState, onStartRound, onToggleNot, onKickPlayer, onSetGameMode, onSetTargetGate, onSetTargetGates, onSetLogicMode, onSetMaxPlayers, onSetNotLockout, onResetScores, onToggleChat, onAddTeam, onRemoveTeam }) => {
     const { socket } = useSocket();
     const [roundDuration, setRoundDuration] = React.useState(30);
     const [timeLeft, setTimeLeft] = React.useState(0);
 
-    // Initialize timer when round starts
+    // Count down locally to the server's round_end_time (offset from clock_sync)
     React.useEffect(() => {
-        if (gameState?.state === 'PLAYING' && gameState?.timer > 0) {
-            setTimeLeft(Math.ceil(gameState.timer));
-        } else if (gameState?.state !== 'PLAYING') {
-            setTimeLeft(0);
-        }
-    }, [gameState?.state]);
-
-    // Countdown independently every second
-    React.useEffect(() => {
-        if (timeLeft > 0) {
-            const interval = setInterval(() => {
-                setTimeLeft(prev => Math.max(0, prev - 1));
-            }, 1000);
-
+        if (gameState?.state === 'PLAYING' && gameState?.round_end_time) {
+            const endTime = gameState.round_end_time;
+            const tick = () => setTimeLeft(Math.ceil(secondsUntil(endTime)));
+            tick();
+            const interval = setInterval(tick, 1000);
             return () => clearInterval(interval);
+        } else {
+            setTimeLeft(0);
         }
-    }, [timeLeft]);
+    }, [gameState?.state, gameState?.round_end_time]);
 
     return (
         <div className="min-vh-100 bg-black text-success font-monospace p-4 overflow-auto">
@@ -11,16 +11,27 @@ const TeamChat = ({ socket, room, teamId, myName }) => {
     useEffect(() => {
         if (!socket) return;
 
+        // Sent once to the whole team; our own messages are recognised by sender_sid
+        const withIsMe = (msg) => ({ ...msg, is_me: msg.sender_sid === socket.id });
+
         const handleMessage = (data) => {
-            setMessages(prev => [...prev, data]);
+            setMessages(prev => [...prev, withIsMe(data)]);
+        };
+
+        // Recent team messages (server keeps a bounded buffer per team)
+        const handleHistory = (data) => {
+            setMessages((data.messages || []).map(withIsMe));
         };
 
         socket.on('chat_message', handleMessage);
+        socket.on('chat_history', handleHistory);
+        socket.emit('get_chat_history', { room_id: room });
 
         return () => {
             socket.off('chat_message', handleMessage);
+            socket.off('chat_history', handleHistory);
         };
-    }, [socket]);
+    }, [socket, room, teamId]);
 
     useEffect(() => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -1,5 +1,8 @@
 import { createContext, useContext, useEffect, useState } from 'react';
 import { io } from 'socket.io-client';
+import { syncClock } from '../utils/serverClock';
+
+const CLOCK_RESYNC_MS = 60000;
 
 const SocketContext = createContext();
 
@@ -19,6 +22,8 @@ export const SocketProvider = ({ children }) => {
                 "ngrok-skip-browser-warning": "true"
             },
             transports: ['websocket', 'polling'],
+            // Opt in to msgpack payloads for heavy events (only used if the server enables SOCKETIO_MSGPACK)
+            auth: import.meta.env.VITE_WIRE_FORMAT === 'msgpack' ? { wire: 'msgpack' } : {},
             reconnection: true,
             reconnectionAttempts: 10,
             reconnectionDelay: 1000,
@@ -28,8 +33,14 @@ export const SocketProvider = ({ children }) => {
         newSocket.on('connect', () => {
             console.log('Connected to WebSocket');
             setIsConnected(true);
+            syncClock(newSocket);
         });
 
+        // Countdowns run locally from round_end_time, so keep the offset fresh against drift
+        const clockInterval = setInterval(() => {
+            if (newSocket.connected) syncClock(newSocket);
+        }, CLOCK_RESYNC_MS);
+
         newSocket.on('disconnect', () => {
             console.log('Disconnected from WebSocket');
             setIsConnected(false);
@@ -37,7 +48,10 @@ export const SocketProvider = ({ children }) => {
 
         setSocket(newSocket);
 
-        return () => newSocket.close();
+        return () => {
+            clearInterval(clockInterval);
+            newSocket.close();
+        };
     }, []);
 
     return (
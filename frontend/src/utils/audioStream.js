@@ -0,0 +1,83 @@
+// Streamed TTS audio (voice_audio / assistant_audio events)
+//
+// A response asked for with { stream: true } arrives as its text first, with
+// audio_stream: <id>, then as binary events { id, seq, data } while the server's
+// TTS engine produces the MP3, and { id, seq, end: true } last. Where
+// MediaSource plays MP3 (Chrome, Edge, Firefox) playback starts with the first
+// chunk; elsewhere the chunks are joined and played once the end arrives.
+
+const MIME = 'audio/mpeg';
+
+const canStream = () => typeof window !== 'undefined' && window.MediaSource && MediaSource.isTypeSupported(MIME);
+
+// Returns a handler for the audio events; onStart / onEnd(id) follow playback
+export const createAudioStreams = ({ onStart, onEnd } = {}) => {
+    const streams = new Map(); // id -> { next seq, held chunks, ... }
+
+    const finish = (stream) => {
+        URL.revokeObjectURL(stream.audio.src);
+        if (onEnd) onEnd(stream.id);
+    };
+
+    const pump = (stream) => {
+        const { buffer, source } = stream;
+        if (!buffer || buffer.updating) return;
+        if (stream.queue.length) {
+            buffer.appendBuffer(stream.queue.shift());
+        } else if (stream.ended && source.readyState === 'open') {
+            source.endOfStream();
+        }
+    };
+
+    const open = (id) => {
+        const stream = { id, next: 0, held: new Map(), queue: [], chunks: [], ended: false, audio: new Audio() };
+        stream.audio.onended = () => finish(stream);
+        if (canStream()) {
+            stream.source = new MediaSource();
+            stream.audio.src = URL.createObjectURL(stream.source);
+            stream.source.addEventListener('sourceopen', () => {
+                stream.buffer = stream.source.addSourceBuffer(MIME);
+                stream.buffer.addEventListener('updateend', () => pump(stream));
+                pump(stream);
+            }, { once: true });
+            stream.audio.play().catch(e => console.error("Audio play error:", e));
+        }
+        streams.set(id, stream);
+        if (onStart) onStart(id);
+        return stream;
+    };
+
+    const accept = (stream, message) => {
+        if (message.end) {
+            stream.ended = true;
+        } else if (stream.source) {
+            stream.queue.push(new Uint8Array(message.data));
+        } else {
+            stream.chunks.push(message.data);
+        }
+    };
+
+    return (message) => {
+        const stream = streams.get(message.id) || open(message.id);
+        // Socket.IO keeps order on one connection; seq guards against gaps all the same
+        stream.held.set(message.seq, message);
+        while (stream.held.has(stream.next)) {
+            accept(stream, stream.held.get(stream.next));
+            stream.held.delete(stream.next);
+            stream.next += 1;
+        }
+        if (stream.source) {
+            pump(stream);
+        }
+        if (stream.ended) {
+            streams.delete(stream.id);
+            if (stream.next === 1) { // Only the end marker: nothing to play
+                stream.audio.pause();
+                finish(stream);
+            } else if (!stream.source) {
+                stream.audio.src = URL.createObjectURL(new Blob(stream.chunks, { type: MIME }));
+                stream.audio.play().catch(e => console.error("Audio play error:", e));
+            }
+        }
+    };
+};
@@ -0,0 +1,81 @@
+// Minimal msgpack decoder for server payloads (see backend/wire.py)
+//
+// When the client connects with auth { wire: 'msgpack' } (VITE_WIRE_FORMAT=msgpack)
+// and the server allows it, heavy events (game_state, game_state_delta,
+// voice_response, assistant_response) arrive as a binary attachment instead of
+// JSON. decodePayload() accepts either form, so handlers work with both.
+
+const textDecoder = new TextDecoder();
+
+export const decode = (bytes) => {
+    const data = bytes instanceof Uint8Array ? bytes : new Uint8Array(bytes);
+    const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+    let pos = 0;
+
+    const str = (length) => {
+        const value = textDecoder.decode(data.subarray(pos, pos + length));
+        pos += length;
+        return value;
+    };
+    const bin = (length) => {
+        const value = data.slice(pos, pos + length);
+        pos += length;
+        return value;
+    };
+    const array = (length) => {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = read();
+        return value;
+    };
+    const map = (length) => {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+    const u8 = () => view.getUint8(pos++);
+    const u16 = () => { const v = view.getUint16(pos); pos += 2; return v; };
+    const u32 = () => { const v = view.getUint32(pos); pos += 4; return v; };
+
+    const read = () => {
+        const type = u8();
+        if (type <= 0x7f) return type; // positive fixint
+        if (type >= 0xe0) return type - 0x100; // negative fixint
+        if ((type & 0xf0) === 0x80) return map(type & 0x0f);
+        if ((type & 0xf0) === 0x90) return array(type & 0x0f);
+        if ((type & 0xe0) === 0xa0) return str(type & 0x1f);
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return bin(u8());
+            case 0xc5: return bin(u16());
+            case 0xc6: return bin(u32());
+            case 0xca: { const v = view.getFloat32(pos); pos += 4; return v; }
+            case 0xcb: { const v = view.getFloat64(pos); pos += 8; return v; }
+            case 0xcc: return u8();
+            case 0xcd: return u16();
+            case 0xce: return u32();
+            case 0xcf: { const v = Number(view.getBigUint64(pos)); pos += 8; return v; }
+            case 0xd0: { const v = view.getInt8(pos); pos += 1; return v; }
+            case 0xd1: { const v = view.getInt16(pos); pos += 2; return v; }
+            case 0xd2: { const v = view.getInt32(pos); pos += 4; return v; }
+            case 0xd3: { const v = Number(view.getBigInt64(pos)); pos += 8; return v; }
+            case 0xd9: return str(u8());
+            case 0xda: return str(u16());
+            case 0xdb: return str(u32());
+            case 0xdc: return array(u16());
+            case 0xdd: return array(u32());
+            case 0xde: return map(u16());
+            case 0xdf: return map(u32());
+            default: throw new Error(`msgpack: unsupported type 0x${type.toString(16)}`);
+        }
+    };
+
+    return read();
+};
+
+export const decodePayload = (data) =>
+    (data instanceof ArrayBuffer || ArrayBuffer.isView(data)) ? decode(data) : data;
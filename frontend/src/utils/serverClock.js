@@ -0,0 +1,37 @@
+// Server clock estimate (clock_sync handshake)
+//
+// The client sends its send time t0; the server acks with its own clock.
+// Assuming a symmetric path, offset = server_time - (t0 + t1) / 2. The sample
+// with the smallest round trip is the most accurate one, so each sync keeps
+// the best of a few pings.
+
+const SAMPLES = 5;
+
+let offsetMs = 0;
+
+const ping = (socket) => new Promise((resolve) => {
+    const t0 = Date.now();
+    socket.timeout(5000).emit('clock_sync', { t0 }, (err, reply) => {
+        if (err || !reply) return resolve(null);
+        const t1 = Date.now();
+        resolve({ rtt: t1 - t0, offset: reply.server_time - (t0 + t1) / 2 });
+    });
+});
+
+export const syncClock = async (socket) => {
+    let best = null;
+    for (let i = 0; i < SAMPLES; i++) {
+        const sample = await ping(socket);
+        if (sample && (!best || sample.rtt < best.rtt)) best = sample;
+    }
+    if (best) {
+        offsetMs = best.offset;
+        console.log(`[CLOCK] offset ${Math.round(offsetMs)}ms (rtt ${best.rtt}ms)`);
+    }
+};
+
+export const serverNow = () => Date.now() + offsetMs;
+
+// Seconds left until a server epoch timestamp (game_state.round_end_time)
+export const secondsUntil = (serverEpochSeconds) =>
+    serverEpochSeconds ? Math.max(0, serverEpochSeconds - serverNow() / 1000) : 0;
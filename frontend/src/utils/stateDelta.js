@@ -0,0 +1,22 @@
+// Versioned game_state deltas (mirror of backend/room_state.py apply_delta)
+//
+// A delta lists only the keys that changed. When a key holds an object in both
+// the current and new state the value is itself a delta; any other value
+// replaces the old one. Keys that disappeared are listed under '$del'.
+
+const DELETED = '$del';
+
+const isPlainObject = (value) => value !== null && typeof value === 'object' && !Array.isArray(value);
+
+export const applyDelta = (state, changes) => {
+    const result = { ...state };
+    for (const key of changes[DELETED] || []) {
+        delete result[key];
+    }
+    for (const [key, value] of Object.entries(changes)) {
+        if (key === DELETED) continue;
+        const before = result[key];
+        result[key] = isPlainObject(before) && isPlainObject(value) ? applyDelta(before, value) : value;
+    }
+    return result;
+};